@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: construção do CanonDict (etapa final de load_orcamento / load_sudecap)
+com o laço antigo via `iterrows()` x a versão vetorizada atual.
+
+Uso:
+    python scripts/bench_canon_build.py --rows 50000 --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.adapters import orcamento, sudecap  # noqa: E402
+
+
+# ---------- implementações antigas (referência) ----------
+
+def _old_orcamento(df_all: pd.DataFrame) -> dict:
+    out: dict = {}
+    occ_counter: dict[str, int] = {}
+    for _, row in df_all.iterrows():
+        codigo_base = row["CODIGO_ORC"]
+        occ = occ_counter.get(codigo_base, 0) + 1
+        occ_counter[codigo_base] = occ
+        key = f"{codigo_base}__occ{occ}"
+        item = {
+            "codigo": codigo_base,
+            "descricao": row["DESCRICAO_ORC"],
+            "valor_unit": float(row["VALOR_ORC"]) if pd.notna(row["VALOR_ORC"]) else 0.0,
+            "fonte": "ORCAMENTO",
+        }
+        if "BANCO" in df_all.columns:
+            item["banco"] = str(row.get("BANCO", "")).strip()
+        out[key] = item
+    return out
+
+
+def _old_sudecap(proj: pd.DataFrame) -> dict:
+    out: dict = {}
+    for _, row in proj.iterrows():
+        codigo = row["CODIGO_SUDECAP"]
+        out[codigo] = {
+            "codigo": codigo,
+            "descricao": row["DESCRICAO_SUDECAP"],
+            "valor_unit": float(row["VALOR_SUDECAP"]) if pd.notna(row["VALOR_SUDECAP"]) else 0.0,
+            "fonte": "SUDECAP",
+        }
+    return out
+
+
+# ---------- tabelas sintéticas ----------
+
+def _synthetic(rows: int, seed: int = 0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    codes = pd.Series(rng.integers(1, rows // 2, size=rows)).astype(str)  # ~2 ocorrências por código
+    descs = pd.Series([f"SERVICO {i} - DESCRICAO DE TESTE" for i in range(rows)])
+    vals = pd.Series(rng.uniform(1, 5000, size=rows).round(2))
+    vals[rng.random(rows) < 0.05] = np.nan
+    bancos = pd.Series(rng.choice(["SINAPI", "SUDECAP", " ORSE "], size=rows))
+
+    df_orc = pd.DataFrame({"CODIGO_ORC": codes, "DESCRICAO_ORC": descs, "VALOR_ORC": vals, "BANCO": bancos})
+    df_sud = pd.DataFrame({"CODIGO_SUDECAP": codes, "DESCRICAO_SUDECAP": descs, "VALOR_SUDECAP": vals})
+    return df_orc, df_sud
+
+
+def _best(fn, arg, repeat: int) -> tuple[float, dict]:
+    best = float("inf")
+    out: dict = {}
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn(arg)
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark: construção do CanonDict (antigo x vetorizado).")
+    p.add_argument("--rows", type=int, default=50_000, help="Linhas da tabela sintética (padrão: 50000).")
+    p.add_argument("--repeat", type=int, default=3, help="Repetições (vale o melhor tempo).")
+    args = p.parse_args()
+
+    # os duplicados da tabela sintética gerariam um aviso por linha
+    logging.basicConfig(level=logging.ERROR)
+
+    df_orc, df_sud = _synthetic(args.rows)
+
+    for name, old, new, df in (
+        ("ORÇAMENTO", _old_orcamento, orcamento._build_canon, df_orc),
+        ("SUDECAP", _old_sudecap, sudecap._build_canon, df_sud),
+    ):
+        t_old, out_old = _best(old, df, args.repeat)
+        t_new, out_new = _best(new, df, args.repeat)
+        same = out_old == out_new and list(out_old) == list(out_new)
+        print(
+            f"{name:<10} rows={args.rows:>7} | iterrows: {t_old * 1000:8.1f} ms | "
+            f"vetorizado: {t_new * 1000:7.1f} ms | {t_old / t_new:5.1f}x | idêntico={same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tempo de leitura de cada base (ORÇAMENTO / SINAPI / SUDECAP) por motor de planilha
+(`pandas` x `calamine`), conferindo que a saída dos adapters é idêntica entre os motores.
+
+O cache em disco é desligado durante a medição.
+
+Uso:
+    python scripts/bench_engines.py \
+        --orcamento "data/ORÇAMENTO - ACIONAMENTO 01 - REV 05 final.xlsx" \
+        --sinapi data/SINAPI_2025_06.xlsx \
+        --sudecap data/SUDECAP_2025_04.xls \
+        --sudecap-estrutura "data/SUDECAP_COMPOSIÇÕES_2025_04.xls"
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.utils.utils_cache import configure_cache  # noqa: E402
+from cruzar_orcamento.adapters.sheet_reader import (  # noqa: E402
+    calamine_disponivel,
+    configure_engine,
+)
+from cruzar_orcamento.adapters.orcamento import load_orcamento  # noqa: E402
+from cruzar_orcamento.adapters.estrutura_orcamento import load_estrutura_orcamento  # noqa: E402
+from cruzar_orcamento.adapters.sinapi import load_sinapi_ccd_pr  # noqa: E402
+from cruzar_orcamento.adapters.estrutura_sinapi import load_estrutura_sinapi_analitico  # noqa: E402
+from cruzar_orcamento.adapters.sudecap import load_sudecap  # noqa: E402
+from cruzar_orcamento.adapters.estrutura_sudecap import load_estrutura_sudecap  # noqa: E402
+
+
+def _best(fn, path: str, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    out: object = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn(path)
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark: tempo de leitura por motor de planilha.")
+    p.add_argument("--orcamento", help="Planilha de ORÇAMENTO (.xlsx).")
+    p.add_argument("--sinapi", help="Planilha SINAPI (.xlsx, abas CCD e Analítico).")
+    p.add_argument("--sudecap", help="Planilha de preços SUDECAP (.xls/.xlsx).")
+    p.add_argument("--sudecap-estrutura", help="Relatório de composições SUDECAP (.xls/.xlsx).")
+    p.add_argument("--repeat", type=int, default=1, help="Repetições (vale o melhor tempo).")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    configure_cache(enabled=False)
+
+    casos = [
+        ("ORÇAMENTO preços", load_orcamento, args.orcamento),
+        ("ORÇAMENTO estrutura", load_estrutura_orcamento, args.orcamento),
+        ("SINAPI CCD", load_sinapi_ccd_pr, args.sinapi),
+        ("SINAPI Analítico", load_estrutura_sinapi_analitico, args.sinapi),
+        ("SUDECAP preços", load_sudecap, args.sudecap),
+        ("SUDECAP estrutura", load_estrutura_sudecap, args.sudecap_estrutura),
+    ]
+    casos = [c for c in casos if c[2]]
+    if not casos:
+        p.error("informe ao menos um arquivo (--orcamento, --sinapi, --sudecap, --sudecap-estrutura)")
+
+    engines = ["pandas"] + (["calamine"] if calamine_disponivel() else [])
+    if len(engines) == 1:
+        print("python-calamine não instalado: medindo só o motor 'pandas'.")
+
+    for nome, fn, path in casos:
+        tempos: dict[str, float] = {}
+        saidas: dict[str, object] = {}
+        for eng in engines:
+            configure_engine(eng)
+            tempos[eng], saidas[eng] = _best(fn, path, args.repeat)
+        configure_engine(None)
+
+        ref = saidas["pandas"]
+        same = all(saidas[e] == ref and list(saidas[e]) == list(ref) for e in engines)  # type: ignore[call-overload]
+        cols = " | ".join(f"{e}: {tempos[e]:6.2f} s" for e in engines)
+        print(f"{nome:<20} | {cols} | idêntico={same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Testes do cache em disco (`utils_cache.cached_loader` / `limpar_cache`): acerto igual ao
+cálculo, invalidação por conteúdo do arquivo, parâmetro e versão; `CRUZAR_CACHE=0` não lê
+nem grava; pickle corrompido é recalculado; poda por tamanho e por idade.
+
+Uso:
+    python scripts/test_cache.py        (ou: pytest scripts/test_cache.py)
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.utils import utils_cache  # noqa: E402
+from cruzar_orcamento.utils.utils_cache import cached_loader, limpar_cache  # noqa: E402
+
+
+class _Pasta:
+    """Pasta de cache temporária (e ambiente limpo) durante o teste."""
+
+    def __enter__(self) -> Path:
+        self.antes = (utils_cache._enabled_override, utils_cache._dir_override,
+                      os.environ.pop("CRUZAR_CACHE", None), os.environ.pop("CRUZAR_CACHE_MAX_MB", None))
+        utils_cache._enabled_override = None
+        utils_cache._dir_override = Path(tempfile.mkdtemp())
+        return utils_cache._dir_override
+
+    def __exit__(self, *_) -> None:
+        utils_cache._enabled_override, utils_cache._dir_override, cache, max_mb = self.antes
+        for nome, valor in (("CRUZAR_CACHE", cache), ("CRUZAR_CACHE_MAX_MB", max_mb)):
+            if valor is not None:
+                os.environ[nome] = valor
+            else:
+                os.environ.pop(nome, None)
+
+
+def _loader(versao: int = 1):
+    chamadas = []
+
+    @cached_loader("teste", versao)
+    def ler(path: str, cidade: str = "CURITIBA") -> dict:
+        chamadas.append((path, cidade))
+        return {"conteudo": Path(path).read_text(), "cidade": cidade}
+
+    return ler, chamadas
+
+
+def _arquivo(pasta: Path, texto: str) -> str:
+    path = pasta / "base.txt"
+    path.write_text(texto)
+    return str(path)
+
+
+def test_acerto_e_invalidacao() -> None:
+    with _Pasta() as pasta:
+        ler, chamadas = _loader()
+        arq = _arquivo(Path(tempfile.mkdtemp()), "v1")
+        primeiro = ler(arq)
+        assert ler(arq) == primeiro and len(chamadas) == 1           # acerto = mesmo resultado
+        assert ler(arq, cidade="BH")["cidade"] == "BH" and len(chamadas) == 2   # parâmetro
+        _arquivo(Path(arq).parent, "v2")
+        assert ler(arq)["conteudo"] == "v2" and len(chamadas) == 3   # conteúdo do arquivo
+        ler_v2, chamadas_v2 = _loader(versao=2)
+        ler_v2(arq)
+        assert len(chamadas_v2) == 1                                 # versão do adapter
+        assert len(list(pasta.glob("teste-*.pkl"))) == 4
+
+
+def test_desligado_nao_le_nem_grava() -> None:
+    with _Pasta() as pasta:
+        os.environ["CRUZAR_CACHE"] = "0"
+        ler, chamadas = _loader()
+        arq = _arquivo(Path(tempfile.mkdtemp()), "x")
+        ler(arq)
+        ler(arq)
+        assert len(chamadas) == 2 and not list(pasta.iterdir())
+
+
+def test_pickle_corrompido_recalcula() -> None:
+    with _Pasta() as pasta:
+        ler, chamadas = _loader()
+        arq = _arquivo(Path(tempfile.mkdtemp()), "x")
+        esperado = ler(arq)
+        (alvo,) = pasta.glob("teste-*.pkl")
+        alvo.write_bytes(b"lixo")
+        assert ler(arq) == esperado and len(chamadas) == 2
+        assert ler(arq) == esperado and len(chamadas) == 2           # regravado
+
+
+def test_poda_por_tamanho_e_idade() -> None:
+    with _Pasta() as pasta:
+        agora = time.time()
+        for i in range(5):
+            p = pasta / f"x{i}.pkl"
+            p.write_bytes(b"0" * 1000)
+            os.utime(p, (agora - (5 - i) * 86400, agora - (5 - i) * 86400))   # x0 é o mais antigo
+        assert limpar_cache(max_bytes=None, max_idade_dias=3.5) == (2, 2000)
+        assert sorted(p.name for p in pasta.iterdir()) == ["x2.pkl", "x3.pkl", "x4.pkl"]
+        assert limpar_cache(max_bytes=1500) == (2, 2000)
+        assert [p.name for p in pasta.iterdir()] == ["x4.pkl"]
+        assert limpar_cache() == (1, 1000) and not list(pasta.iterdir())
+
+        # gravação com limite: sai o usado há mais tempo, nunca o recém-gravado
+        os.environ["CRUZAR_CACHE_MAX_MB"] = str(1500 / 2**20)
+        antigo = pasta / "antigo.pkl"
+        antigo.write_bytes(b"0" * 1000)
+        os.utime(antigo, (agora - 86400, agora - 86400))
+        utils_cache.gravar_pickle(pasta / "novo.pkl", b"0" * 1000)
+        assert [p.name for p in pasta.iterdir()] == ["novo.pkl"]
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Testes de `cruzar_vetorizado`: mesmo JSON que `cruzar` + `_add_diffs_to_cruzado` /
+`_maybe_add_diffs_to_diverg` da CLI, com CanonDict e ItemTable dos dois lados e casos
+de borda (código ausente, base zero/NaN, descrição divergente, filtro de banco).
+`varrer_tolerancias`: cada faixa igual a um `cruzar` naquela tolerância.
+`cruzar_multi`: cada referência igual a um `cruzar_vetorizado` separado (valor nulo sai None),
+e `separar_referencia` devolve o mesmo JSON dele.
+
+Uso:
+    python scripts/test_cruzar_vetorizado.py        (ou: pytest scripts/test_cruzar_vetorizado.py)
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cli import _add_diffs_to_cruzado, _maybe_add_diffs_to_diverg  # noqa: E402
+from cruzar_orcamento.colunar import ItemTable  # noqa: E402
+from cruzar_orcamento.validators.processor import (  # noqa: E402
+    cruzar,
+    cruzar_multi,
+    cruzar_vetorizado,
+    separar_referencia,
+    varrer_tolerancias,
+)
+
+VALORES = [0.0, -0.0, 1.0, 1.01, 1.02, 1.03, 2.5, -3.0, 100.0, 1e-9, float("nan")]
+DESCRICOES = ["Concreto fck 25", "CONCRETO FCK=25", "Concreto  fck 25 ", "Aço CA-50", "ACO CA 50", ""]
+BANCOS = ["SUDECAP", "sudecap ", "SINAPI", "PROPRIO"]
+
+
+def _bases(n: int, seed: int):
+    rnd = random.Random(seed)
+    ref = {}
+    for i in range(n):
+        cod = str(1000 + i)
+        ref[cod] = {"codigo": cod, "descricao": rnd.choice(DESCRICOES),
+                    "valor_unit": rnd.choice(VALORES), "fonte": "SUDECAP"}
+    orc = {}
+    for i in range(2 * n):
+        cod = str(1000 + rnd.randrange(int(n * 1.3)))  # ~25% fora da referência
+        orc[f"{cod}__occ{i}"] = {"codigo": cod, "descricao": rnd.choice(DESCRICOES),
+                                 "valor_unit": rnd.choice(VALORES), "fonte": "ORCAMENTO",
+                                 "banco": rnd.choice(BANCOS)}
+    return orc, ref
+
+
+def _json(cruzado, diverg) -> str:
+    return json.dumps({"cruzado": cruzado, "divergencias": diverg}, ensure_ascii=False)
+
+
+def _esperado(orc, ref, **kw) -> str:
+    cruzado, diverg = cruzar(orc, ref, **kw)
+    return _json(_add_diffs_to_cruzado(cruzado), _maybe_add_diffs_to_diverg(diverg))
+
+
+def test_igual_ao_motor_linha_a_linha() -> None:
+    for seed in range(5):
+        orc, ref = _bases(400, seed)
+        for kw in (
+            {},
+            {"banco": "SUDECAP", "tol_rel": 0.0},
+            {"tol_rel": 0.015, "comparar_descricao": False},
+        ):
+            esperado = _esperado(orc, ref, **kw)
+            for a in (orc, ItemTable.from_canon(orc)):
+                for b in (ref, ItemTable.from_canon(ref)):
+                    assert _json(*cruzar_vetorizado(a, b, **kw)) == esperado, (seed, kw, type(a), type(b))
+
+
+def test_vazios_e_valores_nao_float() -> None:
+    orc, ref = _bases(50, 9)
+    assert cruzar_vetorizado({}, ref) == ([], [])
+    assert _json(*cruzar_vetorizado(orc, {})) == _esperado(orc, {})
+    assert _json(*cruzar_vetorizado(ItemTable.from_canon(orc), ItemTable.from_canon({}))) == _esperado(orc, {})
+    # inteiros (dict montado à mão): cai no motor linha a linha, mesma saída
+    for it in list(ref.values())[:10]:
+        it["valor_unit"] = 7
+    assert _json(*cruzar_vetorizado(orc, ref)) == _esperado(orc, ref)
+
+
+def _faixas_esperadas(orc, ref, tolerancias, **kw) -> list[dict]:
+    faixas = []
+    for t in tolerancias:
+        _, diverg = cruzar(orc, ref, tol_rel=t, **kw)
+        faixas.append({
+            "tol_rel": t,
+            "total_divergencias": len(diverg),
+            "valor_divergente": sum("VALOR_DIVERGENTE" in d["motivos"] for d in diverg),
+            "codigos": sorted({d["codigo"] for d in diverg}),
+        })
+    return faixas
+
+
+def test_varredura_igual_a_um_cruzamento_por_tolerancia() -> None:
+    tolerancias = [0.0, 0.005, 0.01, 0.02, 0.03, 0.05, 1.0, -1.0]
+    for seed in range(3):
+        orc, ref = _bases(400, seed)
+        for kw in ({}, {"banco": "SUDECAP", "comparar_descricao": False}):
+            esperado = _faixas_esperadas(orc, ref, tolerancias, **kw)
+            for a, b in ((orc, ref), (ItemTable.from_canon(orc), ItemTable.from_canon(ref))):
+                assert varrer_tolerancias(a, b, tolerancias, **kw) == esperado, (seed, kw)
+    # valores não float: uma passada de `cruzar` por tolerância, mesmo resultado
+    ref["1000"]["valor_unit"] = 3
+    assert varrer_tolerancias(orc, ref, tolerancias) == _faixas_esperadas(orc, ref, tolerancias)
+
+
+def test_multi_igual_a_um_cruzamento_por_referencia() -> None:
+    orc, ref1 = _bases(300, 1)
+    _, ref2 = _bases(250, 2)
+    _, ref3 = _bases(350, 3)
+    refs = {"SUDECAP_2025_04": ref1, "SINAPI_2025_05": ItemTable.from_canon(ref2), "SINAPI_2025_06": ref3}
+    bancos = {"SUDECAP_2025_04": "SUDECAP", "SINAPI_2025_05": "SINAPI", "SINAPI_2025_06": None}
+    for a in (orc, ItemTable.from_canon(orc)):
+        linhas, resumo = cruzar_multi(a, refs, bancos=bancos, tol_rel=0.01)
+        assert [ln["codigo"] for ln in linhas] == [it["codigo"] for it in orc.values()]  # um ref sem filtro
+        for nome, ref in refs.items():
+            cruzado, diverg = cruzar_vetorizado(orc, ref, banco=bancos[nome], tol_rel=0.01)
+            obtido = [
+                (ln["codigo"], ln["refs"][nome]) for ln in linhas if ln["refs"][nome] is not None
+            ]
+            assert len(obtido) == len(cruzado) == resumo[nome]["comparados"]
+            assert resumo[nome]["divergencias"] == len(diverg)
+            por_codigo = iter(diverg)
+            d = next(por_codigo, None)
+            for (codigo, r), c in zip(obtido, cruzado):
+                assert codigo == c["codigo"]
+                esperado = {k: c[k] for k in ("b_desc", "b_valor", "match", "dif_abs", "dif_rel")}
+                motivos, direcao = [], ""
+                if r["motivos"]:
+                    assert d is not None and d["codigo"] == codigo
+                    motivos, direcao = d["motivos"], d["dir"]
+                    d = next(por_codigo, None)
+                esperado.update(motivos=motivos, dir=direcao)
+                assert json.dumps(r) == json.dumps(esperado), (nome, codigo)
+            assert d is None
+
+
+def test_multi_valor_nulo_sai_none() -> None:
+    orc, ref = _bases(200, 4)
+    for it in list(ref.values())[::5]:
+        it["valor_unit"] = None                   # dict não float: vai pelo caminho da ItemTable
+    cruzado, diverg = cruzar_vetorizado(orc, ref)
+    linhas, _ = cruzar_multi(orc, {"REF": ref})
+    assert len(linhas) == len(cruzado)
+    por_codigo = iter(diverg)
+    d = next(por_codigo, None)
+    for ln, c in zip(linhas, cruzado):
+        r = ln["refs"]["REF"]
+        esperado = {k: c[k] for k in ("b_desc", "b_valor", "match", "dif_abs", "dif_rel")}
+        motivos, direcao = [], ""
+        if r["motivos"]:
+            assert d is not None and d["codigo"] == c["codigo"]
+            motivos, direcao = d["motivos"], d["dir"]
+            d = next(por_codigo, None)
+        esperado.update(motivos=motivos, dir=direcao)
+        assert json.dumps(r) == json.dumps(esperado), c["codigo"]
+    assert d is None
+    assert any(ln["refs"]["REF"]["match"] and ln["refs"]["REF"]["b_valor"] is None for ln in linhas)
+
+
+def test_separar_referencia_igual_ao_vetorizado() -> None:
+    orc, ref1 = _bases(300, 5)
+    _, ref2 = _bases(250, 6)
+    for it in list(ref2.values())[::7]:
+        it["valor_unit"] = None
+    refs = {"SUDECAP": ItemTable.from_canon(ref1), "SINAPI": ref2}
+    bancos = {"SUDECAP": "SUDECAP", "SINAPI": "SINAPI"}
+    linhas, _ = cruzar_multi(orc, refs, bancos=bancos, tol_rel=0.01)
+    for nome, ref in refs.items():
+        esperado = _json(*cruzar_vetorizado(orc, ref, banco=bancos[nome], tol_rel=0.01))
+        assert _json(*separar_referencia(linhas, nome)) == esperado, nome
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Testes do recálculo de custos (`validators/custos.py`): custos iguais aos de uma recursão
+simples num DAG aleatório profundo (dict e forma compacta), códigos casando pela forma
+canônica; filho sem preço e ciclos ficam indeterminados; tolerâncias de divergência; soma
+das linhas filhas de uma planilha de ORÇAMENTO (`load_orcamento_somas` + `verificar_somas`).
+
+Uso:
+    python scripts/test_custos.py        (ou: pytest scripts/test_custos.py)
+"""
+from __future__ import annotations
+
+import math
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.adapters.orcamento import load_orcamento_somas  # noqa: E402
+from cruzar_orcamento.colunar import EstruturaCompacta  # noqa: E402
+from cruzar_orcamento.validators.custos import (  # noqa: E402
+    calcular_custos, comparar_custos, juntar_precos, verificar_somas,
+)
+
+
+def _comp(cod: str, filhos: list[tuple[str, float]]) -> dict:
+    return {"codigo": cod, "descricao": f"COMP {cod}", "fonte": "SINAPI",
+            "filhos": [{"codigo": f, "descricao": f"ITEM {f}", "coeficiente": c} for f, c in filhos]}
+
+
+def _precos(valores: dict[str, float]) -> dict:
+    return {k: {"codigo": k, "descricao": f"ITEM {k}", "valor_unit": v, "fonte": "SINAPI"}
+            for k, v in valores.items()}
+
+
+def _dag(n: int, seed: int) -> tuple[dict, dict]:
+    """Composição i só usa composições de índice maior e insumos 'I…' (todos com preço)."""
+    rnd = random.Random(seed)
+    E = {}
+    for i in range(n):
+        aux = [str(j) for j in rnd.sample(range(i + 1, n), min(3, n - i - 1))] if rnd.random() < 0.7 else []
+        insumos = [f"I{rnd.randrange(40)}" for _ in range(rnd.randint(1, 3))]
+        E[str(i)] = _comp(str(i), [(f, round(rnd.uniform(0.01, 3), 4)) for f in aux + insumos])
+    return E, _precos({f"I{k}": round(rnd.uniform(1, 100), 2) for k in range(40)})
+
+
+def _custo(E: dict, precos: dict, cod: str) -> float:
+    return sum(ch["coeficiente"] * (_custo(E, precos, ch["codigo"]) if ch["codigo"] in E
+                                    else precos[ch["codigo"]]["valor_unit"])
+               for ch in E[cod]["filhos"])
+
+
+def test_igual_a_recursao_simples() -> None:
+    E, precos = _dag(150, 1)
+    for e in (E, EstruturaCompacta.from_estruturas(E)):
+        custos = calcular_custos(e, precos)
+        assert list(custos) == list(E)
+        for cod, c in custos.items():
+            assert math.isclose(c, _custo(E, precos, cod), rel_tol=1e-9), cod
+
+
+def test_coeficiente_na_forma_compacta() -> None:
+    E, _ = _dag(20, 2)
+    C = EstruturaCompacta.from_estruturas(E)
+    assert [f["coeficiente"] for f in C["3"]["filhos"]] == [f["coeficiente"] for f in E["3"]["filhos"]]
+    assert "coeficiente" not in EstruturaCompacta.from_estruturas({"1": _comp("1", [])})["1"]["filhos"]
+
+
+def test_indeterminados_e_tolerancias() -> None:
+    E = {
+        "1": _comp("1", [("002", 2.0), ("I1", 1.0)]),   # 2 casa por código canônico
+        "2": _comp("2", [("I1", 0.5), ("I2", 3.0)]),
+        "3": _comp("3", [("I1", 1.0), ("I9", 1.0)]),    # I9 sem preço
+        "4": _comp("4", [("5", 1.0)]),
+        "5": _comp("5", [("4", 1.0), ("I1", 1.0)]),     # ciclo 4 ↔ 5
+    }
+    insumos = _precos({"I1": 10.0, "I2": 1.0})
+    custos = calcular_custos(E, insumos)
+    assert custos["2"] == 8.0 and custos["1"] == 26.0
+    assert custos["3"] is None and custos["4"] is None and custos["5"] is None
+
+    informados = _precos({"1": 26.005, "2": 8.5})
+    diverg = {d["codigo"]: d for d in comparar_custos(E, insumos, informados, tol_abs=0.01)}
+    assert diverg["2"]["motivos"] == ["CUSTO_DIVERGENTE"] and diverg["2"]["dif_abs"] == 0.5
+    assert "1" not in diverg                                    # dentro de tol_abs
+    assert diverg["3"]["motivos"] == ["CUSTO_INDETERMINADO"] and diverg["3"]["filhos_sem_valor"] == ["I9"]
+    assert diverg["4"]["filhos_sem_valor"] == ["5"]
+    assert "2" not in {d["codigo"] for d in comparar_custos(E, insumos, informados, tol_rel=0.1)}
+
+
+def test_subcomposicao_vazia_deixa_o_pai_indeterminado() -> None:
+    E = {
+        "A": _comp("A", [("I1", 1.0), ("B", 2.0)]),
+        "B": _comp("B", []),                          # auxiliar sem filhos
+        "C": _comp("C", [("A", 1.0)]),
+    }
+    assert calcular_custos(E, _precos({"I1": 10.0})) == {"A": None, "B": None, "C": None}
+    diverg = {d["codigo"]: d for d in comparar_custos(E, _precos({"I1": 10.0}))}
+    assert diverg["A"]["motivos"] == ["CUSTO_INDETERMINADO"] and diverg["A"]["filhos_sem_valor"] == ["B"]
+
+
+def test_juntar_precos_por_codigo_canonico() -> None:
+    orc = {"01.02__occ1": {"codigo": "01.02", "descricao": "X", "valor_unit": 1.0, "fonte": "ORCAMENTO"},
+           "01.02__occ2": {"codigo": "01.02", "descricao": "X", "valor_unit": 9.0, "fonte": "ORCAMENTO"},
+           "7__occ1": {"codigo": "7", "descricao": "Y", "valor_unit": 7.0, "fonte": "ORCAMENTO"}}
+    tabela = _precos({"1.2": 2.0})
+    juntos = juntar_precos(orc, tabela)
+    assert {k: v["valor_unit"] for k, v in juntos.items()} == {"1.2": 2.0, "7": 7.0}   # a última tabela vence
+    assert juntar_precos(orc)["1.2"]["valor_unit"] == 1.0                             # na tabela: 1ª ocorrência
+    E = {"C": _comp("C", [("0001.02", 3.0)])}
+    assert calcular_custos(E, juntos) == {"C": 6.0}
+
+
+def test_somas_da_planilha_do_orcamento() -> None:
+    linhas = [
+        ["Composições Analíticas", None, None, None, None, None, None],
+        ["1.1", "Código", "Banco", "Descrição", "Quant.", "Valor Unit", "Total"],
+        ["Composição", "01.01", "SUDECAP", "COMP OK", 1, 10.98, 10.98],      # 2·3.33 + 0.1·43.25 (truncado)
+        ["Insumo", "10", "SUDECAP", "PEDREIRO", 2, 3.33, 6.66],
+        ["Insumo", "11", "SUDECAP", "CIMENTO", "0,1", 43.25, 4.32],
+        [None, None, None, None, "MO sem LS =>", 6.66, None],
+        ["1.2", "Código", "Banco", "Descrição", "Quant.", "Valor Unit", "Total"],
+        ["Composição", "02.01", "SINAPI", "COMP ERRADA", 1, 50.0, 50.0],
+        ["Composição Auxiliar", "88316", "SINAPI", "SERVENTE", 1.5, 20.0, 30.0],
+        ["Composição", "03.01", "SINAPI", "COMP SEM QUANT", 1, 5.0, 5.0],
+        ["Insumo", "12", "SINAPI", "AREIA", None, 5.0, None],
+        ["Composição", "04.01", "SINAPI", "COMP SEM FILHOS", 1, 7.0, 7.0],
+    ]
+    path = Path(tempfile.mkdtemp()) / "orcamento.xlsx"
+    pd.DataFrame(linhas).to_excel(path, sheet_name="Composições", header=False, index=False)
+
+    somas = load_orcamento_somas(str(path))
+    assert somas["CODIGO_ORC"].tolist() == ["01.01", "02.01", "03.01", "04.01"]
+    assert somas["N_FILHOS"].tolist() == [2, 1, 1, 0]
+    assert math.isclose(somas["SOMA_FILHOS"].iat[0], 10.985)
+
+    diverg = verificar_somas(somas, tol_abs=0.01, tol_por_filho=0.01)
+    assert [(d["codigo"], d["motivos"]) for d in diverg] == [
+        ("02.01", ["SOMA_DIVERGENTE"]), ("03.01", ["SOMA_INDETERMINADA"])]
+    assert diverg[0]["dif_abs"] == -20.0 and diverg[1]["filhos_sem_valor"] == ["12"]
+    # sem folga por linha, o arredondamento da 1ª composição também diverge
+    assert [d["codigo"] for d in verificar_somas(somas)] == ["01.01", "02.01", "03.01"]
+    # composição sem linhas filhas: motivo próprio, só quando pedido
+    assert [(d["codigo"], d["motivos"]) for d in verificar_somas(somas, sem_filhos=True)][-1] == (
+        "04.01", ["SEM_FILHOS"])
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
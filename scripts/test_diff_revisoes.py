@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Testes de `diff_revisoes` (revisões do ORÇAMENTO): composições iguais são puladas,
+adicionadas/removidas/alteradas aparecem com os motivos certos, com `EstruturaDict`
+e `EstruturaCompacta`, e códigos casam pela forma canônica.
+
+Uso:
+    python scripts/test_diff_revisoes.py        (ou: pytest scripts/test_diff_revisoes.py)
+"""
+from __future__ import annotations
+
+import copy
+import os
+import sys
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.colunar import EstruturaCompacta, ItemTable  # noqa: E402
+from cruzar_orcamento.validators.revisao import diff_revisoes  # noqa: E402
+
+
+def _revisao(n: int) -> tuple[dict, dict]:
+    precos, estr = {}, {}
+    for i in range(n):
+        cod = f"9{i:04d}"
+        desc = f"COMPOSIÇÃO {i}"
+        precos[f"{cod}__occ1"] = {"codigo": cod, "descricao": desc, "valor_unit": 10.0 + i, "fonte": "ORCAMENTO"}
+        estr[cod] = {"codigo": cod, "descricao": desc, "fonte": "ORCAMENTO", "filhos": [
+            {"codigo": str(100 + j), "descricao": f"INSUMO {j}"} for j in range(i % 5)
+        ]}
+    return precos, estr
+
+
+def test_revisao_identica_nao_tem_diferencas() -> None:
+    precos, estr = _revisao(50)
+    comps, resumo = diff_revisoes(precos, estr, copy.deepcopy(precos), EstruturaCompacta.from_estruturas(estr))
+    assert comps == [] and resumo == {"adicionadas": 0, "removidas": 0, "alteradas": 0, "inalteradas": 50}
+
+
+def test_adicionadas_removidas_alteradas() -> None:
+    pa, ea = _revisao(20)
+    pb, eb = copy.deepcopy(pa), copy.deepcopy(ea)
+    pb["90001__occ1"]["valor_unit"] = 22.0                               # 11 → 22
+    eb["90002"]["filhos"].append({"codigo": "999", "descricao": "NOVO"})
+    eb["90003"]["filhos"][0]["descricao"] = "insumo 0"                   # só caixa: igual
+    eb["90004"]["filhos"].reverse()                                      # só ordem: igual
+    eb["90004"]["filhos"][0]["descricao"] = "OUTRO"
+    pb["90005__occ1"]["descricao"] = eb["90005"]["descricao"] = "NOVA DESCRIÇÃO"
+    del pb["90006__occ1"], eb["90006"]
+    pb["90020__occ1"] = {"codigo": "90020", "descricao": "NOVA", "valor_unit": 5.0, "fonte": "ORCAMENTO"}
+    eb["90020"] = {"codigo": "90020", "descricao": "NOVA", "fonte": "ORCAMENTO",
+                   "filhos": [{"codigo": "7.0", "descricao": "X"}]}
+    eb["090007"] = eb.pop("90007")                                       # zero à esquerda: mesmo código
+
+    for b in (eb, EstruturaCompacta.from_estruturas(eb)):
+        comps, resumo = diff_revisoes(ItemTable.from_canon(pa), ea, pb, b)
+        por = {c["codigo"]: c for c in comps}
+        assert resumo == {"adicionadas": 1, "removidas": 1, "alteradas": 4, "inalteradas": 15}
+        assert list(por) == ["90001", "90002", "90004", "90005", "90006", "90020"]
+        assert por["90001"]["motivos"] == ["VALOR_ALTERADO"]
+        assert (por["90001"]["dif_abs"], por["90001"]["dif_rel"]) == (11.0, 1.0)
+        assert por["90002"]["filhos_adicionados"] == ["999"] and por["90002"]["motivos"] == ["FILHOS_ALTERADOS"]
+        assert [d["codigo"] for d in por["90004"]["filhos_desc_alterada"]] == ["103"]
+        assert por["90005"]["motivos"] == ["DESCRICAO_ALTERADA"]
+        assert por["90006"]["status"] == "REMOVIDA" and por["90006"]["filhos_removidos"] == ["100"]
+        assert por["90020"]["status"] == "ADICIONADA" and por["90020"]["filhos_adicionados"] == ["7"]
+        assert por["90020"]["valor_a"] is None and por["90020"]["dif_abs"] is None
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
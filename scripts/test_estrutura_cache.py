@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Testes do cache de `comparar_estruturas` (`CacheComparacoes`): mesmo resultado que sem cache
+(dict e forma compacta) e, numa nova revisão do ORÇAMENTO, só as composições alteradas são
+comparadas de novo — inclusive após salvar e recarregar o cache do disco.
+
+Uso:
+    python scripts/test_estrutura_cache.py        (ou: pytest scripts/test_estrutura_cache.py)
+"""
+from __future__ import annotations
+
+import copy
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.colunar import EstruturaCompacta  # noqa: E402
+from cruzar_orcamento.validators.estrutura_compare import (  # noqa: E402
+    CacheComparacoes,
+    comparar_estruturas,
+    hash_composicoes,
+)
+
+DESCRICOES = ["Cimento CP-II", "CIMENTO CP II", "Areia média", "AREIA MEDIA", "Pedreiro", "Servente"]
+
+
+def _estrutura(n: int, seed: int, fonte: str) -> dict:
+    rnd = random.Random(seed)
+    E = {}
+    for i in range(n):
+        pai = str(90000 + i)
+        filhos = [
+            {"codigo": rnd.choice([str(c), f"{c}.0", f"00{c}"]), "descricao": rnd.choice(DESCRICOES)}
+            for c in rnd.sample(range(100, 130), rnd.randint(0, 6))
+        ]
+        E[pai] = {"codigo": pai, "descricao": f"Composição {i}", "filhos": filhos, "fonte": fonte}
+    return E
+
+
+def _revisao(A: dict, alterar: list[str]) -> dict:
+    A2 = copy.deepcopy(A)
+    for pai in alterar:
+        A2[pai]["filhos"].append({"codigo": "999", "descricao": "Item novo"})
+    return A2
+
+
+def _cache_temporario() -> CacheComparacoes:
+    return CacheComparacoes(Path(tempfile.mkdtemp()) / "comparacoes.pkl")
+
+
+def test_igual_sem_cache() -> None:
+    A, B = _estrutura(300, 1, "ORCAMENTO"), _estrutura(250, 2, "SINAPI")
+    esperado = comparar_estruturas(A, B)
+    for a in (A, EstruturaCompacta.from_estruturas(A)):
+        for b in (B, EstruturaCompacta.from_estruturas(B)):
+            cache = _cache_temporario()
+            assert comparar_estruturas(a, b, cache=cache) == esperado
+            assert comparar_estruturas(a, b, cache=cache) == esperado  # 2ª vez: tudo do cache
+            assert cache.acertos == len(a)
+    assert hash_composicoes(A) == hash_composicoes(EstruturaCompacta.from_estruturas(A))
+
+
+def test_revisao_so_compara_o_que_mudou() -> None:
+    A, B = _estrutura(400, 3, "ORCAMENTO"), _estrutura(350, 4, "SINAPI")
+    path = Path(tempfile.mkdtemp()) / "comparacoes.pkl"
+    cache = CacheComparacoes(path)
+    comparar_estruturas(A, B, cache=cache)
+    assert (cache.acertos, path.exists()) == (0, True)
+
+    alterar = ["90003", "90100", "90399"]
+    A2 = _revisao(A, alterar)
+    cache = CacheComparacoes(path)  # recarrega do disco
+    obtido = comparar_estruturas(A2, EstruturaCompacta.from_estruturas(B), cache=cache)
+    assert obtido == comparar_estruturas(A2, B)
+    assert cache.acertos == len(A2) - len(alterar)
+    assert {d["pai_codigo"] for d in obtido} >= set(alterar)
+
+    # resultado devolvido é cópia: alterar não contamina o cache
+    obtido[0]["filhos_missing"].append("X")
+    assert comparar_estruturas(A2, B, cache=CacheComparacoes(path)) == comparar_estruturas(A2, B)
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Testes da comparação de estruturas em paralelo (`comparar_estruturas(..., workers=N)`): mesma
+saída, na mesma ordem, da versão serial — dict e forma compacta, pais repetidos pela forma
+canônica, com e sem cache — e `EstruturaCompacta.selecionar` (fatias enviadas aos processos).
+
+Uso:
+    python scripts/test_estrutura_paralela.py        (ou: pytest scripts/test_estrutura_paralela.py)
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.colunar import EstruturaCompacta  # noqa: E402
+from cruzar_orcamento.validators import estrutura_compare  # noqa: E402
+from cruzar_orcamento.validators.estrutura_compare import CacheComparacoes, comparar_estruturas  # noqa: E402
+
+DESCRICOES = ["Cimento CP-II", "CIMENTO CP II", "Areia média", "AREIA MEDIA", "Pedreiro", "Servente"]
+
+
+def _estrutura(n: int, seed: int, fonte: str) -> dict:
+    rnd = random.Random(seed)
+    E = {}
+    for i in range(n):
+        pai = rnd.choice([str(1000 + i), f"0{1000 + i}"]) if i % 7 else str(1000 + i // 2)  # alguns repetidos
+        filhos = [
+            {"codigo": rnd.choice([str(c), f"{c}.0"]), "descricao": rnd.choice(DESCRICOES)}
+            for c in rnd.sample(range(100, 130), rnd.randint(0, 6))
+        ]
+        E[pai] = {"codigo": pai, "descricao": f"Composição {i}", "filhos": filhos, "fonte": fonte}
+    return E
+
+
+def _paralelo_sempre() -> int:
+    minimo = estrutura_compare.MIN_PAIS_PARALELO
+    estrutura_compare.MIN_PAIS_PARALELO = 1
+    return minimo
+
+
+def test_igual_a_serial() -> None:
+    A, B = _estrutura(400, 1, "ORCAMENTO"), _estrutura(350, 2, "SINAPI")
+    esperado = comparar_estruturas(A, B)
+    minimo = _paralelo_sempre()
+    try:
+        for a in (A, EstruturaCompacta.from_estruturas(A)):
+            for b in (B, EstruturaCompacta.from_estruturas(B)):
+                assert comparar_estruturas(a, b, workers=3) == esperado
+        cache = CacheComparacoes(Path(tempfile.mkdtemp()) / "comparacoes.pkl")
+        assert comparar_estruturas(A, B, cache=cache, workers=2) == esperado
+        assert comparar_estruturas(A, B, cache=cache, workers=2) == esperado and cache.acertos == len(A)
+    finally:
+        estrutura_compare.MIN_PAIS_PARALELO = minimo
+
+
+def test_selecionar() -> None:
+    E = _estrutura(50, 3, "SINAPI")
+    for c in E.values():
+        for k, ch in enumerate(c["filhos"]):
+            ch["coeficiente"] = float(k)
+    C = EstruturaCompacta.from_estruturas(E)
+    chaves = list(E)
+    posicoes = [7, 2, 30, 2]
+    S = C.selecionar(posicoes)
+    assert list(S) == [chaves[p] for p in posicoes]
+    assert [S.comp(i) for i in range(len(S))] == [E[chaves[p]] for p in posicoes]
+    assert len(S.textos) < len(C.textos)
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
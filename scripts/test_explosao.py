@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Testes de `explodir_estruturas`: insumos finais iguais aos de uma recursão simples (sem
+memo) numa árvore aleatória profunda, dict e forma compacta, códigos casando pela forma
+canônica; ciclos reportados sem recursão infinita.
+
+Uso:
+    python scripts/test_explosao.py        (ou: pytest scripts/test_explosao.py)
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.colunar import EstruturaCompacta  # noqa: E402
+from cruzar_orcamento.validators.explosao import explodir_estruturas  # noqa: E402
+
+
+def _comp(cod: str, filhos: list[str]) -> dict:
+    return {"codigo": cod, "descricao": f"COMP {cod}", "fonte": "SINAPI",
+            "filhos": [{"codigo": f, "descricao": f"ITEM {f.lstrip('0')}"} for f in filhos]}
+
+
+def _arvore(n: int, seed: int) -> dict:
+    """Composição i só usa composições de índice maior (DAG) e insumos 'I…'."""
+    rnd = random.Random(seed)
+    E = {}
+    for i in range(n):
+        aux = [str(j) for j in rnd.sample(range(i + 1, n), min(3, n - i - 1))] if rnd.random() < 0.7 else []
+        E[str(i)] = _comp(str(i), aux + [f"I{rnd.randrange(40)}" for _ in range(rnd.randint(0, 3))])
+    return E
+
+
+def _insumos(E: dict, cod: str) -> set[str]:
+    out = set()
+    for ch in E[cod]["filhos"]:
+        out |= _insumos(E, ch["codigo"]) if ch["codigo"] in E else {ch["codigo"]}
+    return out
+
+
+def test_igual_a_recursao_simples() -> None:
+    E = _arvore(120, 1)
+    for e in (E, EstruturaCompacta.from_estruturas(E)):
+        X, ciclos = explodir_estruturas(e)
+        assert ciclos == [] and list(X) == list(E)
+        for cod, comp in X.items():
+            codigos = [f["codigo"] for f in comp["filhos"]]
+            assert len(codigos) == len(set(codigos)) and set(codigos) == _insumos(E, cod), cod
+            assert all(f["descricao"] == f"ITEM {f['codigo']}" for f in comp["filhos"])
+
+
+def test_codigo_canonico_e_ciclos() -> None:
+    E = {
+        "1": _comp("1", ["2.0", "I1"]),
+        "2": _comp("2", ["3", "I2"]),
+        "3": _comp("3", ["1", "I3"]),        # 1 → 2 → 3 → 1
+        "4": _comp("4", ["4", "002", "I4"]), # laço em si mesmo
+    }
+    X, ciclos = explodir_estruturas(E)
+    assert ciclos == [["1", "2", "3", "1"], ["4", "4"]]
+    assert [f["codigo"] for f in X["1"]["filhos"]] == ["I3", "I2", "I1"]
+    # 2 foi resolvido sem a aresta 3 → 1 (que fecha o ciclo): I1 não chega a 4
+    assert [f["codigo"] for f in X["4"]["filhos"]] == ["I3", "I2", "I4"]
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
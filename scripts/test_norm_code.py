@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Testes de `norm_code_canonical` / `norm_code_canonical_series`: mesma saída (byte a byte)
+da implementação escalar original, nos casos documentados e em entradas aleatórias.
+
+Uso:
+    python scripts/test_norm_code.py        (ou: pytest scripts/test_norm_code.py)
+"""
+from __future__ import annotations
+
+import os
+import random
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.utils.utils_code import (  # noqa: E402
+    norm_code_canonical,
+    norm_code_canonical_series,
+)
+
+
+def _referencia(x: object) -> str:
+    """Implementação escalar original (sem memo), usada como gabarito."""
+    if x is None:
+        return ""
+    s = str(x).strip()
+    if s == "" or s.lower() in ("nan", "none"):
+        return ""
+    m = re.fullmatch(r"(\d+)(?:\.0+)?", s)
+    if m:
+        return m.group(1).lstrip("0") or "0"
+    if "." in s:
+        parts = []
+        for p in s.split("."):
+            p = p.strip()
+            parts.append((p.lstrip("0") or "0") if p.isdigit() else p)
+        return ".".join(parts)
+    if s.isdigit():
+        return s.lstrip("0") or "0"
+    try:
+        f = float(s)
+        if f.is_integer():
+            return str(int(f))
+    except Exception:
+        pass
+    return s
+
+
+DOCUMENTADOS = {
+    "37370.0": "37370",
+    "00037370": "37370",
+    "01.02.003": "1.2.3",
+    "B.01.000.010116": "B.1.0.10116",
+    88316.0: "88316",
+    "nan": "",
+}
+
+ESPECIAIS = [
+    None, np.nan, float("nan"), "", "   ", "NaN", "None", "NONE", "0", "000", "0.0", "00.000",
+    "  0012  ", "12.00", "12.50", "1e3", "1E3", "-5", "+5", "1_000", "inf", "5 .0", "042. 0",
+    "A-123", "C.1.2", ". .", "..", "1..2", "٠١٢", "١٢.٠", "\t7\n", 7, 7.5, -0.0, 10**20, True, False,
+]
+
+
+def _aleatorios(n: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    alfabeto = "0000123456789.. -+eE_aBnN"
+    return ["".join(rnd.choice(alfabeto) for _ in range(rnd.randint(0, 9))) for _ in range(n)]
+
+
+def test_documentados() -> None:
+    for entrada, esperado in DOCUMENTADOS.items():
+        assert norm_code_canonical(entrada) == esperado, entrada
+        assert norm_code_canonical_series([entrada]).iloc[0] == esperado, entrada
+
+
+def test_escalar_igual_referencia() -> None:
+    for v in ESPECIAIS + _aleatorios(20000):
+        assert norm_code_canonical(v) == _referencia(v), repr(v)
+        assert norm_code_canonical(v) == _referencia(v), repr(v)  # 2ª chamada: vem do memo
+
+
+def test_series_igual_map() -> None:
+    valores = ESPECIAIS + _aleatorios(50000, seed=1) + list(DOCUMENTADOS)
+    s = pd.Series(valores, dtype=object, index=range(10, 10 + len(valores)), name="cod")
+    esperado = s.map(_referencia)
+    obtido = norm_code_canonical_series(s)
+    assert obtido.index.equals(s.index) and obtido.name == "cod"
+    assert obtido.tolist() == esperado.tolist()
+    assert all(type(v) is str for v in obtido)
+
+
+def test_series_vazia_e_array() -> None:
+    assert norm_code_canonical_series(pd.Series([], dtype=object)).tolist() == []
+    arr = np.array(["0012", "B.01", "x"], dtype=object)
+    assert norm_code_canonical_series(arr).tolist() == ["12", "B.1", "x"]
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Testes de `norm_text` (tabela de tradução + memo): mesma saída da implementação original
+(NFKD + ASCII + casefold + 2 regex) em **todos** os code points e em strings aleatórias.
+
+Uso:
+    python scripts/test_norm_text.py        (ou: pytest scripts/test_norm_text.py)
+"""
+from __future__ import annotations
+
+import os
+import random
+import re
+import sys
+import unicodedata
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.utils.utils_text import norm_text  # noqa: E402
+
+
+def _referencia(s) -> str:
+    """Implementação original, usada como gabarito."""
+    if not isinstance(s, str):
+        s = "" if s is None or (isinstance(s, float) and s != s) else str(s)
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode().casefold()
+    s = re.sub(r"[^a-z0-9\s]", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _code_points():
+    for cp in range(0x110000):
+        if 0xD800 <= cp <= 0xDFFF:  # surrogates não formam str válida sozinhos
+            continue
+        yield chr(cp)
+
+
+def test_todos_code_points() -> None:
+    for c in _code_points():
+        assert norm_text(c) == _referencia(c), hex(ord(c))
+        # no meio de texto (espaços/pontuação vizinhos)
+        t = f"a{c}b {c}"
+        assert norm_text(t) == _referencia(t), hex(ord(c))
+
+
+def test_strings_aleatorias() -> None:
+    rnd = random.Random(0)
+    amostra = [
+        "a", "Z", "0", " ", "\t", "\x1c", "\xa0", " ", "　", ".", "-", "/", "ç", "Ç", "ã",
+        "É", "́", "̧", "̣", "ﬁ", "½", "ß", "İ", "ﬀ", "Ⅻ", "①", "ﾃ", "한", " ",
+        "​", "\x85", " ", "º", "ª", "²", "µ", "Ω", "№", "™", "…",
+    ]
+    for _ in range(50000):
+        s = "".join(rnd.choice(amostra) for _ in range(rnd.randint(0, 12)))
+        assert norm_text(s) == _referencia(s), repr(s)
+        assert norm_text(s.strip()) == norm_text(s), repr(s)
+
+
+def test_descricoes_e_nao_strings() -> None:
+    casos = [
+        "CONCRETO FCK = 25 MPA, TRAÇO 1:2,3:2,7 (EM MASSA SECA DE CIMENTO/ AREIA MÉDIA/ BRITA 1)",
+        "  Escavação   mecânica\tde vala ", "AÇO CA-50, 10,0 MM, VERGALHÃO", "",
+        None, float("nan"), 12, 3.5,
+    ]
+    for s in casos:
+        assert norm_text(s) == _referencia(s), repr(s)
+        assert norm_text(s) == _referencia(s), repr(s)  # 2ª chamada: vem do memo
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Testes do índice de trigramas (`IndiceDescricoes`) e de `anexar_sugestoes`: com candidatos
+suficientes o top-k é o da força bruta (Dice dos trigramas); descrição idêntica vem em 1º.
+
+Uso:
+    python scripts/test_sugestoes.py        (ou: pytest scripts/test_sugestoes.py)
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.colunar import ItemTable  # noqa: E402
+from cruzar_orcamento.utils.utils_text import norm_text  # noqa: E402
+from cruzar_orcamento.validators.processor import cruzar_vetorizado  # noqa: E402
+from cruzar_orcamento.validators.sugestoes import IndiceDescricoes, anexar_sugestoes, _trigramas  # noqa: E402
+
+PALAVRAS = ["CONCRETO", "FCK", "25", "MPA", "AÇO", "CA-50", "FORMA", "MADEIRA", "ESCAVAÇÃO", "MANUAL",
+            "VALA", "ATERRO", "COMPACTADO", "TUBO", "PVC", "DN", "100", "MM", "ASSENTAMENTO", "ALVENARIA"]
+
+
+def _referencia(n: int, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    ref = {}
+    for i in range(n):
+        cod = str(90000 + i)
+        desc = " ".join(rnd.choice(PALAVRAS) for _ in range(rnd.randint(2, 7)))
+        ref[cod] = {"codigo": cod, "descricao": desc, "valor_unit": 1.0, "fonte": "SINAPI"}
+    return ref
+
+
+def _forca_bruta(ref: dict, consulta: str, k: int) -> list[tuple[str, float]]:
+    q = _trigramas(norm_text(consulta))
+    scores = []
+    for pos, it in enumerate(ref.values()):
+        d = _trigramas(norm_text(it["descricao"]))
+        scores.append((-round(2 * len(q & d) / (len(q) + len(d)), 4), pos, it["codigo"]))
+    return [(c, -s) for s, _, c in sorted(scores)[:k] if s < 0]
+
+
+def test_exaustivo_igual_forca_bruta() -> None:
+    ref = _referencia(600)
+    rnd = random.Random(1)
+    for r in (ref, ItemTable.from_canon(ref)):
+        indice = IndiceDescricoes.from_referencia(r, max_df=1.0, candidatos=len(ref))
+        for _ in range(200):
+            consulta = " ".join(rnd.choice(PALAVRAS) for _ in range(rnd.randint(1, 6)))
+            obtido = [(s["codigo"], s["score"]) for s in indice.buscar(consulta, 5)]
+            assert obtido == _forca_bruta(ref, consulta, 5), consulta
+
+
+def test_descricao_identica_em_primeiro() -> None:
+    ref = _referencia(3000, seed=2)
+    indice = IndiceDescricoes.from_referencia(ref)
+    vistos = set()
+    for cod, it in list(ref.items())[:300]:
+        t = norm_text(it["descricao"])
+        if t in vistos:
+            continue
+        vistos.add(t)
+        top = indice.buscar(it["descricao"].lower(), 10)
+        # palavras repetidas não mudam o conjunto de trigramas: pode haver empate em 1.0
+        assert any(s["score"] == 1.0 and norm_text(s["descricao"]) == t for s in top), it["descricao"]
+    assert indice.buscar("", 3) == [] and indice.buscar("zzzz qqqq", 3) == []
+
+
+def test_anexar_so_em_codigo_nao_encontrado() -> None:
+    ref = _referencia(200, seed=3)
+    orc = {
+        "1__occ1": {"codigo": "1", "descricao": ref["90005"]["descricao"], "valor_unit": 1.0, "fonte": "ORCAMENTO"},
+        "90007__occ1": {"codigo": "90007", "descricao": "outra coisa", "valor_unit": 1.0, "fonte": "ORCAMENTO"},
+        "2__occ1": {"codigo": "2", "descricao": ref["90005"]["descricao"], "valor_unit": 3.0, "fonte": "ORCAMENTO"},
+    }
+    cruzado, diverg = cruzar_vetorizado(orc, ref)
+    anexar_sugestoes(diverg, cruzado, IndiceDescricoes.from_referencia(ref), k=2)
+    por_codigo = {d["codigo"]: d for d in diverg}
+    assert "sugestoes" not in por_codigo["90007"]  # só descrição divergente
+    for cod in ("1", "2"):
+        sug = por_codigo[cod]["sugestoes"]
+        assert len(sug) == 2 and sug[0]["score"] == 1.0
+        assert norm_text(sug[0]["descricao"]) == norm_text(ref["90005"]["descricao"])
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
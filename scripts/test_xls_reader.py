@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Paridade do leitor direto de `.xls` (`XlsBook`) com `pd.read_excel(engine="xlrd")` nos
+arquivos `.xls` de `data/`: nomes de colunas (vazios e duplicados) e valores/tipos de cada
+coluna, para vários cabeçalhos. Sem os arquivos (ou sem xlrd), o teste não roda nada.
+
+Uso:
+    python scripts/test_xls_reader.py        (ou: pytest scripts/test_xls_reader.py)
+"""
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# permitir "python scripts/..." sem instalar o pacote
+sys.path.insert(0, os.path.abspath("src"))
+
+from cruzar_orcamento.adapters.xls_reader import XlsBook, _nomes_colunas, xlrd  # noqa: E402
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+def test_nomes_de_colunas_como_o_pandas() -> None:
+    assert _nomes_colunas(["A", "", "A", "A.1", "A", ""]) == ["A", "Unnamed: 1", "A.1", "A.1.1", "A.2", "Unnamed: 5"]
+
+
+def test_paridade_com_read_excel() -> None:
+    if xlrd is None:
+        return
+    for path in sorted(DATA.glob("*.xls")):
+        with XlsBook(str(path)) as book:
+            for sheet in book.sheet_names:
+                for header_row in (0, 3, 4, 5):
+                    lidas = book.colunas(sheet, header_row, range(12))
+                    if lidas is None:
+                        continue
+                    esperado = pd.read_excel(path, sheet_name=sheet, header=header_row, engine="xlrd")
+                    assert lidas.nomes == list(esperado.columns), (path.name, sheet, header_row)
+                    assert lidas.nrows == len(esperado)
+                    for pos in lidas.valores:
+                        pd.testing.assert_series_equal(lidas.serie(pos), esperado.iloc[:, pos],
+                                                       check_names=False, obj=f"{path.name}/{sheet}/{pos}")
+                book.liberar(sheet)
+
+
+if __name__ == "__main__":
+    for nome, fn in list(globals().items()):
+        if nome.startswith("test_") and callable(fn):
+            fn()
+            print(f"OK  {nome}")
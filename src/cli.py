@@ -1,8 +1,10 @@
 # src/cli.py
 from __future__ import annotations
 
+import os
 import sys
 from pathlib import Path
+from typing import List
 import json
 import typer
 
@@ -10,20 +12,35 @@ import typer
 sys.path.append(str(Path(__file__).resolve().parent))
 
 # ===== PREÇOS =====
-from cruzar_orcamento.adapters.orcamento import load_orcamento
+from cruzar_orcamento.adapters.orcamento import (
+    load_orcamento, load_orcamento_completo, load_orcamento_somas,
+)
 from cruzar_orcamento.adapters.sudecap import load_sudecap
-from cruzar_orcamento.adapters.sinapi import load_sinapi_ccd_pr
-from cruzar_orcamento.validators.processor import cruzar  # cruzamento de PREÇOS
+from cruzar_orcamento.adapters.sinapi import load_sinapi_ccd_pr, load_sinapi_ccd_matriz
+from cruzar_orcamento.validators.processor import (  # cruzamento de PREÇOS
+    cruzar,
+    cruzar_multi,
+    cruzar_vetorizado,
+    separar_referencia,
+    varrer_tolerancias,
+)
 
 # ===== ESTRUTURA =====
 from cruzar_orcamento.adapters.estrutura_orcamento import load_estrutura_orcamento
 from cruzar_orcamento.adapters.estrutura_sinapi import load_estrutura_sinapi_analitico
 from cruzar_orcamento.adapters.estrutura_sudecap import load_estrutura_sudecap
-from cruzar_orcamento.validators.estrutura_compare import comparar_estruturas
+from cruzar_orcamento.adapters.referencias import load_referencia_sinapi, load_referencia_sudecap
+from cruzar_orcamento.validators.estrutura_compare import CacheComparacoes, comparar_estruturas
+from cruzar_orcamento.validators.custos import comparar_custos, juntar_precos, verificar_somas
+from cruzar_orcamento.validators.explosao import explodir_estruturas
+from cruzar_orcamento.validators.revisao import diff_revisoes
+from cruzar_orcamento.validators.sugestoes import IndiceDescricoes, anexar_sugestoes
 from cruzar_orcamento.exporters.json_estrutura import (
     export_estrutura_divergencias_json,
     # export_estruturas_brutas_json,   # use se quiser depurar
 )
+from cruzar_orcamento.utils.utils_cache import cache_dir as pasta_cache, cache_enabled, configure_cache, limpar_cache
+from cruzar_orcamento.adapters.sheet_reader import configure_engine
 
 # ---------------------------------------------------------------------
 # ⚠️ FETCHERS DESLIGADOS POR PADRÃO
@@ -41,6 +58,27 @@ Cruzar Orçamento x Bancos de Referência (preços e estruturas) — saída em J
 """)
 
 
+@app.callback()
+def main(
+    cache: bool = typer.Option(True, "--cache/--no-cache",
+                               help="Reaproveita o parsing das bases (SINAPI/SUDECAP) e as comparações "
+                                    "de estrutura já feitas, salvos em disco."),
+    cache_dir: Path = typer.Option(None, "--cache-dir",
+                                   help="Pasta do cache (padrão: $CRUZAR_CACHE_DIR ou ~/.cache/cruzar_orcamento)."),
+    engine: str = typer.Option(None, "--engine",
+                               help="Motor de leitura das planilhas: auto, calamine ou pandas "
+                                    "(padrão: $CRUZAR_EXCEL_ENGINE ou auto)."),
+):
+    """
+    Opções globais (antes do nome do comando).
+    """
+    configure_cache(enabled=None if cache else False, cache_dir=cache_dir)
+    try:
+        configure_engine(engine)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--engine") from e
+
+
 # -----------------------------------------
 # Helpers: pegar o arquivo mais recente por padrão em data/
 # -----------------------------------------
@@ -123,6 +161,20 @@ def _maybe_add_diffs_to_diverg(divs: list[dict]) -> list[dict]:
     return out
 
 
+def _cruzar_precos(orc_dict, ref_dict, banco: str | None, tol_rel: float,
+                   vetorizado: bool = True) -> tuple[list[dict], list[dict]]:
+    """
+    Cruzado (com dif_abs/dif_rel) e divergências, prontos para o JSON.
+    `vetorizado`: motor em colunas (`cruzar_vetorizado`); senão, `cruzar` + diffs linha a linha.
+    """
+    if vetorizado:
+        return cruzar_vetorizado(orc_dict, ref_dict, banco=banco,
+                                 tol_rel=float(tol_rel or 0.0), comparar_descricao=True)
+    cruzado, diverg = cruzar(orc_dict, ref_dict, banco=banco,
+                             tol_rel=float(tol_rel or 0.0), comparar_descricao=True)
+    return _add_diffs_to_cruzado(cruzado), _maybe_add_diffs_to_diverg(diverg)
+
+
 # =====================================================================
 # PREÇOS
 # =====================================================================
@@ -136,58 +188,146 @@ def run_precos(
     tol_rel: float = typer.Option(0.0, help="Tolerância relativa (fração). Ex.: 0.02 = 2%%."),
     tol_abs: float = typer.Option(0.0, help="(Reservado) Tolerância absoluta."),
     valor_scale: float = typer.Option(1.0, help="Fator multiplicador nos valores do orçamento (ex.: 0.01)."),
+    cidade: List[str] = typer.Option(["CURITIBA"], "--cidade",
+                                     help="Cidade(s) da CCD do SINAPI; repita para várias. "
+                                          "Fora do PR, use UF/CIDADE (ex.: SP/SAO PAULO)."),
     out: Path = typer.Option(Path("output/cruzamento_precos.json"), help="JSON de saída."),
+    vetorizado: bool = typer.Option(True, "--vetorizado/--linha-a-linha",
+                                    help="Motor do cruzamento de preços: em colunas (padrão) ou linha a linha."),
+    tol_sweep: str = typer.Option("", "--tol-sweep",
+                                  help="Tolerâncias separadas por vírgula (ex.: 0,0.01,0.02,0.05): "
+                                       "inclui no JSON as divergências em cada uma, num só cruzamento."),
+    sugestoes: int = typer.Option(0, "--sugestoes", min=0,
+                                  help="Para CODIGO_NAO_ENCONTRADO, anexa os K códigos da referência de "
+                                       "descrição mais parecida (0 = desligado)."),
 ):
     """
     Cruza PREÇOS do ORÇAMENTO contra uma referência (SUDECAP/SINAPI) — saída em JSON.
+
+    Com várias --cidade (SINAPI), a CCD é lida uma única vez e é gerado um JSON por
+    cidade (<out>_<UF>_<CIDADE>.json).
     """
     ref_type_norm = ref_type.strip().upper()
+    if ref_type_norm not in ("SUDECAP", "SINAPI"):
+        raise typer.BadParameter("ref_type não suportado. Use: SUDECAP, SINAPI")
+    tolerancias = _parse_tolerancias(tol_sweep)
 
     typer.secho(">> Lendo ORÇAMENTO…", fg=typer.colors.CYAN)
     orc_dict = load_orcamento(str(orc), valor_scale=valor_scale)
 
+    meta = {
+        "banco": banco or None,
+        "ref_type": ref_type_norm,
+        "tol_rel": float(tol_rel or 0.0),
+        "valor_scale": valor_scale,
+        "orc": str(orc),
+        "ref": str(ref),
+    }
+    if tolerancias:
+        meta["tol_sweep"] = tolerancias
+
     typer.secho(f">> Lendo referência: {ref_type_norm}…", fg=typer.colors.CYAN)
+    cidades = [_parse_cidade(c) for c in cidade]
+    if ref_type_norm == "SINAPI" and (len(cidades) > 1 or cidades[0][1] is not None):
+        # várias cidades (ou UF explícita): CCD lida uma vez, um JSON por cidade
+        matriz = load_sinapi_ccd_matriz(str(ref))
+        try:
+            cidades = [matriz.cidades[matriz.coluna(nome, uf)] for nome, uf in cidades]
+        except KeyError as e:
+            raise typer.BadParameter(e.args[0], param_hint="--cidade") from e
+        for uf, nome in cidades:
+            destino = out.with_name(f"{out.stem}_{_slug(uf)}_{_slug(nome)}{out.suffix}")
+            _cruzar_e_salvar(destino, orc_dict, matriz.cidade(nome, uf), banco, tol_rel,
+                             meta={**meta, "uf": uf, "cidade": nome}, vetorizado=vetorizado,
+                             tolerancias=tolerancias, sugestoes=sugestoes)
+            typer.secho(f">> [{uf}/{nome}] OK → {destino}", fg=typer.colors.GREEN)
+        return
+
     if ref_type_norm == "SUDECAP":
         ref_dict = load_sudecap(str(ref))
-    elif ref_type_norm == "SINAPI":
-        # cidade fixa aqui; se precisar, adicione uma opção CLI
-        ref_dict = load_sinapi_ccd_pr(str(ref), cidade="CURITIBA")
     else:
-        raise typer.BadParameter("ref_type não suportado. Use: SUDECAP, SINAPI")
+        ref_dict = load_sinapi_ccd_pr(str(ref), cidade=cidades[0][0])
 
-    typer.secho(">> Cruzando PREÇOS…", fg=typer.colors.CYAN)
-    cruzado, diverg = cruzar(
-        orcamento=orc_dict,
-        referencia=ref_dict,
-        banco=banco or None,
-        tol_rel=float(tol_rel or 0.0),
-        comparar_descricao=True,
-    )
+    _cruzar_e_salvar(out, orc_dict, ref_dict, banco, tol_rel, meta=meta, vetorizado=vetorizado,
+                     tolerancias=tolerancias, sugestoes=sugestoes)
+    typer.secho(f">> OK! JSON salvo em {out}", fg=typer.colors.GREEN)
+
+
+def _parse_cidade(valor: str) -> tuple[str, str | None]:
+    """'CURITIBA' → ('CURITIBA', None); 'SP/SAO PAULO' → ('SAO PAULO', 'SP')."""
+    uf, sep, nome = valor.partition("/")
+    if not sep:
+        return valor.strip(), None
+    return nome.strip(), uf.strip()
+
+
+def _slug(s: str) -> str:
+    return "_".join(s.split()).upper()
 
-    cruzado = _add_diffs_to_cruzado(cruzado)
-    diverg = _maybe_add_diffs_to_diverg(diverg)
 
+def _parse_tolerancias(valor: str) -> list[float]:
+    """'0, 0.01,0.02' → [0.0, 0.01, 0.02] (ordem e repetições como informadas)."""
+    try:
+        return [float(t) for t in valor.split(",") if t.strip()]
+    except ValueError as e:
+        raise typer.BadParameter(f"tolerância inválida: {e}", param_hint="--tol-sweep") from e
+
+
+def _cruzar_e_salvar(out: Path, orc_dict, ref_dict, banco: str, tol_rel: float, meta: dict,
+                     vetorizado: bool = True, tolerancias: list[float] | None = None,
+                     sugestoes: int = 0) -> None:
+    typer.secho(">> Cruzando PREÇOS…", fg=typer.colors.CYAN)
+    cruzado, diverg = _cruzar_precos(orc_dict, ref_dict, banco or None, tol_rel, vetorizado)
+    _anexar_sugestoes(diverg, cruzado, ref_dict, sugestoes)
+    extra = {}
+    if tolerancias:
+        faixas = varrer_tolerancias(orc_dict, ref_dict, tolerancias, banco=banco or None)
+        for f in faixas:
+            typer.echo(f"   tol_rel={f['tol_rel']:<8g} divergências={f['total_divergencias']:<6} "
+                       f"(valor: {f['valor_divergente']})")
+        extra["varredura_tolerancias"] = faixas
+    _salvar_precos(out, cruzado, diverg, meta=meta, extra=extra)
+
+
+def _anexar_sugestoes(diverg: list[dict], cruzado: list[dict], ref_dict, k: int) -> None:
+    """Sugestões por descrição nas divergências CODIGO_NAO_ENCONTRADO (k=0: nada)."""
+    if k <= 0 or not any(not r["match"] for r in cruzado):
+        return
+    typer.secho(">> Buscando sugestões por descrição…", fg=typer.colors.CYAN)
+    anexar_sugestoes(diverg, cruzado, IndiceDescricoes.from_referencia(ref_dict), k)
+
+
+def _comparar_estruturas(A, B, explodir: bool = False, workers: int = 1) -> list[dict]:
+    """`comparar_estruturas`; com o cache ligado, só compara composições que mudaram desde a última execução.
+    `explodir`: compara os insumos finais (composições auxiliares resolvidas) em vez dos filhos de 1º nível.
+    `workers`: processos para a comparação (0 = um por núcleo)."""
+    if explodir:
+        typer.secho(">> Explodindo composições auxiliares…", fg=typer.colors.CYAN)
+        (A, ciclos_a), (B, ciclos_b) = explodir_estruturas(A), explodir_estruturas(B)
+        for lado, ciclos in (("ORÇAMENTO", ciclos_a), ("BASE", ciclos_b)):
+            if ciclos:
+                typer.secho(f">> [{lado}] {len(ciclos)} ciclo(s) entre composições (aresta ignorada): "
+                            + "; ".join(" → ".join(c) for c in ciclos[:3]), fg=typer.colors.YELLOW)
+    return comparar_estruturas(A, B, cache=CacheComparacoes() if cache_enabled() else None,
+                               workers=workers or os.cpu_count() or 1)
+
+
+def _salvar_precos(out: Path, cruzado: list[dict], diverg: list[dict], meta: dict,
+                   extra: dict | None = None) -> None:
+    """Grava o JSON de preços (cruzado + divergências, já com dif_abs/dif_rel; `extra` vai no fim)."""
     payload = {
-        "meta": {
-            "banco": banco or None,
-            "ref_type": ref_type_norm,
-            "tol_rel": float(tol_rel or 0.0),
-            "valor_scale": valor_scale,
-            "orc": str(orc),
-            "ref": str(ref),
-        },
+        "meta": meta,
         "total_cruzado": len(cruzado),
         "total_divergencias": len(diverg),
         "cruzado": cruzado,
         "divergencias": diverg,
+        **(extra or {}),
     }
 
     _ensure_parent(out)
     with open(out, "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
 
-    typer.secho(f">> OK! JSON salvo em {out}", fg=typer.colors.GREEN)
-
 
 @app.command("run-precos-auto")
 def run_precos_auto(
@@ -195,18 +335,23 @@ def run_precos_auto(
     cidade: str = typer.Option("CURITIBA", help="Cidade para SINAPI CCD."),
     tol_rel: float = typer.Option(0.0, help="Tolerância relativa para ambos os cruzamentos."),
     out_dir: Path = typer.Option(Path("output"), "--out-dir", help="Pasta de saída"),
+    vetorizado: bool = typer.Option(True, "--vetorizado/--linha-a-linha",
+                                    help="Motor do cruzamento de preços: em colunas (padrão) ou linha a linha."),
 ):
     """
     Usa os **últimos arquivos** em data/ e cruza PREÇOS:
       - ORÇAMENTO (banco=SINAPI) x SINAPI_YYYY_MM.xlsx
       - ORÇAMENTO (banco=SUDECAP) x SUDECAP_YYYY_MM.xls(.xlsx)
-    Gera dois JSONs em output/.
+    numa passada só sobre o orçamento (`cruzar_multi`). Gera dois JSONs em output/.
     """
     out_dir.mkdir(parents=True, exist_ok=True)
 
     typer.secho(">> Lendo ORÇAMENTO…", fg=typer.colors.CYAN)
     orc_dict = load_orcamento(str(orc))
 
+    # banco → (arquivo, referência)
+    referencias = {}
+
     # ===== SINAPI =====
     try:
         sinapi_file = _latest_file("SINAPI", "xlsx")
@@ -217,30 +362,7 @@ def run_precos_auto(
     if sinapi_file:
         try:
             typer.echo(f">> Lendo referência SINAPI: {sinapi_file.name}")
-            ref_sinapi = load_sinapi_ccd_pr(str(sinapi_file), cidade=cidade)
-
-            typer.echo(">> Cruzando PREÇOS (SINAPI)…")
-            cruz_s, div_s = cruzar(
-                orc_dict, ref_sinapi, banco="SINAPI",
-                tol_rel=float(tol_rel or 0.0), comparar_descricao=True
-            )
-            cruz_s = _add_diffs_to_cruzado(cruz_s)
-            div_s = _maybe_add_diffs_to_diverg(div_s)
-
-            y, m = sinapi_file.stem.split("_")[-2:]
-            out_sinapi = out_dir / f"cruzamento_precos_sinapi_{y}_{m}.json"
-            payload_s = {
-                "meta": {"banco": "SINAPI", "ref_type": "SINAPI", "orc": str(orc), "ref": str(sinapi_file)},
-                "total_cruzado": len(cruz_s),
-                "total_divergencias": len(div_s),
-                "cruzado": cruz_s,
-                "divergencias": div_s,
-            }
-            _ensure_parent(out_sinapi)
-            with open(out_sinapi, "w", encoding="utf-8") as f:
-                json.dump(payload_s, f, ensure_ascii=False, indent=2)
-
-            typer.secho(f">> [SINAPI] OK → {out_sinapi}", fg=typer.colors.GREEN)
+            referencias["SINAPI"] = (sinapi_file, load_sinapi_ccd_pr(str(sinapi_file), cidade=cidade))
         except Exception as e:
             typer.secho(f"[SINAPI] Falhou: {e}", err=True, fg=typer.colors.RED)
 
@@ -254,33 +376,114 @@ def run_precos_auto(
     if sud_file:
         try:
             typer.echo(f">> Lendo referência SUDECAP: {sud_file.name}")
-            ref_sud = load_sudecap(str(sud_file))
-
-            typer.echo(">> Cruzando PREÇOS (SUDECAP)…")
-            cruz_u, div_u = cruzar(
-                orc_dict, ref_sud, banco="SUDECAP",
-                tol_rel=float(tol_rel or 0.0), comparar_descricao=True
-            )
-            cruz_u = _add_diffs_to_cruzado(cruz_u)
-            div_u = _maybe_add_diffs_to_diverg(div_u)
-
-            y, m = sud_file.stem.split("_")[-2:]
-            out_sud = out_dir / f"cruzamento_precos_sudecap_{y}_{m}.json"
-            payload_u = {
-                "meta": {"banco": "SUDECAP", "ref_type": "SUDECAP", "orc": str(orc), "ref": str(sud_file)},
-                "total_cruzado": len(cruz_u),
-                "total_divergencias": len(div_u),
-                "cruzado": cruz_u,
-                "divergencias": div_u,
-            }
-            _ensure_parent(out_sud)
-            with open(out_sud, "w", encoding="utf-8") as f:
-                json.dump(payload_u, f, ensure_ascii=False, indent=2)
-
-            typer.secho(f">> [SUDECAP] OK → {out_sud}", fg=typer.colors.GREEN)
+            referencias["SUDECAP"] = (sud_file, load_sudecap(str(sud_file)))
         except Exception as e:
             typer.secho(f"[SUDECAP] Falhou: {e}", err=True, fg=typer.colors.RED)
 
+    if not referencias:
+        return
+
+    typer.echo(f">> Cruzando PREÇOS ({', '.join(referencias)})…")
+    tol = float(tol_rel or 0.0)
+    if vetorizado:
+        linhas, _ = cruzar_multi(orc_dict, {b: r for b, (_, r) in referencias.items()},
+                                 bancos={b: b for b in referencias}, tol_rel=tol)
+        resultados = {b: separar_referencia(linhas, b) for b in referencias}
+    else:
+        resultados = {b: _cruzar_precos(orc_dict, r, b, tol, vetorizado=False) for b, (_, r) in referencias.items()}
+
+    for banco, (arquivo, _) in referencias.items():
+        cruz, div = resultados[banco]
+        y, m = arquivo.stem.split("_")[-2:]
+        out_banco = out_dir / f"cruzamento_precos_{banco.lower()}_{y}_{m}.json"
+        payload = {
+            "meta": {"banco": banco, "ref_type": banco, "orc": str(orc), "ref": str(arquivo)},
+            "total_cruzado": len(cruz),
+            "total_divergencias": len(div),
+            "cruzado": cruz,
+            "divergencias": div,
+        }
+        _ensure_parent(out_banco)
+        with open(out_banco, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+        typer.secho(f">> [{banco}] OK → {out_banco}", fg=typer.colors.GREEN)
+
+
+@app.command("run-precos-multi")
+def run_precos_multi(
+    orc: Path = typer.Option(..., exists=True, readable=True, help="Arquivo de ORÇAMENTO."),
+    ref: List[str] = typer.Option(..., "--ref",
+                                  help="Referência; repita para várias (meses/bancos). TIPO=arquivo "
+                                       "(ex.: SINAPI=data/SINAPI_2025_06.xlsx) ou só o arquivo, se o nome "
+                                       "começar por SINAPI/SUDECAP."),
+    cidade: str = typer.Option("CURITIBA", help="Cidade para SINAPI CCD."),
+    tol_rel: float = typer.Option(0.0, help="Tolerância relativa (fração). Ex.: 0.02 = 2%%."),
+    valor_scale: float = typer.Option(1.0, help="Fator multiplicador nos valores do orçamento (ex.: 0.01)."),
+    filtrar_banco: bool = typer.Option(True, "--filtrar-banco/--sem-filtro-banco",
+                                       help="Compara com cada referência só os itens do orçamento daquele banco."),
+    out: Path = typer.Option(Path("output/cruzamento_precos_multi.json"), help="JSON de saída."),
+):
+    """
+    Cruza PREÇOS do ORÇAMENTO contra várias referências (ex.: SINAPI 2025_04/05/06 e SUDECAP
+    2025_04) numa passada só — um JSON largo, com valor/diferenças/motivos por referência.
+    """
+    refs = [_parse_ref(r) for r in ref]
+    nomes = [arq.stem for _, arq in refs]
+    if len(set(nomes)) != len(nomes):
+        raise typer.BadParameter("referências com o mesmo nome de arquivo.", param_hint="--ref")
+
+    typer.secho(">> Lendo ORÇAMENTO…", fg=typer.colors.CYAN)
+    orc_dict = load_orcamento(str(orc), valor_scale=valor_scale)
+
+    referencias = {}
+    for nome, (tipo, arq) in zip(nomes, refs):
+        typer.secho(f">> Lendo referência {tipo}: {arq.name}…", fg=typer.colors.CYAN)
+        referencias[nome] = load_sudecap(str(arq)) if tipo == "SUDECAP" else load_sinapi_ccd_pr(str(arq), cidade=cidade)
+    bancos = {nome: tipo for nome, (tipo, _) in zip(nomes, refs)} if filtrar_banco else None
+
+    typer.secho(f">> Cruzando PREÇOS ({len(refs)} referências)…", fg=typer.colors.CYAN)
+    linhas, resumo = cruzar_multi(orc_dict, referencias, bancos=bancos, tol_rel=float(tol_rel or 0.0))
+    for nome, r in resumo.items():
+        typer.echo(f"   {nome}: comparados={r['comparados']} encontrados={r['encontrados']} "
+                   f"divergências={r['divergencias']}")
+
+    payload = {
+        "meta": {
+            "orc": str(orc),
+            "tol_rel": float(tol_rel or 0.0),
+            "valor_scale": valor_scale,
+            "cidade": cidade,
+            "referencias": [
+                {"nome": nome, "ref_type": tipo, "ref": str(arq), "banco": bancos[nome] if bancos else None}
+                for nome, (tipo, arq) in zip(nomes, refs)
+            ],
+        },
+        "resumo": resumo,
+        "total_linhas": len(linhas),
+        "linhas": linhas,
+    }
+    _ensure_parent(out)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    typer.secho(f">> OK! JSON salvo em {out}", fg=typer.colors.GREEN)
+
+
+def _parse_ref(valor: str) -> tuple[str, Path]:
+    """'SINAPI=data/x.xlsx' → ('SINAPI', Path); sem 'TIPO=', o tipo vem do início do nome do arquivo."""
+    tipo, sep, arq = valor.partition("=")
+    if not sep:
+        arq = valor
+        tipo = next((t for t in ("SINAPI", "SUDECAP") if Path(arq).name.upper().startswith(t)), "")
+    tipo = tipo.strip().upper()
+    if tipo not in ("SUDECAP", "SINAPI"):
+        raise typer.BadParameter(f"tipo de referência não identificado em {valor!r}; use SINAPI=... ou SUDECAP=...",
+                                 param_hint="--ref")
+    path = Path(arq.strip())
+    if not path.is_file():
+        raise typer.BadParameter(f"arquivo não encontrado: {path}", param_hint="--ref")
+    return tipo, path
+
 
 # =====================================================================
 # ESTRUTURA
@@ -294,6 +497,11 @@ def validar_estrutura(
     base_type: str = typer.Option(..., help="Tipo da base: ORCAMENTO | SINAPI | SUDECAP."),
     sinapi_sheet: str = typer.Option("Analítico", help="Nome da aba Analítico no SINAPI."),
     out: Path = typer.Option(Path("output/diverg_estrutura.json"), help="JSON de saída."),
+    explodir: bool = typer.Option(False, "--explodir",
+                                  help="Compara os insumos finais de cada composição (auxiliares explodidas)."),
+    workers: int = typer.Option(1, "--workers", min=0,
+                                help="Processos para comparar as estruturas (0 = um por núcleo). "
+                                     "Abaixo de alguns milhares de composições a comparação fica serial."),
 ):
     """
     Valida a ESTRUTURA (pai + filhos 1º nível) do ORÇAMENTO contra uma BASE.
@@ -315,7 +523,7 @@ def validar_estrutura(
         raise typer.BadParameter("base_type não suportado. Use: ORCAMENTO, SINAPI, SUDECAP.")
 
     typer.secho(">> Comparando ESTRUTURAS…", fg=typer.colors.CYAN)
-    diverg = comparar_estruturas(A, B)
+    diverg = _comparar_estruturas(A, B, explodir, workers)
 
     meta = {
         "orc": str(orc),
@@ -323,6 +531,7 @@ def validar_estrutura(
         "base": str(base),
         "base_type": base_type_norm,
         "sinapi_sheet": sinapi_sheet if base_type_norm == "SINAPI" else None,
+        "explodido": explodir,
     }
 
     _ensure_parent(out)
@@ -330,5 +539,272 @@ def validar_estrutura(
     typer.secho(f">> OK! JSON salvo em {out} (divergências={len(diverg)})", fg=typer.colors.GREEN)
 
 
+# =====================================================================
+# PREÇOS + ESTRUTURA (uma leitura de cada arquivo)
+# =====================================================================
+
+@app.command("run-completo")
+def run_completo(
+    orc: Path = typer.Option(..., exists=True, readable=True, help="Arquivo de ORÇAMENTO."),
+    ref: Path = typer.Option(..., exists=True, readable=True, help="Referência de PREÇOS (SUDECAP/SINAPI)."),
+    ref_type: str = typer.Option("SUDECAP", help="Tipo da referência: SUDECAP ou SINAPI."),
+    base: Path = typer.Option(None, exists=True, readable=True,
+                              help="Base de ESTRUTURA (SINAPI: padrão = --ref; SUDECAP: relatório de composições)."),
+    banco: str = typer.Option("", help="Banco usado no cruzamento de preços (ex.: SUDECAP, SINAPI)."),
+    banco_a: str = typer.Option("", help="Filtrar na estrutura do ORÇAMENTO apenas pais deste banco."),
+    cidade: str = typer.Option("CURITIBA", help="Cidade para SINAPI CCD."),
+    sinapi_sheet: str = typer.Option("Analítico", help="Nome da aba Analítico no SINAPI."),
+    tol_rel: float = typer.Option(0.0, help="Tolerância relativa (fração). Ex.: 0.02 = 2%%."),
+    valor_scale: float = typer.Option(1.0, help="Fator multiplicador nos valores do orçamento (ex.: 0.01)."),
+    out_dir: Path = typer.Option(Path("output"), "--out-dir", help="Pasta de saída"),
+    vetorizado: bool = typer.Option(True, "--vetorizado/--linha-a-linha",
+                                    help="Motor do cruzamento de preços: em colunas (padrão) ou linha a linha."),
+    sugestoes: int = typer.Option(0, "--sugestoes", min=0,
+                                  help="Para CODIGO_NAO_ENCONTRADO, anexa os K códigos da referência de "
+                                       "descrição mais parecida (0 = desligado)."),
+    explodir: bool = typer.Option(False, "--explodir",
+                                  help="Compara os insumos finais de cada composição (auxiliares explodidas)."),
+    workers: int = typer.Option(1, "--workers", min=0,
+                                help="Processos para comparar as estruturas (0 = um por núcleo). "
+                                     "Abaixo de alguns milhares de composições a comparação fica serial."),
+):
+    """
+    PREÇOS e ESTRUTURA do ORÇAMENTO contra a mesma referência, lendo o ORÇAMENTO e cada
+    arquivo de referência uma única vez.
+    Gera cruzamento_precos.json e diverg_estrutura.json em --out-dir.
+    """
+    ref_type_norm = ref_type.strip().upper()
+    if ref_type_norm not in ("SUDECAP", "SINAPI"):
+        raise typer.BadParameter("ref_type não suportado. Use: SUDECAP, SINAPI")
+    if base is None:
+        if ref_type_norm == "SUDECAP":
+            raise typer.BadParameter("Para SUDECAP, informe --base com o relatório de composições.")
+        base = ref
+    banco_a = (banco_a or "").strip() or None
+
+    typer.secho(">> Lendo ORÇAMENTO (preços + estrutura)…", fg=typer.colors.CYAN)
+    orc_dict, A = load_orcamento_completo(str(orc), banco_estrutura=banco_a, valor_scale=valor_scale)
+
+    typer.secho(f">> Lendo referência: {ref_type_norm}…", fg=typer.colors.CYAN)
+    if ref_type_norm == "SUDECAP":
+        ref_dict, B = load_referencia_sudecap(str(ref), str(base))
+    elif base == ref:
+        ref_dict, B = load_referencia_sinapi(str(ref), cidade=cidade, sheet_name=sinapi_sheet)
+    else:
+        ref_dict = load_sinapi_ccd_pr(str(ref), cidade=cidade)
+        B = load_estrutura_sinapi_analitico(str(base), sheet_name=sinapi_sheet)
+
+    typer.secho(">> Cruzando PREÇOS…", fg=typer.colors.CYAN)
+    cruzado, diverg = _cruzar_precos(orc_dict, ref_dict, banco or None, tol_rel, vetorizado)
+    _anexar_sugestoes(diverg, cruzado, ref_dict, sugestoes)
+    out_precos = out_dir / "cruzamento_precos.json"
+    _salvar_precos(out_precos, cruzado, diverg, meta={
+        "banco": banco or None,
+        "ref_type": ref_type_norm,
+        "tol_rel": float(tol_rel or 0.0),
+        "valor_scale": valor_scale,
+        "orc": str(orc),
+        "ref": str(ref),
+    })
+    typer.secho(f">> [PREÇOS] OK → {out_precos}", fg=typer.colors.GREEN)
+
+    typer.secho(">> Comparando ESTRUTURAS…", fg=typer.colors.CYAN)
+    diverg_est = _comparar_estruturas(A, B, explodir, workers)
+    out_est = out_dir / "diverg_estrutura.json"
+    _ensure_parent(out_est)
+    export_estrutura_divergencias_json(diverg_est, out_est, meta={
+        "orc": str(orc),
+        "banco_a": banco_a,
+        "base": str(base),
+        "base_type": ref_type_norm,
+        "sinapi_sheet": sinapi_sheet if ref_type_norm == "SINAPI" else None,
+        "explodido": explodir,
+    })
+    typer.secho(f">> [ESTRUTURA] OK → {out_est} (divergências={len(diverg_est)})", fg=typer.colors.GREEN)
+
+
+# =====================================================================
+# CUSTOS (recálculo pelas composições)
+# =====================================================================
+
+@app.command("recalcular-custos")
+def recalcular_custos(
+    base: Path = typer.Option(..., exists=True, readable=True, help="Arquivo com as composições (ORÇAMENTO / SINAPI / SUDECAP)."),
+    base_type: str = typer.Option(..., help="Tipo da base: ORCAMENTO | SINAPI | SUDECAP."),
+    precos: Path = typer.Option(None, exists=True, readable=True,
+                                help="Preços informados das composições (SINAPI: padrão = --base, aba CCD; "
+                                     "SUDECAP: tabela de preços). Ignorado para ORCAMENTO."),
+    insumos: Path = typer.Option(None, exists=True, readable=True,
+                                 help="Tabela de preços dos insumos (código, descrição, valor — mesmo leitor "
+                                      "do SUDECAP). Obrigatória para SINAPI/SUDECAP; no ORCAMENTO, substitui "
+                                      "os preços das linhas 'Insumo' da própria planilha (mesmo código)."),
+    cidade: str = typer.Option("CURITIBA", help="Cidade para SINAPI CCD."),
+    sinapi_sheet: str = typer.Option("Analítico", help="Nome da aba Analítico no SINAPI."),
+    valor_scale: float = typer.Option(1.0, help="Fator multiplicador nos valores do orçamento (ex.: 0.01)."),
+    tol_rel: float = typer.Option(0.0, help="Tolerância relativa (fração). Ex.: 0.02 = 2%%."),
+    tol_abs: float = typer.Option(0.01, help="Diferença absoluta tolerada (arredondamento em centavos)."),
+    out: Path = typer.Option(Path("output/custos.json"), help="JSON de saída."),
+):
+    """
+    Recalcula o custo de cada composição (Σ coeficiente × preço dos filhos, auxiliares
+    resolvidas pela própria estrutura) e compara com o preço informado.
+    """
+    base_type_norm = base_type.strip().upper()
+    if base_type_norm not in ("ORCAMENTO", "SINAPI", "SUDECAP"):
+        raise typer.BadParameter("base_type não suportado. Use: ORCAMENTO, SINAPI, SUDECAP.")
+    if base_type_norm != "ORCAMENTO" and insumos is None:
+        # a tabela de preços das composições quase não traz insumos: sem --insumos, quase
+        # tudo sairia CUSTO_INDETERMINADO
+        raise typer.BadParameter(f"Para {base_type_norm}, informe --insumos com a tabela de preços dos insumos.")
+    if base_type_norm == "SUDECAP" and precos is None:
+        raise typer.BadParameter("Para SUDECAP, informe --precos com a tabela de preços.")
+
+    typer.secho(f">> Lendo composições: {base_type_norm}…", fg=typer.colors.CYAN)
+    if base_type_norm == "ORCAMENTO":
+        # uma leitura só: preços das composições, estrutura e linhas 'Insumo'
+        informados, E, insumos_orc = load_orcamento_completo(str(base), valor_scale=valor_scale, insumos=True)
+        tabelas = [informados, insumos_orc]
+    elif base_type_norm == "SINAPI":
+        E = load_estrutura_sinapi_analitico(str(base), sheet_name=sinapi_sheet, compacto=True)
+        informados = load_sinapi_ccd_pr(str(precos or base), cidade=cidade)
+        tabelas = [informados]
+    else:
+        E = load_estrutura_sudecap(str(base), compacto=True)
+        informados = load_sudecap(str(precos))
+        tabelas = [informados]
+    if insumos is not None:
+        tabelas.append(load_sudecap(str(insumos)))
+    # por código canônico: --insumos tem precedência sobre os preços da própria base, em qualquer fonte
+    precos_insumos = juntar_precos(*tabelas)
+
+    typer.secho(">> Recalculando custos…", fg=typer.colors.CYAN)
+    diverg = comparar_custos(E, precos_insumos, informados, tol_rel=tol_rel, tol_abs=tol_abs)
+
+    payload = {
+        "meta": {
+            "base": str(base),
+            "base_type": base_type_norm,
+            "precos": str(precos) if precos else None,
+            "insumos": str(insumos) if insumos else None,
+            "tol_rel": tol_rel,
+            "tol_abs": tol_abs,
+        },
+        "total_composicoes": len(E),
+        "total_divergencias": len(diverg),
+        "divergencias": diverg,
+    }
+    _ensure_parent(out)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    typer.secho(f">> OK! JSON salvo em {out} (composições={len(E)}, divergências={len(diverg)})",
+                fg=typer.colors.GREEN)
+
+
+@app.command("verificar-orcamento")
+def verificar_orcamento(
+    orc: Path = typer.Option(..., exists=True, readable=True, help="Planilha do ORÇAMENTO (.xlsx)."),
+    banco: str = typer.Option(None, help="Filtra composições por banco (se houver coluna)."),
+    valor_scale: float = typer.Option(1.0, help="Fator multiplicador nos valores do orçamento (ex.: 0.01)."),
+    tol_rel: float = typer.Option(0.0, help="Tolerância relativa (fração). Ex.: 0.02 = 2%%."),
+    tol_abs: float = typer.Option(0.01, help="Diferença absoluta tolerada por composição."),
+    tol_por_filho: float = typer.Option(0.01, help="Diferença tolerada por linha filha (total de cada linha em centavos)."),
+    sem_filhos: bool = typer.Option(False, "--incluir-sem-filhos",
+                                    help="Lista também as composições sem nenhuma linha filha (SEM_FILHOS)."),
+    out: Path = typer.Option(Path("output/consistencia_orcamento.json"), help="JSON de saída."),
+):
+    """
+    Consistência interna do ORÇAMENTO: valor unitário de cada composição × soma de
+    quant. × valor unit. das suas linhas filhas (erros de fórmula na planilha).
+    """
+    typer.secho(">> Lendo ORÇAMENTO (composições e linhas filhas)…", fg=typer.colors.CYAN)
+    somas = load_orcamento_somas(str(orc), banco=banco, valor_scale=valor_scale)
+
+    typer.secho(">> Conferindo somas…", fg=typer.colors.CYAN)
+    diverg = verificar_somas(somas, tol_rel=tol_rel, tol_abs=tol_abs, tol_por_filho=tol_por_filho,
+                             sem_filhos=sem_filhos)
+
+    payload = {
+        "meta": {
+            "orcamento": str(orc),
+            "banco": banco,
+            "tol_rel": tol_rel,
+            "tol_abs": tol_abs,
+            "tol_por_filho": tol_por_filho,
+            "incluir_sem_filhos": sem_filhos,
+        },
+        "total_composicoes": len(somas),
+        "total_divergencias": len(diverg),
+        "divergencias": diverg,
+    }
+    _ensure_parent(out)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    typer.secho(f">> OK! JSON salvo em {out} (composições={len(somas)}, divergências={len(diverg)})",
+                fg=typer.colors.GREEN)
+
+
+# =====================================================================
+# REVISÕES DO ORÇAMENTO
+# =====================================================================
+
+@app.command("diff-orcamento")
+def diff_orcamento(
+    orc_a: Path = typer.Option(..., "--orc-a", exists=True, readable=True, help="Revisão anterior do ORÇAMENTO (ex.: REV 04)."),
+    orc_b: Path = typer.Option(..., "--orc-b", exists=True, readable=True, help="Revisão nova do ORÇAMENTO (ex.: REV 05)."),
+    banco: str = typer.Option("", help="Considerar apenas composições deste banco (ex.: SUDECAP, SINAPI)."),
+    valor_scale: float = typer.Option(1.0, help="Fator multiplicador nos valores dos dois orçamentos (ex.: 0.01)."),
+    out: Path = typer.Option(Path("output/diff_orcamento.json"), help="JSON de saída."),
+):
+    """
+    Diferenças entre duas revisões do ORÇAMENTO: composições adicionadas, removidas e
+    alteradas (valor, descrição, filhos de 1º nível). Composições iguais nas duas são puladas.
+    """
+    banco = (banco or "").strip() or None
+    revisoes = []
+    for path in (orc_a, orc_b):
+        typer.secho(f">> Lendo ORÇAMENTO: {path.name}…", fg=typer.colors.CYAN)
+        revisoes.append(load_orcamento_completo(str(path), banco=banco, banco_estrutura=banco,
+                                                valor_scale=valor_scale))
+
+    typer.secho(">> Comparando revisões…", fg=typer.colors.CYAN)
+    (precos_a, estr_a), (precos_b, estr_b) = revisoes
+    composicoes, resumo = diff_revisoes(precos_a, estr_a, precos_b, estr_b)
+
+    payload = {
+        "meta": {"orc_a": str(orc_a), "orc_b": str(orc_b), "banco": banco, "valor_scale": valor_scale},
+        "resumo": resumo,
+        "composicoes": composicoes,
+    }
+    _ensure_parent(out)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    typer.secho(
+        f">> OK! JSON salvo em {out} (adicionadas={resumo['adicionadas']}, removidas={resumo['removidas']}, "
+        f"alteradas={resumo['alteradas']}, inalteradas={resumo['inalteradas']})",
+        fg=typer.colors.GREEN,
+    )
+
+
+# =====================================================================
+# CACHE
+# =====================================================================
+
+@app.command("limpar-cache")
+def limpar_cache_cmd(
+    max_mb: float = typer.Option(None, "--max-mb", min=0,
+                                 help="Mantém só até este tamanho (remove os usados há mais tempo)."),
+    max_dias: float = typer.Option(None, "--max-dias", min=0, help="Remove o que não é usado há mais de N dias."),
+):
+    """
+    Limpa a pasta do cache (sem opções: apaga tudo). O cache também é podado sozinho a cada
+    gravação, até $CRUZAR_CACHE_MAX_MB (padrão 1024 MB).
+    """
+    max_bytes = 0 if max_mb is None and max_dias is None else (
+        None if max_mb is None else int(max_mb * 2**20))
+    removidos, liberados = limpar_cache(max_bytes, max_dias)
+    typer.secho(f">> Cache {pasta_cache()}: {removidos} arquivo(s) removido(s), {liberados / 2**20:.1f} MB liberados.",
+                fg=typer.colors.GREEN)
+
+
 if __name__ == "__main__":
     app(prog_name="cli.py")
@@ -6,19 +6,32 @@ from typing import Optional
 
 import pandas as pd
 
-from ..models import CompEstrutura, ChildSpec, EstruturaDict
-from ..utils.utils_code import norm_code_canonical
+from ..colunar import EstruturaCompacta
+from ..models import EstruturaDict
+from ..utils.utils_code import norm_code_canonical_series
+from ..utils.utils_cache import cached_loader
+from .segmentacao import coeficientes, segmentar, montar_estruturas
+from .sheet_reader import SheetReader
 
 logger = logging.getLogger(__name__)
 
 
-def _strip(v) -> str:
-    if pd.isna(v):
-        return ""
-    return str(v).strip()
+def _strip_col(col: pd.Series) -> pd.Series:
+    """Coluna como texto sem espaços nas pontas; NaN/None → ""."""
+    return col.astype(str).str.strip().where(col.notna(), "")
 
 
-def _find_header_row(df_raw: pd.DataFrame, max_scan: int = 25) -> Optional[int]:
+def _col_at(df: pd.DataFrame, idx: int) -> pd.Series:
+    """Coluna por posição; coluna inexistente → coluna vazia."""
+    if idx < df.shape[1]:
+        return df.iloc[:, idx]
+    return pd.Series([""] * len(df), index=df.index, dtype=object)
+
+
+_MAX_SCAN = 25
+
+
+def _find_header_row(df_raw: pd.DataFrame, max_scan: int = _MAX_SCAN) -> Optional[int]:
     """
     Tenta localizar o cabeçalho procurando por 'Descrição' em alguma coluna,
     pois na aba Analítico o header normalmente existe. Se não achar, usa None (posicional).
@@ -30,7 +43,12 @@ def _find_header_row(df_raw: pd.DataFrame, max_scan: int = 25) -> Optional[int]:
     return None
 
 
-def load_estrutura_sinapi_analitico(path: str, sheet_name: str = "Analítico") -> EstruturaDict:
+@cached_loader("estrutura_sinapi", version=3)
+def load_estrutura_sinapi_analitico(
+    path: str,
+    sheet_name: str = "Analítico",
+    compacto: bool = False,
+) -> EstruturaDict | EstruturaCompacta:
     """
     Lê a aba 'Analítico' do SINAPI e constrói:
       { codigo_pai: {codigo, descricao, filhos:[{codigo, descricao}], fonte:'SINAPI'} }
@@ -41,95 +59,81 @@ def load_estrutura_sinapi_analitico(path: str, sheet_name: str = "Analítico") -
       - Código do FILHO  → coluna D (índice 3)
       - Descrição        → procurar coluna 'Descrição' pelo cabeçalho; se não houver,
                            usar a coluna E (índice 4) como fallback para descrição da linha.
+      - Coeficiente      → coluna 'Coeficiente' pelo cabeçalho; senão coluna G (índice 6).
 
     Observações:
       - O arquivo pode conter valores numéricos que viram 'xxxxx.0'; usamos `norm_code_canonical`.
       - Não “explode” composições auxiliares: apenas registra filhos de 1º nível.
+      - `compacto=True` devolve uma `EstruturaCompacta` (CSR, bem menos memória).
     """
+    with SheetReader(path) as reader:
+        out = _ler_analitico(reader, sheet_name)
+    return EstruturaCompacta.from_estruturas(out) if compacto else out
+
+
+def _ler_analitico(reader: SheetReader, sheet_name: str) -> EstruturaDict:
+    """Monta a estrutura a partir da aba Analítico de um `SheetReader` já aberto."""
     # 1) Detecta header (se houver) para pegar 'Descrição' com nome, mas sem depender dele pros códigos
-    df_raw = pd.read_excel(path, sheet_name=sheet_name, header=None)
-    header_row = _find_header_row(df_raw)
+    header_row = _find_header_row(reader.probe(sheet_name, nrows=_MAX_SCAN))
 
-    desc_col = None
+    desc_col = coef_col = None
     if header_row is not None:
-        df = pd.read_excel(path, sheet_name=sheet_name, header=header_row)
+        df = reader.read(sheet_name, header_row)
         cols_lower = {str(c).strip().lower(): c for c in df.columns}
-        # tenta achar alguma coluna de descrição
+        # tenta achar alguma coluna de descrição (e a de coeficiente)
         for k, real in cols_lower.items():
             if "descri" in k:
                 desc_col = real
                 break
+        coef_col = next((real for k, real in cols_lower.items() if k.startswith("coef")), None)
         # se não achou, volta para leitura sem header e usa posicional
         if desc_col is None:
             logger.warning("[SINAPI Analítico] Coluna de descrição não localizada pelo header; usando posicional.")
-            df = df_raw.copy()
+            df = reader.probe(sheet_name, nrows=None)
             header_row = None
     else:
-        df = df_raw.copy()
-
-    # 2) Função auxiliar para descrever a linha atual
-    def get_desc(row) -> str:
-        if header_row is not None and desc_col is not None:
-            return _strip(row.get(desc_col))
+        df = reader.probe(sheet_name, nrows=None)
+
+    # 2) Colunas da linha: B, C, D por posição (garantido mesmo sem header) e descrição
+    cod_pai = norm_code_canonical_series(_strip_col(_col_at(df, 1)))    # B
+    tipo = _strip_col(_col_at(df, 2)).str.casefold()                  # C
+    cod_filho = norm_code_canonical_series(_strip_col(_col_at(df, 3)))  # D
+    if header_row is not None and desc_col is not None:
+        desc = _strip_col(df[desc_col])
+    else:
         # fallback: coluna E (idx 4) costuma ser a descrição do item/linha
-        try:
-            return _strip(row.iloc[4])
-        except Exception:
-            return ""
+        desc = _strip_col(_col_at(df, 4))
+    coef = df[coef_col] if header_row is not None and coef_col is not None else _col_at(df, 6)
+
+    # 3) Segmentação: um novo código em B (diferente do pai atual) abre um pai;
+    #    repetição do mesmo código nas linhas seguintes é continuidade do mesmo pai.
+    tem_pai = cod_pai.ne("")
+    pai_anterior = cod_pai.where(tem_pai).ffill().shift(1)
+    inicio = tem_pai & cod_pai.ne(pai_anterior)
+
+    # filho quando D está preenchida e o tipo é INSUMO/COMPOSICAO (a própria linha do pai pode ser filho)
+    is_filho = cod_filho.ne("") & (
+        tipo.str.contains("insumo", regex=False)
+        | tipo.str.contains("composicao", regex=False)
+        | tipo.str.contains("composição", regex=False)
+    )
+    seg = segmentar(inicio.to_numpy(), is_filho.to_numpy())
+
+    comps = montar_estruturas(
+        seg,
+        pai_codigos=cod_pai.iloc[seg.pai_rows].tolist(),
+        pai_descs=desc.iloc[seg.pai_rows].tolist(),   # descrição do pai na própria linha do pai
+        filho_codigos=cod_filho.iloc[seg.filho_rows].tolist(),
+        filho_descs=desc.iloc[seg.filho_rows].tolist(),
+        fonte="SINAPI",
+        filho_coefs=coeficientes(coef.iloc[seg.filho_rows]),
+    )
+    total_filhos = len(seg.filho_rows)
 
+    # o mesmo código reaparecendo mais adiante substitui o anterior
     out: EstruturaDict = {}
-    pai_atual: Optional[CompEstrutura] = None
-    total_filhos = 0
-
-    # 3) Varre linhas
-    for _, row in df.iterrows():
-        # B, C, D por índice (garantido mesmo sem header)
-        try:
-            cod_pai_raw = _strip(row.iloc[1])  # B
-        except Exception:
-            cod_pai_raw = ""
-        try:
-            tipo_raw = _strip(row.iloc[2])     # C
-        except Exception:
-            tipo_raw = ""
-        try:
-            cod_filho_raw = _strip(row.iloc[3])  # D
-        except Exception:
-            cod_filho_raw = ""
-
-        cod_pai = norm_code_canonical(cod_pai_raw)
-        tipo = tipo_raw.casefold()
-        cod_filho = norm_code_canonical(cod_filho_raw)
-
-        # linha vazia? segue
-        if not cod_pai and not cod_filho and not tipo:
-            continue
-
-        # Sempre que aparecer um novo código em B, considera-se “começo/continuidade” de um pai
-        if cod_pai:
-            if (pai_atual is None) or (pai_atual["codigo"] != cod_pai):
-                # fecha o anterior
-                if pai_atual is not None:
-                    out[pai_atual["codigo"]] = pai_atual
-                # inicia novo pai
-                pai_atual = CompEstrutura(
-                    codigo=cod_pai,
-                    descricao=get_desc(row),   # descrição do pai na própria linha do pai
-                    filhos=[],
-                    fonte="SINAPI",
-                )
-
-        # Se temos um pai atual e a coluna D (filho) está preenchida,
-        # registra filho quando tipo for INSUMO/COMPOSICAO
-        if pai_atual and cod_filho and (("insumo" in tipo) or ("composicao" in tipo) or ("composição" in tipo)):
-            filho_desc = get_desc(row)
-            filho: ChildSpec = {"codigo": cod_filho, "descricao": filho_desc}
-            pai_atual["filhos"].append(filho)
-            total_filhos += 1
-
-    # fecha o último pai
-    if pai_atual:
-        out[pai_atual["codigo"]] = pai_atual
+    for comp in comps:
+        out[comp["codigo"]] = comp
 
     logger.info(
         "[SINAPI Analítico] Estrutura construída: %d composição(ões) com %d filho(s) no total.",
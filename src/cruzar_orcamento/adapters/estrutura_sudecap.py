@@ -2,12 +2,17 @@
 from __future__ import annotations
 
 import logging
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 import pandas as pd
 
-from ..models import EstruturaDict, CompEstrutura, ChildSpec
-from ..utils.utils_code import norm_code_canonical
+from ..colunar import EstruturaCompacta
+from ..models import EstruturaDict
+from ..utils.utils_code import norm_code_canonical_series
+from ..utils.utils_cache import cached_loader
+from .segmentacao import coeficientes, segmentar, montar_estruturas
+from .sheet_reader import SheetReader
+from .xls_reader import XlsBook, usar_xls_direto
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +25,17 @@ def _strip(v) -> str:
         return ""
     return str(v).strip()
 
+def _strip_col(col: pd.Series) -> pd.Series:
+    """`_strip` aplicado à coluna inteira."""
+    return col.astype(str).str.strip().where(col.notna(), "")
+
+def _col_at(cols: List[pd.Series], idx: int) -> pd.Series:
+    """Coluna por posição; coluna inexistente → coluna vazia (para não quebrar)."""
+    if idx < len(cols):
+        return cols[idx]
+    n = len(cols[0]) if cols else 0
+    return pd.Series([""] * n, dtype=object)
+
 def _norm(s: str) -> str:
     return _strip(s).casefold()
 
@@ -36,22 +52,61 @@ def _looks_like_header_row(row: pd.Series) -> bool:
     has_und_or_consumo = vals.str.contains(r"\bund\b|consumo", regex=True, na=False).any()
     return has_codigo and has_desc and has_und_or_consumo
 
-def _find_header_row(df_raw: pd.DataFrame, max_scan: int = 40) -> Optional[int]:
+_MAX_SCAN = 40
+
+def _find_header_row(df_raw: pd.DataFrame, max_scan: int = _MAX_SCAN) -> Optional[int]:
     for i in range(min(max_scan, len(df_raw))):
         if _looks_like_header_row(df_raw.iloc[i]):
             return i
     return None
 
-def _join_desc(parts: list[str]) -> str:
-    """Junta partes de descrição, ignorando vazios/NaN, normalizando espaços."""
-    tokens = [p for p in ( _strip(x) for x in parts ) if p]
-    return " ".join(tokens)
+def _detectar_header(df_raw: pd.DataFrame, sheet) -> int:
+    header_row = _find_header_row(df_raw)
+    if header_row is None:
+        # Palpite razoável (linha 5 visivelmente comum), mas tentaremos mesmo assim
+        header_row = 4
+        logger.warning(f"[SUDECAP/{sheet}] Cabeçalho não detectado; usando header=4 (linha 5).")
+    return header_row
+
+# --------------------------------------------------------------------
+# Leitura das colunas A..J de uma aba
+# --------------------------------------------------------------------
+
+_MAX_COLS = 10  # A..J: tudo o que o parser de estrutura usa
+_DESC_COLS = slice(2, 7)  # C..G: partes da descrição
+_CONSUMO_COLS = (8, 9)    # I ('CONSUMO' no cabeçalho) e J (onde o valor costuma vir)
+
+def _colunas_df(df: pd.DataFrame) -> Optional[List[pd.Series]]:
+    if df.empty:
+        return None
+    return [df.iloc[:, i] for i in range(min(_MAX_COLS, df.shape[1]))]
+
+def _ler_colunas_reader(reader: SheetReader, sheet) -> Optional[List[pd.Series]]:
+    header_row = _detectar_header(reader.probe(sheet, nrows=_MAX_SCAN), sheet)
+    return _colunas_df(reader.read(sheet, header_row))
+
+def _ler_colunas_xls(book: XlsBook, sheet) -> Optional[List[pd.Series]]:
+    """Caminho direto para `.xls`: sem DataFrame da aba inteira, só as colunas A..J."""
+    header_row = _detectar_header(pd.DataFrame(book.linhas(sheet, _MAX_SCAN)), sheet)
+    lidas = book.colunas(sheet, header_row, range(_MAX_COLS))
+    book.liberar(sheet)
+    if lidas is None:  # caso não coberto pelo caminho direto → pandas
+        with SheetReader(book.path) as reader:
+            return _colunas_df(reader.read(sheet, header_row))
+    if lidas.nrows == 0:
+        return None
+    return [lidas.serie(i) for i in range(min(_MAX_COLS, lidas.ncols))]
 
 # --------------------------------------------------------------------
 # Loader principal
 # --------------------------------------------------------------------
 
-def load_estrutura_sudecap(path: str, sheets: List[str | int] | None = None) -> EstruturaDict:
+@cached_loader("estrutura_sudecap", version=3)
+def load_estrutura_sudecap(
+    path: str,
+    sheets: List[str | int] | None = None,
+    compacto: bool = False,
+) -> EstruturaDict | EstruturaCompacta:
     """
     Lê XLS do SUDECAP (Relatório de Composições).
 
@@ -62,112 +117,97 @@ def load_estrutura_sudecap(path: str, sheets: List[str | int] | None = None) ->
       - Colunas C..G (idx 2..6): Demais partes de texto (descrição), unidade etc.
         Para PAI: descrição = junção de B..G
         Para FILHO: descrição = junção de C..G
+      - Colunas I/J (idx 8/9): CONSUMO do filho (o valor costuma vir na coluna J, sem título)
+
+    Arquivos `.xls` são lidos direto pelo xlrd (abas sob demanda, só colunas A..J);
+    demais formatos (ou motor calamine) passam pelo `SheetReader`.
 
     Não “explode” composições auxiliares: registra somente filhos 1º nível.
     Retorna: {codigo_pai: {codigo, descricao, filhos:[{codigo,descricao}], fonte:"SUDECAP"}}
+    (`compacto=True` → mesma informação numa `EstruturaCompacta`, formato CSR).
     """
-    xls = pd.ExcelFile(path)
-    if sheets is None:
-        sheets = xls.sheet_names  # varre todas as abas
+    if usar_xls_direto(path):
+        with XlsBook(path) as book:
+            out = _estruturas_xls(book, sheets)
+    else:
+        with SheetReader(path) as reader:
+            out = _estruturas_reader(reader, sheets)
+    return EstruturaCompacta.from_estruturas(out) if compacto else out
+
+
+def _estruturas_xls(book: XlsBook, sheets: List[str | int] | None) -> EstruturaDict:
+    return _build_estruturas(
+        book.sheet_names if sheets is None else sheets,
+        lambda sheet: _ler_colunas_xls(book, sheet),
+    )
+
+def _estruturas_reader(reader: SheetReader, sheets: List[str | int] | None) -> EstruturaDict:
+    return _build_estruturas(
+        reader.sheet_names if sheets is None else sheets,  # varre todas as abas
+        lambda sheet: _ler_colunas_reader(reader, sheet),
+    )
+
 
+def _build_estruturas(
+    sheets: List[str | int],
+    ler_colunas: Callable[[str | int], Optional[List[pd.Series]]],
+) -> EstruturaDict:
     estruturas: EstruturaDict = {}
     pais_detectados = 0
     filhos_detectados_total = 0
     pais_duplicados = 0
 
     for sheet in sheets:
-        # 1) detectar header
-        df_raw = pd.read_excel(path, sheet_name=sheet, header=None)
-        header_row = _find_header_row(df_raw)
-        if header_row is None:
-            # Palpite razoável (linha 5 visivelmente comum), mas tentaremos mesmo assim
-            header_row = 4
-            logger.warning(f"[SUDECAP/{sheet}] Cabeçalho não detectado; usando header=4 (linha 5).")
-
-        df = pd.read_excel(path, sheet_name=sheet, header=header_row)
-        if df.empty:
+        # 1) detectar header e ler as colunas A..J (descrição em C..G, consumo em I/J)
+        cols = ler_colunas(sheet)
+        if cols is None:
             logger.warning(f"[SUDECAP/{sheet}] Aba vazia; pulando.")
             continue
 
         # 2) Usamos POSIÇÃO das colunas para evitar depender de títulos variáveis
-        #    idx 0 = A, 1 = B, 2..6 = C..G (se existirem)
-        col_count = df.shape[1]
-
-        def col(idx: int):
-            # acessa por posição com fallback seguro
-            try:
-                return df.iloc[:, idx]
-            except Exception:
-                # coluna inexistente → série vazia para não quebrar
-                return pd.Series([], dtype=object)
-
-        colA = col(0)  # código do pai
-        colB = col(1)  # descrição do pai OU código do filho
+        #    idx 0 = A, 1 = B, 2..6 = C..G, 8..9 = I..J (se existirem)
+        valA = _strip_col(_col_at(cols, 0))  # código do pai
+        valB = _strip_col(_col_at(cols, 1))  # descrição do pai OU código do filho
         # colunas C..G para descrição (filho) / complemento (pai)
-        cols_C_to_G = [col(i) for i in range(2, min(7, col_count))]
-
-        # 3) Varredura
-        current_pai: Optional[CompEstrutura] = None
-        filhos_detectados_sheet = 0
-
-        for i in range(len(df)):
-            valA = _strip(colA.iloc[i]) if i < len(colA) else ""
-            valB = _strip(colB.iloc[i]) if i < len(colB) else ""
-            extra_parts = [series.iloc[i] if i < len(series) else "" for series in cols_C_to_G]
-
-            code_pai = norm_code_canonical(valA)
-
-            if code_pai:
-                # Linha é PAI: fecha pai anterior e inicia um novo
-                if current_pai is not None and current_pai["codigo"]:
-                    cod_pai = current_pai["codigo"]
-                    if cod_pai in estruturas:
-                        pais_duplicados += 1
-                        logger.warning(
-                            f"[SUDECAP/{sheet}] Código de composição duplicado (estrutura): {cod_pai!r} "
-                            f"(substituindo '{estruturas[cod_pai]['descricao']}' → '{current_pai['descricao']}')"
-                        )
-                    estruturas[cod_pai] = current_pai
-
-                # descrição do pai = B..G
-                desc_pai = _join_desc([valB, *extra_parts])
-                current_pai = CompEstrutura(
-                    codigo=code_pai,
-                    descricao=desc_pai,
-                    filhos=[],
-                    fonte="SUDECAP",
-                )
-                pais_detectados += 1
-                continue
-
-            # Se NÃO é pai, pode ser FILHO: código do filho em B, descrição em C..G
-            if current_pai is not None and valB:
-                code_filho = norm_code_canonical(valB)
-                if code_filho:
-                    desc_filho = _join_desc(extra_parts)
-                    # Evita cadastrar linhas que não tenham nenhuma descrição significativa
-                    # (não é obrigatório, mas ajuda a filtrar ruídos)
-                    if code_filho or desc_filho:
-                        filho: ChildSpec = {
-                            "codigo": code_filho,
-                            "descricao": desc_filho,
-                        }
-                        current_pai["filhos"].append(filho)
-                        filhos_detectados_sheet += 1
-                        continue
-
-            # Outras linhas (separadores, vazias, totais etc.) são ignoradas
-
-        # Fecha o último pai da aba
-        if current_pai is not None and current_pai["codigo"]:
-            cod_pai = current_pai["codigo"]
+        cols_C_to_G = [_strip_col(c).tolist() for c in cols[_DESC_COLS]]
+
+        # 3) Segmentação vetorizada:
+        #    - PAI: código em A; fecha o pai anterior e inicia um novo
+        #    - FILHO: sem código em A, código do filho em B (descrição em C..G)
+        #    Outras linhas (separadores, vazias, totais etc.) são ignoradas.
+        code_pai = norm_code_canonical_series(valA)
+        is_pai = code_pai.ne("")
+        code_filho = norm_code_canonical_series(valB)
+        is_filho = ~is_pai & code_filho.ne("")
+        seg = segmentar(is_pai.to_numpy(), is_filho.to_numpy())
+
+        # partes já vêm "strip"adas (NaN → ""): basta juntar as não vazias
+        valB_list = valB.tolist()
+        consumo_i, consumo_j = (_col_at(cols, i).iloc[seg.filho_rows] for i in _CONSUMO_COLS)
+        consumo = [i if i is not None else j for i, j in zip(coeficientes(consumo_i), coeficientes(consumo_j))]
+        comps = montar_estruturas(
+            seg,
+            pai_codigos=code_pai.iloc[seg.pai_rows].tolist(),
+            # descrição do pai = B..G
+            pai_descs=[" ".join(filter(None, (valB_list[i], *(c[i] for c in cols_C_to_G)))) for i in seg.pai_rows],
+            filho_codigos=code_filho.iloc[seg.filho_rows].tolist(),
+            # descrição do filho = C..G
+            filho_descs=[" ".join(filter(None, (c[i] for c in cols_C_to_G))) for i in seg.filho_rows],
+            fonte="SUDECAP",
+            filho_coefs=consumo,
+        )
+        pais_detectados += len(comps)
+        filhos_detectados_sheet = len(seg.filho_rows)
+
+        for comp in comps:
+            cod_pai = comp["codigo"]
             if cod_pai in estruturas:
                 pais_duplicados += 1
                 logger.warning(
                     f"[SUDECAP/{sheet}] Código de composição duplicado (estrutura): {cod_pai!r} "
-                    f"(substituindo '{estruturas[cod_pai]['descricao']}' → '{current_pai['descricao']}')"
+                    f"(substituindo '{estruturas[cod_pai]['descricao']}' → '{comp['descricao']}')"
                 )
-            estruturas[cod_pai] = current_pai
+            estruturas[cod_pai] = comp
 
         filhos_detectados_total += filhos_detectados_sheet
 
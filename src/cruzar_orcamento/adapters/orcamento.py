@@ -2,204 +2,264 @@
 from __future__ import annotations
 
 import logging
-from typing import Iterable
-import unicodedata
+
+import numpy as np
 import pandas as pd
 
-from ..models import Item, CanonDict
-from ..utils.utils_text import norm_code
+from ..colunar import ItemTable
+from ..models import CanonDict, EstruturaDict
+from .estrutura_orcamento import AcumuladorEstruturas, estruturas_da_aba
+from .orcamento_abas import COL_CANDIDATES, AbaComposicoes, ler_abas_composicoes, norm_header, segmentar_aba
+from .sheet_reader import SheetReader
 
 logger = logging.getLogger(__name__)
 
-# ---------- Heurísticas / normalização ----------
-
-def _strip_accents(s: str) -> str:
-    return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode()
-
-def _norm(s: str) -> str:
-    if not isinstance(s, str):
-        s = "" if pd.isna(s) else str(s)
-    s = _strip_accents(s).lower().strip()
-    return s
-
-def _looks_like_composicoes(name: str) -> bool:
-    n = _norm(name)
-    return "compos" in n  # "Composições", "Composicoes", etc.
-
-def _find_header_row(df_raw: pd.DataFrame, max_scan: int = 20) -> int | None:
-    for i in range(min(max_scan, len(df_raw))):
-        row = df_raw.iloc[i].astype(str).map(_norm)
-        has_codigo = row.str.contains(r"\bcod(?:igo)?\b", regex=True).any()
-        has_desc   = row.str.contains("descric").any()
-        if has_codigo and has_desc:
-            return i
-    return None
-
-# ---------- Mapeamento de colunas ----------
-
-_COL_CANDIDATES = {
-    "codigo":    ("codigo", "código", "cod.", "cod"),
-    "banco":     ("banco", "base", "fonte"),  # pode não existir em Composições
-    "descricao": ("descricao", "descrição", "descr"),
-    "valor_unit": ("valor unit", "valor unitario", "valor unitário",
-                   "vlr unit", "val unit", "unitario", "valor"),
-    "tipo":      ("tipo",),  # pode não ser a coluna real de tipo
-}
-
-def _build_lookup(columns: Iterable[str]) -> dict[str, str]:
-    return {_norm(c): c for c in map(str, columns)}
-
-def _pick_col(lookup: dict[str, str], candidates: Iterable[str], required: bool = True) -> str | None:
-    for c in candidates:
-        c_norm = _norm(c)
-        if c_norm in lookup:
-            return lookup[c_norm]
-        for k in lookup:
-            if c_norm and k.startswith(c_norm):
-                return lookup[k]
-    if required:
-        raise KeyError(f"Não encontrei nenhuma coluna compatível com: {tuple(candidates)}")
-    return None
-
-def _detect_tipo_column(df: pd.DataFrame) -> str | None:
+# ---------- Projeção de preços ----------
+
+def _projecao_precos(
+    aba: AbaComposicoes,
+    banco: str | None,
+    valor_scale: float,
+    insumos: bool = False,
+) -> pd.DataFrame | None:
     """
-    Encontra a coluna que contém marcadores 'Composição', 'Composição Auxiliar' ou 'Insumo'.
-    1) tenta a coluna 'Tipo'
-    2) varre demais colunas procurando esses marcadores
+    Projeção CODIGO_ORC / DESCRICAO_ORC / VALOR_ORC [/ BANCO] de uma aba, já filtrada
+    (só 'Composição' / 'Composição Auxiliar'; `insumos=True` → só 'Insumo').
+    None = aba sem coluna de valor.
     """
-    # 1) tenta 'Tipo'
-    if "Tipo" in df.columns:
-        vals = df["Tipo"].astype(str).map(_norm)
-        if vals.str.contains(r"compos|insumo", regex=True, na=False).any():
-            return "Tipo"
-    # 2) varre colunas
-    for c in df.columns:
-        vals = df[c].astype(str).map(_norm)
-        if vals.str.contains(r"compos|insumo", regex=True, na=False).any():
-            return c
-    return None
+    sheet, df = aba.sheet, aba.df
+    if aba.col_valor is None:
+        e = KeyError(f"Não encontrei nenhuma coluna compatível com: {tuple(COL_CANDIDATES['valor_unit'])}")
+        logger.warning(f"[{sheet}] {e}; pulando aba.")
+        return None
+    if not aba.col_tipo:
+        logger.warning(f"[{sheet}] Não encontrei coluna de tipo; seguindo sem filtro por tipo.")
+
+    # garantir numérico e aplicar escala (ex.: 0.01 se vier 100x)
+    valores = pd.to_numeric(df[aba.col_valor], errors="coerce")
+    if valor_scale != 1.0:
+        valores = valores * float(valor_scale)
+
+    proj = pd.DataFrame({
+        "CODIGO_ORC": aba.codigos,
+        "DESCRICAO_ORC": aba.descricoes,
+        "VALOR_ORC": valores,
+    })
+    if aba.col_banco:
+        proj["BANCO"] = df[aba.col_banco]
+
+    # FILTRO: somente Composição / Composição Auxiliar (usando a coluna real)
+    keep = pd.Series(True, index=proj.index)
+    if aba.tipos is not None and insumos:
+        keep = aba.tipos.str.contains(r"\binsumo\b", regex=True, na=False)
+        logger.info(f"[{sheet}] Selecionando {keep.sum()} linhas de 'insumo'.")
+    elif aba.tipos is not None:
+        keep = aba.tipos.str.contains(r"\bcomposicao\b", regex=True, na=False)
+        keep |= aba.tipos.str.contains(r"composicao\s+aux", regex=True, na=False)
+        drop = (~keep).sum()
+        logger.info(f"[{sheet}] Selecionando {keep.sum()} linhas de 'composição'; descartando {drop}.")
+
+    if banco and aba.bancos is not None:
+        keep &= aba.bancos.eq(norm_header(banco))
+
+    return proj[keep].dropna(subset=["CODIGO_ORC", "DESCRICAO_ORC"])
 
 # ---------- Loader principal ----------
 
+def _read_frames(
+    reader: SheetReader,
+    sheets: list[str | int] | None,
+    banco: str | None,
+    valor_scale: float,
+) -> list[pd.DataFrame]:
+    """
+    Lê as abas de Composições (workbook já aberto) e devolve, por aba, a projeção de preços.
+    """
+    frames: list[pd.DataFrame] = []
+    for aba in ler_abas_composicoes(reader, sheets, valor="obrigatorio"):
+        proj = _projecao_precos(aba, banco, valor_scale)
+        if proj is not None:
+            frames.append(proj)
+    return frames
+
 def load_orcamento(
     path: str,
     sheets: list[str | int] | None = None,  # se None, tenta "Composições"
     banco: str | None = None,               # se existir coluna
     valor_scale: float = 1.0,   
-) -> CanonDict:
+    as_table: bool = False,                 # True → ItemTable (colunar)
+) -> CanonDict | ItemTable:
     """
     Lê a(s) aba(s) **Composições** e retorna Dict[codigo, Item] no esquema canônico,
     **filtrando apenas 'Composição' e 'Composição Auxiliar'** (usando a coluna real de tipo).
     """
-    xls = pd.ExcelFile(path)
+    with SheetReader(path) as reader:
+        frames = _read_frames(reader, sheets, banco=banco, valor_scale=valor_scale)
 
-    if sheets is None:
-        candidates = [s for s in xls.sheet_names if _looks_like_composicoes(s)]
-        if not candidates:
-            logger.warning("Nenhuma aba 'Composições' detectada; usando a primeira como fallback.")
-            candidates = [xls.sheet_names[0]]
-        sheets = candidates
-        logger.info(f"Abas detectadas para Composições: {sheets}")
+    if not frames:
+        raise RuntimeError("Nenhuma aba de 'Composições' válida foi encontrada.")
 
-    frames: list[pd.DataFrame] = []
+    return _build_canon(pd.concat(frames, ignore_index=True), as_table)
 
-    for sheet in sheets:
-        df_raw = pd.read_excel(path, sheet_name=sheet, header=None)
-        header_row = _find_header_row(df_raw)
-        if header_row is None:
-            header_row = 4
-            logger.warning(f"[{sheet}] Cabeçalho não detectado; usando header=4 (linha 5).")
-
-        df = pd.read_excel(path, sheet_name=sheet, header=header_row)
-        lookup = _build_lookup(df.columns)
-
-        try:
-            col_codigo   = _pick_col(lookup, _COL_CANDIDATES["codigo"])
-            col_desc     = _pick_col(lookup, _COL_CANDIDATES["descricao"])
-            col_val_unit = _pick_col(lookup, _COL_CANDIDATES["valor_unit"])
-            col_banco    = _pick_col(lookup, _COL_CANDIDATES["banco"], required=False)
-        except KeyError as e:
-            logger.warning(f"[{sheet}] {e}; pulando aba.")
-            continue
-
-        # descobre a coluna real de tipo (pode ser 'Tipo' ou a primeira coluna sem nome)
-        col_tipo = _detect_tipo_column(df)
-        if col_tipo:
-            logger.info(f"[{sheet}] Coluna de tipo detectada: {col_tipo!r}")
-        else:
-            logger.warning(f"[{sheet}] Não encontrei coluna de tipo; seguindo sem filtro por tipo.")
-
-        cols = [col_codigo, col_desc, col_val_unit]
-        new_names = ["CODIGO_ORC", "DESCRICAO_ORC", "VALOR_ORC"]
-        if col_banco:
-            cols.append(col_banco)
-            new_names.append("BANCO")
-        if col_tipo:
-            cols.append(col_tipo)
-            new_names.append("TIPO_REAL")
-
-        proj = df[cols].copy()
-        proj.columns = new_names
-
-        # FILTRO: somente Composição / Composição Auxiliar (usando a coluna real)
-        if "TIPO_REAL" in proj.columns:
-            tipo_norm = proj["TIPO_REAL"].map(_norm)
-            keep = tipo_norm.str.contains(r"\bcomposicao\b", regex=True, na=False)
-            keep |= tipo_norm.str.contains(r"composicao\s+aux", regex=True, na=False)
-            drop = (~keep).sum()
-            logger.info(f"[{sheet}] Selecionando {keep.sum()} linhas de 'composição'; descartando {drop}.")
-            proj = proj[keep]
-
-        # limpeza
-        proj["CODIGO_ORC"] = proj["CODIGO_ORC"].map(norm_code)
-        proj["DESCRICAO_ORC"] = proj["DESCRICAO_ORC"].astype(str).str.strip()
-
-
-        # garantir numérico e aplicar escala (ex.: 0.01 se vier 100x)
-        proj["VALOR_ORC"] = pd.to_numeric(proj["VALOR_ORC"], errors="coerce")
-        if valor_scale != 1.0:
-            proj["VALOR_ORC"] = proj["VALOR_ORC"] * float(valor_scale)
-
-        if banco and "BANCO" in proj.columns:
-            alvo = _norm(banco)
-            proj = proj[proj["BANCO"].map(_norm).eq(alvo)]
-
-        proj = proj.dropna(subset=["CODIGO_ORC", "DESCRICAO_ORC"])
-        frames.append(proj)
+
+def load_orcamento_completo(
+    path: str,
+    sheets: list[str | int] | None = None,
+    banco: str | None = None,
+    banco_estrutura: str | None = None,
+    valor_scale: float = 1.0,
+    as_table: bool = False,
+    insumos: bool = False,
+) -> tuple[CanonDict | ItemTable, EstruturaDict] | tuple[CanonDict | ItemTable, EstruturaDict, CanonDict]:
+    """
+    Preços **e** estrutura do ORÇAMENTO numa única leitura das abas de Composições.
+
+    Equivale a `load_orcamento(path, sheets, banco, valor_scale)` +
+    `load_estrutura_orcamento(path, sheets, banco_estrutura)`, mas abre o arquivo, detecta
+    cabeçalho/colunas/tipo e normaliza códigos e descrições uma vez só por aba.
+
+    `insumos=True`: devolve também os preços unitários das linhas 'Insumo' (filhos das
+    composições), no mesmo esquema, da mesma leitura: (preços, estrutura, insumos).
+    """
+    frames: list[pd.DataFrame] = []
+    frames_ins: list[pd.DataFrame] = []
+    acc = AcumuladorEstruturas()
+    with SheetReader(path) as reader:
+        for aba in ler_abas_composicoes(reader, sheets, valor="opcional", quantidade=True):
+            proj = _projecao_precos(aba, banco, valor_scale)
+            if proj is not None:
+                frames.append(proj)
+                if insumos:
+                    frames_ins.append(_projecao_precos(aba, None, valor_scale, insumos=True))
+            res = estruturas_da_aba(aba, banco_estrutura)
+            if res is not None:
+                acc.add(aba.sheet, *res)
 
     if not frames:
         raise RuntimeError("Nenhuma aba de 'Composições' válida foi encontrada.")
 
-    df_all = pd.concat(frames, ignore_index=True)
-    
-    # ---- construir Dict[chave_unica, Item] ----
-    out: CanonDict = {}
-    occ_counter: dict[str, int] = {}
+    precos = _build_canon(pd.concat(frames, ignore_index=True), as_table)
+    if insumos:
+        return precos, acc.resultado(), _build_canon(pd.concat(frames_ins, ignore_index=True))
+    return precos, acc.resultado()
 
-    for _, row in df_all.iterrows():
-        codigo_base = row["CODIGO_ORC"]
 
-        # conta ocorrência deste código
-        occ = occ_counter.get(codigo_base, 0) + 1
-        occ_counter[codigo_base] = occ
+# ---------- Somas dos filhos (consistência interna) ----------
 
-        # chave única para esta ocorrência (não confundir com o código base)
-        key = f"{codigo_base}__occ{occ}"
+def _somas_da_aba(
+    aba: AbaComposicoes,
+    banco: str | None,
+    valor_scale: float,
+) -> pd.DataFrame | None:
+    """
+    Uma linha por 'Composição' da aba: valor unitário informado e soma quant. × valor unit.
+    dos filhos (agrupamento por pai num único `bincount`). None = aba sem tipo/valor/quant.
+    """
+    if aba.col_valor is None or aba.col_quant is None:
+        logger.warning(f"[{aba.sheet}] Sem coluna de valor unitário ou de quantidade; pulando aba.")
+        return None
+    res = segmentar_aba(aba, banco)
+    if res is None:
+        return None
+    seg, _ = res
+
+    valores = pd.to_numeric(aba.df[aba.col_valor], errors="coerce").to_numpy(dtype=float) * float(valor_scale)
+    quant = np.array(aba.quantidades, dtype=float)          # None → NaN
+    total = quant[seg.filho_rows] * valores[seg.filho_rows]
+
+    # soma por pai; filho sem quant./valor deixa a soma NaN (pai sem filhos também)
+    n_pais = len(seg.pai_rows)
+    soma = np.bincount(seg.filho_pai, weights=total, minlength=n_pais)
+    n_filhos = np.bincount(seg.filho_pai, minlength=n_pais)
+    soma[n_filhos == 0] = np.nan
+
+    sem_valor: list[list[str]] = [[] for _ in range(n_pais)]
+    falta = np.flatnonzero(np.isnan(total))
+    for p, cod in zip(seg.filho_pai[falta].tolist(), aba.codigos.iloc[seg.filho_rows[falta]].tolist()):
+        sem_valor[p].append(cod)
+
+    return pd.DataFrame({
+        "ABA": [aba.sheet] * n_pais,
+        "CODIGO_ORC": aba.codigos.iloc[seg.pai_rows].to_numpy(),
+        "DESCRICAO_ORC": aba.descricoes.iloc[seg.pai_rows].to_numpy(),
+        "VALOR_ORC": valores[seg.pai_rows],
+        "SOMA_FILHOS": soma,
+        "N_FILHOS": n_filhos,
+        "FILHOS_SEM_VALOR": sem_valor,
+    })
+
+
+def load_orcamento_somas(
+    path: str,
+    sheets: list[str | int] | None = None,
+    banco: str | None = None,
+    valor_scale: float = 1.0,
+) -> pd.DataFrame:
+    """
+    Para cada 'Composição' das abas de Composições: valor unitário informado (VALOR_ORC) e a
+    soma de quant. × valor unit. das linhas filhas (SOMA_FILHOS; NaN = algum filho sem
+    quantidade/valor, ou composição sem filhos), lidos numa passada colunar por aba.
+    Colunas: ABA, CODIGO_ORC, DESCRICAO_ORC, VALOR_ORC, SOMA_FILHOS, N_FILHOS, FILHOS_SEM_VALOR.
+    """
+    frames: list[pd.DataFrame] = []
+    with SheetReader(path) as reader:
+        for aba in ler_abas_composicoes(reader, sheets, valor="obrigatorio", quantidade=True):
+            somas = _somas_da_aba(aba, banco, valor_scale)
+            if somas is not None:
+                frames.append(somas)
+
+    if not frames:
+        raise RuntimeError("Nenhuma aba de 'Composições' válida foi encontrada.")
+    return pd.concat(frames, ignore_index=True)
 
-        item: Item = {
-            "codigo": codigo_base,  # mantém o código 'real' aqui
-            "descricao": row["DESCRICAO_ORC"],
-            "valor_unit": float(row["VALOR_ORC"]) if pd.notna(row["VALOR_ORC"]) else 0.0,
-            "fonte": "ORCAMENTO",
+
+def _build_canon(df_all: pd.DataFrame, as_table: bool = False) -> CanonDict | ItemTable:
+    """
+    Constrói Dict[chave_unica, Item] (ou `ItemTable`) a partir da projeção CODIGO_ORC /
+    DESCRICAO_ORC / VALOR_ORC [/ BANCO].
+    Cada ocorrência de um código vira uma entrada própria: "<codigo>__occ<N>" (N = 1, 2, ...).
+    """
+    codigos = df_all["CODIGO_ORC"]
+
+    # N-ésima ocorrência de cada código, na ordem das linhas
+    occ = codigos.groupby(codigos, sort=False).cumcount() + 1
+    keys = (codigos + "__occ" + occ.astype(str)).tolist()
+
+    if as_table:
+        _log_duplicados(len(keys), codigos)
+        return ItemTable.from_columns(
+            codigos,
+            df_all["DESCRICAO_ORC"],
+            df_all["VALOR_ORC"].fillna(0.0).astype(float).to_numpy(),
+            fonte="ORCAMENTO",
+            bancos=df_all["BANCO"].astype(str).str.strip() if "BANCO" in df_all.columns else None,
+            chaves=keys,
+        )
+
+    cols = [
+        codigos.tolist(),  # mantém o código 'real' no item
+        df_all["DESCRICAO_ORC"].tolist(),
+        df_all["VALOR_ORC"].fillna(0.0).astype(float).tolist(),
+    ]
+
+    if "BANCO" in df_all.columns:
+        bancos = df_all["BANCO"].astype(str).str.strip().tolist()
+        out: CanonDict = {
+            key: {"codigo": cod, "descricao": desc, "valor_unit": val, "fonte": "ORCAMENTO", "banco": bco}
+            for key, cod, desc, val, bco in zip(keys, *cols, bancos)
+        }
+    else:
+        out = {
+            key: {"codigo": cod, "descricao": desc, "valor_unit": val, "fonte": "ORCAMENTO"}
+            for key, cod, desc, val in zip(keys, *cols)
         }
-        if "BANCO" in df_all.columns:
-            item["banco"] = str(row.get("BANCO", "")).strip()
 
-        out[key] = item
+    _log_duplicados(len(keys), codigos)
+    return out
+
 
+def _log_duplicados(n: int, codigos: pd.Series) -> None:
     # log opcional: quantos duplicados de fato existem
-    dup_total = sum(occ - 1 for occ in occ_counter.values() if occ > 1)
+    dup_total = n - codigos.nunique()
     if dup_total:
         logger.info("ORÇAMENTO: %d ocorrência(s) duplicada(s) mantidas como entradas distintas.", dup_total)
-
-    return out
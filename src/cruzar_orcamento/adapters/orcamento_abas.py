@@ -0,0 +1,267 @@
+# src/cruzar_orcamento/adapters/orcamento_abas.py
+from __future__ import annotations
+
+import logging
+import unicodedata
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from ..utils.utils_code import norm_code_canonical_series
+from ..utils.utils_text import norm_code
+from .segmentacao import Segmentos, coeficientes, segmentar
+from .sheet_reader import SheetReader, union_columns
+
+logger = logging.getLogger(__name__)
+
+# Leitura das abas de "Composições" do ORÇAMENTO, comum aos loaders de preços
+# (`orcamento.py`) e de estrutura (`estrutura_orcamento.py`): escolha das abas,
+# cabeçalho, mapeamento de colunas, detecção da coluna real de tipo e segmentação pai/filhos.
+
+# ---------- Heurísticas / normalização ----------
+
+def _strip_accents(s: str) -> str:
+    return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode()
+
+def norm_header(s: str) -> str:
+    """Texto de cabeçalho/tipo/banco para comparação: sem acento, minúsculo, sem espaços nas pontas."""
+    if not isinstance(s, str):
+        s = "" if pd.isna(s) else str(s)
+    s = _strip_accents(s).lower().strip()
+    return s
+
+def _looks_like_composicoes(name: str) -> bool:
+    n = norm_header(name)
+    return "compos" in n  # "Composições", "Composicoes", etc.
+
+def _find_header_row(df_raw: pd.DataFrame, max_scan: int = 20) -> int | None:
+    """Tenta localizar a linha de cabeçalho pela presença de 'código' e 'descrição'."""
+    for i in range(min(max_scan, len(df_raw))):
+        row = df_raw.iloc[i].astype(str).map(norm_header)
+        has_codigo = row.str.contains(r"\bcod(?:igo)?\b", regex=True, na=False).any()
+        has_desc   = row.str.contains("descric", na=False).any()
+        if has_codigo and has_desc:
+            return i
+    return None
+
+# ---------- Mapeamento de colunas ----------
+
+COL_CANDIDATES = {
+    "codigo":    ("codigo", "código", "cod.", "cod"),
+    "banco":     ("banco", "base", "fonte"),  # pode não existir em Composições
+    "descricao": ("descricao", "descrição", "descr"),
+    "valor_unit": ("valor unit", "valor unitario", "valor unitário",
+                   "vlr unit", "val unit", "unitario", "valor"),
+    "tipo":      ("tipo",),  # pode não ser a coluna real de tipo
+    "quantidade": ("quant", "quantidade", "coeficiente", "coef", "consumo"),  # coeficiente do filho
+}
+
+def _build_lookup(columns: Iterable[str]) -> dict[str, str]:
+    return {norm_header(c): c for c in map(str, columns)}
+
+def _pick_col(lookup: dict[str, str], candidates: Iterable[str], required: bool = True) -> str | None:
+    for c in candidates:
+        c_norm = norm_header(c)
+        if c_norm in lookup:
+            return lookup[c_norm]
+        for k in lookup:
+            if c_norm and k.startswith(c_norm):
+                return lookup[k]
+    if required:
+        raise KeyError(f"Não encontrei nenhuma coluna compatível com: {tuple(candidates)}")
+    return None
+
+def _detect_tipo_column(df: pd.DataFrame) -> Optional[str]:
+    """
+    Encontra a coluna que contém marcadores 'Composição', 'Composição Auxiliar' ou 'Insumo'.
+    1) tenta a coluna 'Tipo'
+    2) varre demais colunas procurando esses marcadores
+    """
+    # 1) tenta 'Tipo'
+    if "Tipo" in df.columns:
+        vals = df["Tipo"].astype(str).map(norm_header)
+        if vals.str.contains(r"compos|insumo", regex=True, na=False).any():
+            return "Tipo"
+    # 2) varre colunas
+    for c in df.columns:
+        vals = df[c].astype(str).map(norm_header)
+        if vals.str.contains(r"compos|insumo", regex=True, na=False).any():
+            return c
+    return None
+
+def _tipo_candidates(window: pd.DataFrame) -> Optional[List[str]]:
+    """
+    Colunas que precisam ser lidas para que `_detect_tipo_column` escolha, na aba inteira,
+    a mesma coluna que escolheria lendo todas. Usa a amostra `window`; None = todas.
+    """
+    hit = _detect_tipo_column(window)
+    if hit is None:
+        return None
+    if hit == "Tipo":
+        return ["Tipo"]  # 'Tipo' tem prioridade: achou na amostra, vale para a aba toda
+    cols = list(window.columns)
+    cand = cols[: cols.index(hit) + 1]
+    if "Tipo" in cols and "Tipo" not in cand:
+        cand.append("Tipo")
+    return cand
+
+# ---------- Leitura das abas ----------
+
+@dataclass
+class AbaComposicoes:
+    """
+    Uma aba de Composições já lida (só as colunas necessárias) e mapeada.
+    Colunas opcionais ausentes ficam como None.
+
+    As colunas normalizadas (código, descrição, tipo, banco) são calculadas uma vez, na
+    aba inteira, e compartilhadas por preços e estrutura.
+    """
+    sheet: str | int
+    df: pd.DataFrame
+    col_codigo: str
+    col_desc: str
+    col_valor: str | None
+    col_banco: str | None
+    col_tipo: str | None
+    col_quant: str | None = None
+
+    @cached_property
+    def codigos(self) -> pd.Series:
+        """Código como texto (`norm_code`: só strip; NaN → ""). A estrutura aplica o canônico por cima."""
+        return self.df[self.col_codigo].map(norm_code)
+
+    @cached_property
+    def descricoes(self) -> pd.Series:
+        return self.df[self.col_desc].astype(str).str.strip()
+
+    @cached_property
+    def tipos(self) -> pd.Series | None:
+        """Tipo normalizado (sem acento, minúsculo); None se a aba não tem coluna de tipo."""
+        if not self.col_tipo:
+            return None
+        return self.df[self.col_tipo].astype(str).map(norm_header)
+
+    @cached_property
+    def quantidades(self) -> List[Optional[float]] | None:
+        """Coeficiente de cada linha (None = vazio); None se a aba não tem coluna de quantidade."""
+        if not self.col_quant:
+            return None
+        return coeficientes(self.df[self.col_quant])
+
+    @cached_property
+    def bancos(self) -> pd.Series | None:
+        """Banco normalizado; None se a aba não tem coluna de banco."""
+        if not self.col_banco:
+            return None
+        return self.df[self.col_banco].map(norm_header)
+
+
+def escolher_abas(reader: SheetReader, sheets: List[str | int] | None) -> List[str | int]:
+    """Abas informadas, ou as que parecem 'Composições' (fallback: a primeira)."""
+    if sheets is not None:
+        return sheets
+    candidates = [s for s in reader.sheet_names if _looks_like_composicoes(s)]
+    if not candidates:
+        logger.warning("Nenhuma aba 'Composições' detectada; usando a primeira como fallback.")
+        candidates = [reader.sheet_names[0]]
+    logger.info(f"Abas detectadas para Composições: {candidates}")
+    return candidates
+
+
+def ler_abas_composicoes(
+    reader: SheetReader,
+    sheets: List[str | int] | None,
+    *,
+    valor: str,
+    quantidade: bool = False,
+) -> Iterator[AbaComposicoes]:
+    """
+    Lê cada aba de Composições uma única vez (cabeçalho, colunas, tipo).
+
+    `valor`: "obrigatorio" (aba sem coluna de valor é pulada), "opcional" ou "nao" (não lê).
+    `quantidade`: também lê a coluna de quantidade/coeficiente (opcional), para a estrutura.
+    Abas sem código/descrição são puladas com aviso.
+    """
+    for sheet in escolher_abas(reader, sheets):
+        header_row = _find_header_row(reader.probe(sheet))
+        if header_row is None:
+            header_row = 4
+            logger.warning(f"[{sheet}] Cabeçalho não detectado; usando header=4 (linha 5).")
+
+        window = reader.window(sheet, header_row)
+        lookup = _build_lookup(window.columns)
+
+        try:
+            col_codigo = _pick_col(lookup, COL_CANDIDATES["codigo"])
+            col_desc   = _pick_col(lookup, COL_CANDIDATES["descricao"])
+            col_valor  = None
+            if valor != "nao":
+                col_valor = _pick_col(lookup, COL_CANDIDATES["valor_unit"], required=(valor == "obrigatorio"))
+            col_banco  = _pick_col(lookup, COL_CANDIDATES["banco"], required=False)  # opcional
+            col_quant  = None
+            if quantidade:
+                col_quant = _pick_col(lookup, COL_CANDIDATES["quantidade"], required=False)
+        except KeyError as e:
+            logger.warning(f"[{sheet}] {e}; pulando aba.")
+            continue
+
+        # lê a aba inteira só com as colunas necessárias (+ candidatas à coluna de tipo)
+        usecols = union_columns([col_codigo, col_desc, col_valor, col_banco, col_quant], _tipo_candidates(window))
+        df = reader.read(sheet, header_row, columns=usecols, all_columns=window.columns)
+
+        # descobre a coluna real de tipo (pode ser 'Tipo' ou a primeira coluna sem nome)
+        col_tipo = _detect_tipo_column(df)
+        if col_tipo:
+            logger.info(f"[{sheet}] Coluna de tipo detectada: {col_tipo!r}")
+
+        yield AbaComposicoes(
+            sheet=sheet,
+            df=df,
+            col_codigo=col_codigo,
+            col_desc=col_desc,
+            col_valor=col_valor,
+            col_banco=col_banco,
+            col_tipo=col_tipo,
+            col_quant=col_quant,
+        )
+
+
+# ---------- Segmentação pai / filhos ----------
+
+def segmentar_aba(
+    aba: AbaComposicoes,
+    banco: str | None,
+) -> tuple[Segmentos, pd.Series] | None:
+    """
+    Segmentação pai ('Composição') / filhos ('Composição Auxiliar', 'Insumo') de uma aba e
+    os códigos canônicos das linhas. None = aba sem coluna de tipo.
+    """
+    sheet = aba.sheet
+    if aba.tipos is None:
+        logger.error(f"[{sheet}] Não encontrei coluna de tipo; não é possível montar a estrutura.")
+        return None
+
+    # normalizações (compartilhadas com o loader de preços)
+    codigos = norm_code_canonical_series(aba.codigos)
+    tipo_norm = aba.tipos
+
+    # flags
+    is_pai     = tipo_norm.str.fullmatch(r".*\bcomposicao\b.*", na=False) & ~tipo_norm.str.contains("aux", na=False)
+    is_aux     = tipo_norm.str.contains(r"composicao\s*aux", regex=True, na=False)
+    is_insumo  = tipo_norm.str.contains(r"\binsumo\b", regex=True, na=False)
+
+    if banco and aba.bancos is None:
+        logger.warning(f"[{sheet}] Filtro por banco={banco!r} solicitado, mas coluna de banco não encontrada; ignorando filtro nesta aba.")
+
+    # segmentação vetorizada: cada PAI abre um grupo; filhos acumulam até o próximo PAI.
+    # filtro por banco (se solicitado e houver coluna) é aplicado no PAI: pai descartado
+    # leva junto seus filhos.
+    manter = None
+    alvo_banco_norm = norm_header(banco) if banco else None
+    if alvo_banco_norm and aba.bancos is not None:
+        manter = aba.bancos.eq(alvo_banco_norm).to_numpy()
+
+    is_filho = (is_aux | is_insumo) & ~is_pai & codigos.str.strip().ne("")
+    return segmentar(is_pai.to_numpy(), is_filho.to_numpy(), manter=manter), codigos
@@ -0,0 +1,95 @@
+# src/cruzar_orcamento/adapters/referencias.py
+from __future__ import annotations
+
+import logging
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import List
+
+from openpyxl import load_workbook
+
+from ..models import CanonDict, EstruturaDict
+from ..utils.utils_cache import cached_loader
+from .sheet_reader import SheetReader
+from .xls_reader import XlsBook, usar_xls_direto
+from .sinapi import _ler_ccd
+from .estrutura_sinapi import _ler_analitico
+from .sudecap import load_sudecap, _precos_reader, _precos_xls
+from .estrutura_sudecap import load_estrutura_sudecap, _estruturas_reader, _estruturas_xls
+
+logger = logging.getLogger(__name__)
+
+# Loaders "por referência mensal": abrem o arquivo de referência uma única vez e devolvem
+# (preços, estrutura). Usados quando preços e estrutura saem da mesma base (`run-completo`).
+
+
+@cached_loader("referencia_sinapi", version=2)
+def load_referencia_sinapi(
+    path: str,
+    cidade: str = "CURITIBA",
+    sheet_name: str = "Analítico",
+) -> tuple[CanonDict, EstruturaDict]:
+    """
+    Preços (aba CCD, coluna PR/cidade) e estrutura (aba Analítico) do mesmo SINAPI.
+
+    O arquivo é lido do disco uma vez e as duas abas saem desses bytes: a CCD pelo
+    openpyxl em modo fórmula (o código vem do HYPERLINK), a Analítico pelo `SheetReader`
+    (valores). Com cache ligado, é um só hash do arquivo e um só pickle.
+    Mesma saída de `load_sinapi_ccd_pr` + `load_estrutura_sinapi_analitico`.
+    """
+    data = Path(path).read_bytes()
+
+    wb = load_workbook(BytesIO(data), data_only=False, read_only=True)
+    try:
+        precos = _ler_ccd(wb, cidade)
+    finally:
+        wb.close()
+
+    with SheetReader(BytesIO(data)) as reader:
+        estruturas = _ler_analitico(reader, sheet_name)
+
+    return precos, estruturas
+
+
+def load_referencia_sudecap(
+    path: str,
+    path_estrutura: str | None = None,
+    sheet: str | int | None = None,
+    sheets_estrutura: List[str | int] | None = None,
+) -> tuple[CanonDict, EstruturaDict]:
+    """
+    Preços e estrutura do SUDECAP.
+
+    - `path_estrutura` ausente (ou o mesmo arquivo): preços e composições saem de uma
+      única abertura da planilha (`.xls` direto pelo xlrd ou `SheetReader`).
+    - Arquivos distintos (caso usual: tabela de preços + relatório de composições):
+      cada um é aberto uma vez, pelos loaders de sempre (cada qual com seu cache).
+    """
+    if path_estrutura is not None and not _mesmo_arquivo(path, path_estrutura):
+        return load_sudecap(path, sheet), load_estrutura_sudecap(path_estrutura, sheets_estrutura)
+    return _referencia_sudecap_arquivo(path, sheet, sheets_estrutura)
+
+
+@cached_loader("referencia_sudecap", version=2)
+def _referencia_sudecap_arquivo(
+    path: str,
+    sheet: str | int | None,
+    sheets_estrutura: List[str | int] | None,
+) -> tuple[CanonDict, EstruturaDict]:
+    if sheet is None:
+        sheet = 0
+        logger.info(f"Aba detectada para SUDECAP: {sheet!r}")
+
+    if usar_xls_direto(path):
+        with XlsBook(path) as book:
+            return _precos_xls(book, sheet), _estruturas_xls(book, sheets_estrutura)
+    with SheetReader(path) as reader:
+        return _precos_reader(reader, sheet), _estruturas_reader(reader, sheets_estrutura)
+
+
+def _mesmo_arquivo(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
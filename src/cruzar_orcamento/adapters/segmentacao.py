@@ -0,0 +1,110 @@
+# src/cruzar_orcamento/adapters/segmentacao.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..models import CompEstrutura, ChildSpec
+
+
+@dataclass
+class Segmentos:
+    """
+    Resultado da segmentação pai/filhos de uma aba (posições 0-based nas linhas da aba).
+
+    - pai_rows:   linha de início de cada pai mantido (na ordem da planilha)
+    - filho_rows: linhas de filhos dos pais mantidos (na ordem da planilha)
+    - filho_pai:  para cada filho, o índice (em `pai_rows`) do seu pai
+    """
+    pai_rows: np.ndarray
+    filho_rows: np.ndarray
+    filho_pai: np.ndarray
+
+
+def coeficientes(col: pd.Series) -> List[Optional[float]]:
+    """Coluna de coeficientes como floats (vírgula decimal aceita); vazio/não numérico → None."""
+    if col.dtype == object:
+        col = col.map(lambda v: v.strip().replace(",", ".") if isinstance(v, str) else v)
+    num = pd.to_numeric(col, errors="coerce").astype(float)
+    return [None if v != v else v for v in num.tolist()]
+
+
+def segmentar(
+    inicio: np.ndarray,
+    filho: np.ndarray,
+    manter: np.ndarray | None = None,
+) -> Segmentos:
+    """
+    Versão vetorizada da varredura "pai atual" usada pelos adapters de estrutura.
+
+    - `inicio[i]`: a linha i abre um novo pai (fecha o anterior).
+    - `filho[i]`:  a linha i é filho do pai aberto (se houver um).
+    - `manter[i]`: avaliado nas linhas de início; False = pai descartado (ex.: filtro de banco)
+                   e seus filhos também, até o próximo início.
+
+    Linhas antes do primeiro início não pertencem a nenhum pai.
+    """
+    inicio = np.asarray(inicio, dtype=bool)
+    filho = np.asarray(filho, dtype=bool)
+
+    # grupo de cada linha = nº de inícios até ela (0 = antes do 1º pai)
+    gid = np.cumsum(inicio)
+    starts = np.flatnonzero(inicio)
+
+    keep_group = np.ones(len(starts) + 1, dtype=bool)
+    keep_group[0] = False
+    if manter is not None:
+        keep_group[1:] = np.asarray(manter, dtype=bool)[starts]
+
+    filho_rows = np.flatnonzero(filho & keep_group[gid])
+
+    # renumera os grupos mantidos: 1..G → 0..K-1 (índice em pai_rows)
+    new_id = np.cumsum(keep_group) - 1
+    return Segmentos(
+        pai_rows=starts[keep_group[1:]],
+        filho_rows=filho_rows,
+        filho_pai=new_id[gid[filho_rows]],
+    )
+
+
+def montar_estruturas(
+    seg: Segmentos,
+    pai_codigos: Sequence[str],
+    pai_descs: Sequence[str],
+    filho_codigos: Sequence[str],
+    filho_descs: Sequence[str],
+    fonte: str,
+    filho_coefs: Sequence[Optional[float]] | None = None,
+) -> List[CompEstrutura]:
+    """
+    Monta um CompEstrutura por pai mantido (na ordem da planilha).
+
+    `pai_codigos`/`pai_descs` têm um valor por pai (alinhados a `seg.pai_rows`);
+    `filho_codigos`/`filho_descs` (e `filho_coefs`, se houver), um valor por filho (alinhados
+    a `seg.filho_rows`).
+    Os filhos são distribuídos aos pais num único agrupamento (filhos já vêm ordenados por pai).
+    """
+    comps: List[CompEstrutura] = [
+        CompEstrutura(codigo=cod, descricao=desc, filhos=[], fonte=fonte)
+        for cod, desc in zip(pai_codigos, pai_descs)
+    ]
+    if len(seg.filho_rows) == 0:
+        return comps
+
+    grupos, inicio = np.unique(seg.filho_pai, return_index=True)
+    fim = np.append(inicio[1:], len(seg.filho_pai))
+    for g, a, b in zip(grupos.tolist(), inicio.tolist(), fim.tolist()):
+        if filho_coefs is None:
+            comps[g]["filhos"] = [
+                ChildSpec(codigo=cod, descricao=desc)
+                for cod, desc in zip(filho_codigos[a:b], filho_descs[a:b])
+            ]
+        else:
+            comps[g]["filhos"] = [
+                ChildSpec(codigo=cod, descricao=desc, coeficiente=coef)
+                for cod, desc, coef in zip(filho_codigos[a:b], filho_descs[a:b], filho_coefs[a:b])
+            ]
+    return comps
@@ -0,0 +1,152 @@
+# src/cruzar_orcamento/adapters/sheet_reader.py
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+from typing import Iterable, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Motor de leitura das planilhas (todas as bases passam por aqui):
+#   auto      → calamine se instalado (python-calamine), senão os motores padrão do pandas
+#   calamine  → força calamine (cai nos padrões, com aviso, se não estiver instalado)
+#   pandas    → motores padrão do pandas (openpyxl p/ .xlsx, xlrd p/ .xls)
+# Variável de ambiente: CRUZAR_EXCEL_ENGINE=auto|calamine|pandas
+ENGINES = ("auto", "calamine", "pandas")
+_ENV_ENGINE = "CRUZAR_EXCEL_ENGINE"
+
+_engine_override: str | None = None
+_avisou_calamine = False
+
+
+def configure_engine(engine: str | None) -> None:
+    """Escolhe o motor em tempo de execução (sobrepõe a variável de ambiente)."""
+    global _engine_override
+    if engine is not None:
+        engine = engine.strip().lower()
+        if engine not in ENGINES:
+            raise ValueError(f"Motor inválido: {engine!r}. Opções: {', '.join(ENGINES)}")
+    _engine_override = engine
+
+
+def engine_escolhido() -> str:
+    if _engine_override is not None:
+        return _engine_override
+    env = os.environ.get(_ENV_ENGINE, "auto").strip().lower()
+    if env not in ENGINES:
+        logger.warning("%s=%r inválido; usando 'auto'.", _ENV_ENGINE, env)
+        return "auto"
+    return env
+
+
+def calamine_disponivel() -> bool:
+    return importlib.util.find_spec("python_calamine") is not None
+
+
+def excel_engine() -> str | None:
+    """
+    `engine=` a passar ao pandas conforme a escolha atual; None = padrão do pandas.
+    As saídas dos adapters são as mesmas com qualquer motor; muda só o tempo de leitura.
+    """
+    global _avisou_calamine
+    escolha = engine_escolhido()
+    if escolha == "pandas":
+        return None
+    if calamine_disponivel():
+        return "calamine"
+    if escolha == "calamine" and not _avisou_calamine:
+        _avisou_calamine = True
+        logger.warning("python-calamine não instalado; usando os motores padrão do pandas.")
+    return None
+
+
+class SheetReader:
+    """
+    Abre a pasta de trabalho **uma única vez** e lê as abas sob demanda.
+
+    Uso típico (adapters do ORÇAMENTO):
+      1) `probe(sheet)`            → primeiras linhas sem header, para achar o cabeçalho;
+      2) `window(sheet, header)`   → primeiras linhas já com header (nomes de coluna + amostra);
+      3) `read(sheet, header, columns=[...])` → aba inteira, só com as colunas escolhidas.
+
+    `pd.read_excel(path, ...)` reabre (e descompacta) o arquivo a cada chamada; aqui
+    todas as leituras reaproveitam o mesmo `pd.ExcelFile`.
+
+    `engine=None` usa o motor configurado (`configure_engine` / CRUZAR_EXCEL_ENGINE).
+    """
+
+    def __init__(self, path: str, engine: str | None = None):
+        self.path = path
+        self.engine = engine if engine is not None else excel_engine()
+        self._xls = pd.ExcelFile(path, engine=self.engine)
+
+    # ---------- ciclo de vida ----------
+
+    def close(self) -> None:
+        self._xls.close()
+
+    def __enter__(self) -> "SheetReader":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    # ---------- leitura ----------
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self._xls.sheet_names)
+
+    def probe(self, sheet: str | int, nrows: int | None = 20) -> pd.DataFrame:
+        """Primeiras `nrows` linhas (None = todas), sem cabeçalho (para heurísticas de header)."""
+        return self._xls.parse(sheet, header=None, nrows=nrows)
+
+    def window(self, sheet: str | int, header_row: int, nrows: int = 200) -> pd.DataFrame:
+        """Primeiras `nrows` linhas de dados com o cabeçalho aplicado."""
+        return self._xls.parse(sheet, header=header_row, nrows=nrows)
+
+    def read(
+        self,
+        sheet: str | int,
+        header_row: int,
+        *,
+        columns: Sequence[str] | None = None,
+        all_columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Lê a aba inteira a partir de `header_row`.
+
+        Se `columns` for informado, materializa apenas essas colunas (na ordem do arquivo).
+        `all_columns` são os nomes de todas as colunas (ex.: `window(...).columns`); são usados
+        para traduzir nomes → posições, evitando ambiguidades com nomes duplicados/`Unnamed`.
+        """
+        if columns is None:
+            return self._xls.parse(sheet, header=header_row)
+
+        if all_columns is None:
+            all_columns = list(self._xls.parse(sheet, header=header_row, nrows=0).columns)
+        all_columns = list(all_columns)
+
+        positions = sorted({all_columns.index(c) for c in columns})
+        df = self._xls.parse(sheet, header=header_row, usecols=positions)
+        # garante os mesmos nomes que a leitura completa produziria
+        df.columns = [all_columns[i] for i in positions]
+        return df
+
+
+def union_columns(*groups: Iterable[str | None] | None) -> list[str] | None:
+    """
+    Junta listas de colunas (ignorando None dentro delas).
+    Se algum grupo for None ("preciso de todas"), retorna None.
+    """
+    out: list[str] = []
+    for g in groups:
+        if g is None:
+            return None
+        for c in g:
+            if c is not None and c not in out:
+                out.append(c)
+    return out
@@ -3,14 +3,19 @@ from __future__ import annotations
 
 import logging
 import re
-from typing import Optional, Dict
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple
 import unicodedata
 
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook
 
+from ..colunar import ItemTable
 from ..models import Item, CanonDict
 from ..utils.utils_text import norm_code
+from ..utils.utils_cache import cached_loader
 
 logger = logging.getLogger(__name__)
 
@@ -55,114 +60,338 @@ def _smart_to_float(x) -> Optional[float]:
     except ValueError:
         return None
 
-# ----------------- loader principal -----------------
+# ----------------- layout da aba CCD -----------------
+
+# Linhas (1-based, como no Excel) do cabeçalho da CCD:
+#   4 → UF (células mescladas: "PR" ocupa Custo + %AS)
+#   5 → cidade (repetida na subcoluna de %AS)
+#   10 → rótulos "Grupo / Código / Descrição / ..."
+# Os dados começam logo abaixo do cabeçalho de UF/cidade (há observações antes do 1º código).
+_UF_ROW = 4
+_CIDADE_ROW = 5
+_LABEL_ROW = 10
+_FIRST_DATA_ROW = _CIDADE_ROW + 1
+
 
-def load_sinapi_ccd_pr(path: str, cidade: str = "CURITIBA") -> CanonDict:
+def _fill_header(row: list, control: list[bool]) -> list:
     """
-    Lê a aba CCD do SINAPI e retorna Dict[codigo, Item] usando a coluna ('PR', cidade) como CUSTO.
-    Extrai código da fórmula HYPERLINK; lê código/descrição/custo **da mesma linha** (openpyxl),
-    iniciando no primeiro código numérico para evitar deslocamentos de observações no topo.
-    """
-    # 1) Use pandas só para detectar header e localizar índices de colunas
-    dfm = pd.read_excel(path, sheet_name="CCD", header=[3, 4])
-    header_row = 4                      # linha com rótulos "Grupo / Código / Descrição" (idx pandas)
-    probe = dfm.iloc[header_row]
-
-    def pick_first(*starts: str):
-        for col in dfm.columns:
-            if any(_norm(str(probe[col])).startswith(_norm(s)) for s in starts):
-                return col
+    Preenche vazios do cabeçalho com o valor à esquerda, sem atravessar o limite do
+    grupo da linha de cima (mesma regra do pandas para cabeçalhos MultiIndex).
+    """
+    row = list(row)
+    last = row[0] if row else None
+    for i in range(1, len(row)):
+        if not control[i]:
+            last = row[i]
+        if row[i] is None or row[i] == "":
+            row[i] = last
+        else:
+            control[i] = False
+            last = row[i]
+    return row
+
+
+def _ccd_header(head: list[tuple]) -> tuple[int, int, list, list]:
+    """
+    A partir das primeiras linhas da CCD, devolve as colunas (1-based) de código e
+    descrição e as linhas de UF e cidade já preenchidas (células mescladas).
+    """
+    width = max((len(r) for r in head), default=0)
+    rows = [list(r) + [None] * (width - len(r)) for r in head]
+    while len(rows) < _LABEL_ROW:
+        rows.append([None] * width)
+
+    labels = rows[_LABEL_ROW - 1]
+
+    def pick_first(*starts: str) -> Optional[int]:
+        for idx, v in enumerate(labels):
+            if any(_norm(str(v)).startswith(_norm(s)) for s in starts):
+                return idx + 1
         return None
 
-    col_grupo  = pick_first("grupo")
-    col_codigo = pick_first("codigo", "código")
-    col_desc   = pick_first("descricao", "descrição")
-    if not all([col_grupo, col_codigo, col_desc]):
+    x_col_grupo  = pick_first("grupo")
+    x_col_codigo = pick_first("codigo", "código")
+    x_col_desc   = pick_first("descricao", "descrição")
+    if not all([x_col_grupo, x_col_codigo, x_col_desc]):
         raise RuntimeError(f"[SINAPI CCD] Não encontrei colunas básicas. "
-                           f"grupo={col_grupo}, codigo={col_codigo}, desc={col_desc}")
+                           f"grupo={x_col_grupo}, codigo={x_col_codigo}, desc={x_col_desc}")
+
+    control = [True] * width
+    ufs = _fill_header(rows[_UF_ROW - 1], control)
+    cidades = _fill_header(rows[_CIDADE_ROW - 1], control)
+    return x_col_codigo, x_col_desc, ufs, cidades
 
-    # custo do PR: ('PR', cidade) — a subcoluna .1 é %AS; evitamos ela
-    pr_custo_col = None
-    for a, b in dfm.columns:
+
+def _locate_ccd_columns(head: list[tuple], cidade: str) -> tuple[int, int, int]:
+    """
+    A partir das primeiras linhas da CCD, devolve as colunas (1-based) de
+    código, descrição e custo (PR, cidade).
+    """
+    x_col_codigo, x_col_desc, ufs, cidades = _ccd_header(head)
+
+    # custo do PR: ('PR', cidade) — a subcoluna repetida é %AS; evitamos ela
+    seen: Dict[tuple, int] = {}
+    fallback = None
+    for idx, (a, b) in enumerate(zip(ufs, cidades)):
         if _norm(a) == "pr" and _norm(b) == _norm(cidade):
-            pr_custo_col = (a, b)
-            break
-    if pr_custo_col is None:
-        candidates = [c for c in dfm.columns
-                      if c[0] == "PR" and _norm(c[1]).startswith(_norm(cidade)) and not str(c[1]).endswith(".1")]
-        if not candidates:
-            raise RuntimeError(f"[SINAPI CCD] Coluna de custo PR/{cidade} não encontrada.")
-        pr_custo_col = candidates[0]
-
-    # Índices de coluna (1-based no Excel) conforme a ordem do pandas
-    x_col_codigo = list(dfm.columns).index(col_codigo) + 1
-    x_col_desc   = list(dfm.columns).index(col_desc)   + 1
-    x_col_custo  = list(dfm.columns).index(pr_custo_col) + 1
-
-    # 2) Leia diretamente do Excel (openpyxl) para manter as três colunas alinhadas por linha
-    wb = load_workbook(path, data_only=False, read_only=False)
+            return x_col_codigo, x_col_desc, idx + 1
+        # repetições do mesmo (UF, cidade) recebem sufixo ".1", ".2"... (como no pandas)
+        n = seen.get((a, b), 0)
+        seen[(a, b)] = n + 1
+        label = b if n == 0 else f"{b}.{n}"
+        if (fallback is None and a == "PR" and _norm(label).startswith(_norm(cidade))
+                and not str(label).endswith(".1")):
+            fallback = idx + 1
+    if fallback is None:
+        raise RuntimeError(f"[SINAPI CCD] Coluna de custo PR/{cidade} não encontrada.")
+    return x_col_codigo, x_col_desc, fallback
+
+
+def _locate_ccd_cidades(head: list[tuple]) -> tuple[int, int, list[tuple[str, str, int]]]:
+    """
+    Colunas (1-based) de código e descrição + a coluna de custo de cada (UF, cidade):
+    a primeira subcoluna de cada par (a repetida é %AS).
+    """
+    x_col_codigo, x_col_desc, ufs, cidades = _ccd_header(head)
+
+    out: list[tuple[str, str, int]] = []
+    seen: set[tuple] = set()
+    for idx, (a, b) in enumerate(zip(ufs, cidades)):
+        if idx + 1 <= max(x_col_codigo, x_col_desc) or a is None or b is None:
+            continue
+        if (a, b) in seen:
+            continue
+        seen.add((a, b))
+        out.append((str(a).strip(), str(b).strip(), idx + 1))
+    if not out:
+        raise RuntimeError("[SINAPI CCD] Nenhuma coluna de custo (UF, cidade) encontrada.")
+    return x_col_codigo, x_col_desc, out
+
+
+def _cell_code(v) -> Optional[str]:
+    """Código da célula: extraído do HYPERLINK quando for fórmula; senão o próprio valor."""
+    if isinstance(v, str) and v.startswith("="):
+        return _extract_code_from_formula(v)
+    return str(v).strip() if v is not None else None
+
+
+# ----------------- loader principal -----------------
+
+@cached_loader("sinapi_ccd", version=1)
+def load_sinapi_ccd_pr(path: str, cidade: str = "CURITIBA", as_table: bool = False) -> CanonDict | ItemTable:
+    """
+    Lê a aba CCD do SINAPI e retorna Dict[codigo, Item] usando a coluna ('PR', cidade) como CUSTO.
+    Extrai código da fórmula HYPERLINK; lê código/descrição/custo **da mesma linha**,
+    considerando apenas linhas com código numérico (ignora observações do topo e títulos de grupo).
+
+    A planilha é lida em modo *read-only* (streaming, memória constante): primeiro só as linhas
+    de cabeçalho, para localizar as colunas; depois as linhas de dados, célula a célula.
+
+    `as_table=True` devolve uma `ItemTable` (colunar) no lugar do dict.
+    """
+    wb = load_workbook(path, data_only=False, read_only=True)
+    try:
+        return _ler_ccd(wb, cidade, as_table)
+    finally:
+        wb.close()
+
+
+def _ler_ccd(wb, cidade: str, as_table: bool = False) -> CanonDict | ItemTable:
+    """Lê a CCD de um workbook openpyxl já aberto (read-only, fórmulas preservadas)."""
     ws = wb["CCD"]
 
-    # a primeira linha de dados (em Excel) é header_row+2
-    start_row_excel = (header_row + 1) + 1
-
-    # Avance até encontrar o primeiro código numérico (evita bloco de observações)
-    r = start_row_excel
-    max_r = ws.max_row
-    first_data_row = None
-    while r <= max_r:
-        v = ws.cell(row=r, column=x_col_codigo).value
-        code = _extract_code_from_formula(v) if isinstance(v, str) and v.startswith("=") \
-               else (str(v).strip() if v is not None else None)
-        if isinstance(code, str) and _DIGIT_CODE_RE.fullmatch(code):
-            first_data_row = r
-            break
-        r += 1
-    if first_data_row is None:
-        raise RuntimeError("[SINAPI CCD] Não encontrei nenhum código numérico na CCD.")
+    # 1) cabeçalho: só as primeiras linhas
+    head = list(ws.iter_rows(min_row=1, max_row=_LABEL_ROW, values_only=True))
+    x_col_codigo, x_col_desc, x_col_custo = _locate_ccd_columns(head, cidade)
 
-    # 3) Varra da primeira linha válida até o fim, coletando código/descrição/custo
-    out: CanonDict = {}
-    dup = 0
-    for row in ws.iter_rows(min_row=first_data_row, max_row=max_r,
-                            min_col=min(x_col_codigo, x_col_desc, x_col_custo),
-                            max_col=max(x_col_codigo, x_col_desc, x_col_custo),
-                            values_only=False):
-        # A linha inteira veio; pegue só as 3 células relevantes
-        c_code  = row[x_col_codigo  - min(x_col_codigo, x_col_desc, x_col_custo)]
-        c_desc  = row[x_col_desc    - min(x_col_codigo, x_col_desc, x_col_custo)]
-        c_custo = row[x_col_custo   - min(x_col_codigo, x_col_desc, x_col_custo)]
-
-        # código
-        vcode = c_code.value
-        code = _extract_code_from_formula(vcode) if isinstance(vcode, str) and vcode.startswith("=") \
-               else (str(vcode).strip() if vcode is not None else None)
+    lo = min(x_col_codigo, x_col_desc, x_col_custo)
+    hi = max(x_col_codigo, x_col_desc, x_col_custo)
+    i_code, i_desc, i_custo = x_col_codigo - lo, x_col_desc - lo, x_col_custo - lo
+
+    # 2) dados: só as colunas entre código e custo, valores crus (fórmulas preservadas)
+    codigos: List[str] = []
+    descricoes: List[str] = []
+    custos: List[float] = []
+    for row in ws.iter_rows(min_row=_FIRST_DATA_ROW, min_col=lo, max_col=hi, values_only=True):
+        if len(row) <= i_code:
+            continue
+        code = _cell_code(row[i_code])
         if not (isinstance(code, str) and _DIGIT_CODE_RE.fullmatch(code)):
-            # acabou a sequência de dados (normalmente após o último bloco)
+            # observações, títulos de grupo, linhas finais...
             continue
 
         # descrição
-        desc = c_desc.value
+        desc = row[i_desc] if len(row) > i_desc else None
         desc = "" if desc is None else str(desc).strip()
 
-        # custo PR
-        custo = _smart_to_float(c_custo.value)
-
-        # alguns finais de bloco trazem custo vazio; mantemos mas com 0.0
+        # custo PR; alguns finais de bloco trazem custo vazio: mantemos com 0.0
+        custo = _smart_to_float(row[i_custo] if len(row) > i_custo else None)
         if custo is None:
             custo = 0.0
 
-        item: Item = {
-            "codigo": norm_code(code),
-            "descricao": desc,
-            "valor_unit": float(custo),
-            "fonte": "SINAPI",
+        codigos.append(norm_code(code))
+        descricoes.append(desc)
+        custos.append(float(custo))
+
+    if not codigos:
+        raise RuntimeError("[SINAPI CCD] Não encontrei nenhum código numérico na CCD.")
+
+    # duplicados: fica o último (na posição da primeira ocorrência)
+    out: CanonDict | ItemTable
+    if as_table:
+        out = ItemTable.from_columns(codigos, descricoes, custos, fonte="SINAPI")
+    else:
+        out = {
+            cod: {"codigo": cod, "descricao": desc, "valor_unit": custo, "fonte": "SINAPI"}
+            for cod, desc, custo in zip(codigos, descricoes, custos)
         }
-        if item["codigo"] in out:
-            dup += 1
-        out[item["codigo"]] = item
 
+    dup = len(codigos) - len(out)
     if dup:
         logger.warning("SINAPI CCD PR: %d código(s) duplicado(s); mantendo o último.", dup)
 
     return out
+
+
+# ----------------- todas as cidades -----------------
+
+class PrecosCidade(Mapping[str, Item]):
+    """
+    Visão `CanonDict` (somente leitura) de uma cidade da `MatrizCCD`.
+
+    Não copia nada: os itens são montados sob demanda a partir da linha do código e da
+    coluna da cidade. Serve onde um `CanonDict` é lido (ex.: `cruzar`); `dict(visao)`
+    materializa se for preciso.
+    """
+
+    def __init__(self, matriz: "MatrizCCD", col: int):
+        self._m = matriz
+        self._valores = matriz.valores[:, col]  # view (sem cópia)
+
+    def __getitem__(self, codigo: str) -> Item:
+        i = self._m.indice[codigo]
+        return {
+            "codigo": codigo,
+            "descricao": self._m.descricoes[i],
+            "valor_unit": float(self._valores[i]),
+            "fonte": "SINAPI",
+        }
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._m.codigos)
+
+    def __len__(self) -> int:
+        return len(self._m.codigos)
+
+    def __contains__(self, codigo: object) -> bool:
+        return codigo in self._m.indice
+
+
+@dataclass(eq=False)
+class MatrizCCD:
+    """
+    Custos da CCD para todas as (UF, cidade) de uma vez.
+
+    - `codigos` / `descricoes`: uma entrada por código (ordem da planilha)
+    - `indice`:  código → linha
+    - `cidades`: (UF, cidade) de cada coluna, como no cabeçalho
+    - `valores`: matriz float64 [código × cidade]; custo vazio → 0.0 (como em `load_sinapi_ccd_pr`)
+    """
+    codigos: List[str]
+    descricoes: List[str]
+    indice: Dict[str, int]
+    cidades: List[Tuple[str, str]]
+    valores: np.ndarray
+
+    def coluna(self, cidade: str, uf: str | None = None) -> int:
+        """Coluna da cidade (nome sem acento/caixa; `uf` desambigua). KeyError se não houver."""
+        alvo = _norm(cidade)
+        achados = [
+            j for j, (u, c) in enumerate(self.cidades)
+            if _norm(c) == alvo and (uf is None or _norm(u) == _norm(uf))
+        ]
+        if not achados:
+            raise KeyError(f"[SINAPI CCD] Cidade não encontrada: {cidade!r}"
+                           + (f" (UF {uf})" if uf else ""))
+        if len(achados) > 1:
+            raise KeyError(f"[SINAPI CCD] Cidade ambígua: {cidade!r}; informe a UF.")
+        return achados[0]
+
+    def cidade(self, cidade: str, uf: str | None = None) -> PrecosCidade:
+        """`CanonDict` da cidade, sem copiar a matriz."""
+        return PrecosCidade(self, self.coluna(cidade, uf))
+
+
+@cached_loader("sinapi_ccd_matriz", version=1)
+def load_sinapi_ccd_matriz(path: str) -> MatrizCCD:
+    """
+    Lê a aba CCD do SINAPI uma única vez, com o custo de **todas** as (UF, cidade).
+
+    Mesmas regras de `load_sinapi_ccd_pr` (código do HYPERLINK, só linhas com código
+    numérico, custo vazio → 0.0, duplicado → fica o último); `matriz.cidade("CURITIBA")`
+    equivale a `load_sinapi_ccd_pr(path, "CURITIBA")`.
+    """
+    wb = load_workbook(path, data_only=False, read_only=True)
+    try:
+        return _ler_ccd_matriz(wb)
+    finally:
+        wb.close()
+
+
+def _ler_ccd_matriz(wb) -> MatrizCCD:
+    ws = wb["CCD"]
+
+    head = list(ws.iter_rows(min_row=1, max_row=_LABEL_ROW, values_only=True))
+    x_col_codigo, x_col_desc, cols_cidade = _locate_ccd_cidades(head)
+
+    lo = min(x_col_codigo, x_col_desc)
+    hi = max(x_col_codigo, x_col_desc, max(c for _, _, c in cols_cidade))
+    i_code, i_desc = x_col_codigo - lo, x_col_desc - lo
+    i_custos = [c - lo for _, _, c in cols_cidade]
+
+    codigos: List[str] = []
+    descricoes: List[str] = []
+    linhas: List[List[float]] = []
+    indice: Dict[str, int] = {}
+    dup = 0
+    for row in ws.iter_rows(min_row=_FIRST_DATA_ROW, min_col=lo, max_col=hi, values_only=True):
+        if len(row) <= i_code:
+            continue
+        code = _cell_code(row[i_code])
+        if not (isinstance(code, str) and _DIGIT_CODE_RE.fullmatch(code)):
+            continue
+
+        desc = row[i_desc] if len(row) > i_desc else None
+        desc = "" if desc is None else str(desc).strip()
+        custos = [
+            _smart_to_float(row[i] if len(row) > i else None) or 0.0
+            for i in i_custos
+        ]
+
+        code = norm_code(code)
+        i = indice.get(code)
+        if i is None:
+            indice[code] = len(codigos)
+            codigos.append(code)
+            descricoes.append(desc)
+            linhas.append(custos)
+        else:
+            dup += 1
+            descricoes[i] = desc
+            linhas[i] = custos
+
+    if not codigos:
+        raise RuntimeError("[SINAPI CCD] Não encontrei nenhum código numérico na CCD.")
+
+    if dup:
+        logger.warning("SINAPI CCD: %d código(s) duplicado(s); mantendo o último.", dup)
+
+    valores = np.array(linhas, dtype=np.float64).reshape(len(codigos), len(cols_cidade))
+    logger.info("SINAPI CCD: %d códigos × %d cidades.", len(codigos), len(cols_cidade))
+    return MatrizCCD(
+        codigos=codigos,
+        descricoes=descricoes,
+        indice=indice,
+        cidades=[(uf, cid) for uf, cid, _ in cols_cidade],
+        valores=valores,
+    )
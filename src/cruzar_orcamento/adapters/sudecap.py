@@ -6,8 +6,12 @@ from typing import Iterable
 import unicodedata
 import pandas as pd
 
-from ..models import Item, CanonDict
+from ..colunar import ItemTable
+from ..models import CanonDict
 from ..utils.utils_text import norm_code
+from ..utils.utils_cache import cached_loader
+from .sheet_reader import SheetReader
+from .xls_reader import XlsBook, usar_xls_direto
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +26,9 @@ def _norm(s: str) -> str:
     s = _strip_accents(s).lower().strip()
     return s
 
-def _find_header_row(df_raw: pd.DataFrame, max_scan: int = 20) -> int | None:
+_MAX_SCAN = 20
+
+def _find_header_row(df_raw: pd.DataFrame, max_scan: int = _MAX_SCAN) -> int | None:
     """
     Procura uma linha de cabeçalho contendo algo como:
     - codigo/código e descricao/descrição
@@ -59,12 +65,71 @@ def _pick_col(lookup: dict[str, str], candidates: Iterable[str]) -> str:
                 return lookup[k]
     raise KeyError(f"Não encontrei nenhuma coluna compatível com: {tuple(candidates)}")
 
+def _detectar_header(df_raw: pd.DataFrame, sheet) -> int:
+    header_row = _find_header_row(df_raw)
+    if header_row is None:
+        # fallback comum: linha 5 (index 4)
+        header_row = 4
+        logger.warning(f"[{sheet}] Cabeçalho não detectado; usando header=4 (linha 5).")
+    return header_row
+
+def _pick_cols(columns: list, sheet) -> tuple[str, str, str]:
+    lookup = _build_lookup(columns)
+    try:
+        col_codigo   = _pick_col(lookup, _COL_CANDIDATES["codigo"])
+        col_desc     = _pick_col(lookup, _COL_CANDIDATES["descricao"])
+        col_val_unit = _pick_col(lookup, _COL_CANDIDATES["valor_unit"])
+    except KeyError as e:
+        raise KeyError(f"[{sheet}] {e}. Colunas disponíveis: {list(columns)}") from e
+    return col_codigo, col_desc, col_val_unit
+
+# ---------- Leitura (projeção código / descrição / valor) ----------
+
+_PROJ_COLS = ["CODIGO_SUDECAP", "DESCRICAO_SUDECAP", "VALOR_SUDECAP"]
+
+def _projecao_reader(reader: SheetReader, sheet: str | int) -> pd.DataFrame:
+    header_row = _detectar_header(reader.probe(sheet, nrows=_MAX_SCAN), sheet)
+    df = reader.read(sheet, header_row)
+    proj = df[list(_pick_cols(list(df.columns), sheet))].copy()
+    proj.columns = _PROJ_COLS
+    return proj
+
+def _projecao_xls(book: XlsBook, sheet: str | int) -> pd.DataFrame | None:
+    """
+    Caminho direto para `.xls`: detecta o cabeçalho nas primeiras linhas e lê só as
+    colunas de código/descrição/valor. None → caso não coberto (o chamador usa o pandas).
+    """
+    header_row = _detectar_header(pd.DataFrame(book.linhas(sheet, _MAX_SCAN)), sheet)
+    nomes = book.cabecalho(sheet, header_row)
+    if nomes is None:
+        return None
+    cols = _pick_cols(nomes, sheet)
+    # nome → posição (nomes duplicados já vêm desambiguados como no pandas)
+    posicoes = [list(map(str, nomes)).index(c) for c in cols]
+    lidas = book.colunas(sheet, header_row, posicoes)
+    if lidas is None:
+        return None
+    return pd.DataFrame({dst: lidas.serie(pos) for dst, pos in zip(_PROJ_COLS, posicoes)})
+
+def _precos_xls(book: XlsBook, sheet: str | int, as_table: bool = False) -> CanonDict | ItemTable:
+    """Preços a partir de um `.xls` já aberto (com fallback para o pandas)."""
+    proj = _projecao_xls(book, sheet)
+    if proj is None:
+        with SheetReader(book.path) as reader:
+            proj = _projecao_reader(reader, sheet)
+    return _canon_de_projecao(proj, as_table)
+
+def _precos_reader(reader: SheetReader, sheet: str | int, as_table: bool = False) -> CanonDict | ItemTable:
+    return _canon_de_projecao(_projecao_reader(reader, sheet), as_table)
+
 # ---------- Loader principal ----------
 
+@cached_loader("sudecap", version=1)
 def load_sudecap(
     path: str,
     sheet: str | int | None = None,
-) -> CanonDict:
+    as_table: bool = False,
+) -> CanonDict | ItemTable:
     """
     Lê planilha SUDECAP e retorna Dict[codigo, Item] no esquema canônico.
 
@@ -72,35 +137,24 @@ def load_sudecap(
     - Detecta cabeçalho automaticamente (scaneando as primeiras linhas; fallback header=4).
     - Mapeia nomes de colunas de forma flexível (aceita 'VALOR').
     - Converte vírgula decimal para ponto quando necessário.
+    - Arquivos `.xls` são lidos direto pelo xlrd (só as 3 colunas usadas); demais formatos
+      (ou motor calamine) passam pelo `SheetReader`.
+    - `as_table=True` devolve uma `ItemTable` (colunar) no lugar do dict.
     """
-    xls = pd.ExcelFile(path)
-
     # Usa a primeira aba por padrão, a menos que o usuário especifique
     if sheet is None:
         sheet = 0
         logger.info(f"Aba detectada para SUDECAP: {sheet!r}")
 
-    df_raw = pd.read_excel(path, sheet_name=sheet, header=None)
-    header_row = _find_header_row(df_raw)
-    if header_row is None:
-        # fallback comum: linha 5 (index 4)
-        header_row = 4
-        logger.warning(f"[{sheet}] Cabeçalho não detectado; usando header=4 (linha 5).")
-
-    df = pd.read_excel(path, sheet_name=sheet, header=header_row)
-
-    lookup = _build_lookup(df.columns)
-
-    try:
-        col_codigo   = _pick_col(lookup, _COL_CANDIDATES["codigo"])
-        col_desc     = _pick_col(lookup, _COL_CANDIDATES["descricao"])
-        col_val_unit = _pick_col(lookup, _COL_CANDIDATES["valor_unit"])
-    except KeyError as e:
-        raise KeyError(f"[{sheet}] {e}. Colunas disponíveis: {list(df.columns)}") from e
+    if usar_xls_direto(path):
+        with XlsBook(path) as book:
+            return _precos_xls(book, sheet, as_table)
+    with SheetReader(path) as reader:
+        return _precos_reader(reader, sheet, as_table)
 
-    proj = df[[col_codigo, col_desc, col_val_unit]].copy()
-    proj.columns = ["CODIGO_SUDECAP", "DESCRICAO_SUDECAP", "VALOR_SUDECAP"]
 
+def _canon_de_projecao(proj: pd.DataFrame, as_table: bool = False) -> CanonDict | ItemTable:
+    """Limpa a projeção CODIGO/DESCRICAO/VALOR e monta o CanonDict (ou a `ItemTable`)."""
     # limpeza
     proj["CODIGO_SUDECAP"] = proj["CODIGO_SUDECAP"].map(norm_code)  # não forçar str pra evitar "nan"
     proj["DESCRICAO_SUDECAP"] = proj["DESCRICAO_SUDECAP"].astype(str).str.strip()
@@ -118,26 +172,38 @@ def load_sudecap(
     # descartar linhas sem código/descrição
     proj = proj.dropna(subset=["CODIGO_SUDECAP", "DESCRICAO_SUDECAP"])
 
-    # ---- construir Dict[codigo, Item] ----
-    out: CanonDict = {}
-    dup_count = 0
-    for _, row in proj.iterrows():
-        codigo = row["CODIGO_SUDECAP"]
-        item: Item = {
-            "codigo": codigo,
-            "descricao": row["DESCRICAO_SUDECAP"],
-            "valor_unit": float(row["VALOR_SUDECAP"]) if pd.notna(row["VALOR_SUDECAP"]) else 0.0,
-            "fonte": "SUDECAP",
+    return _build_canon(proj, as_table)
+
+
+def _build_canon(proj: pd.DataFrame, as_table: bool = False) -> CanonDict | ItemTable:
+    """
+    Constrói Dict[codigo, Item] (ou `ItemTable`) a partir da projeção CODIGO_SUDECAP /
+    DESCRICAO_SUDECAP / VALOR_SUDECAP.
+    Códigos repetidos: mantém o último (na posição da primeira ocorrência).
+    """
+    codigos = proj["CODIGO_SUDECAP"]
+    descs = proj["DESCRICAO_SUDECAP"]
+    valores = proj["VALOR_SUDECAP"].fillna(0.0).astype(float)
+
+    out: CanonDict | ItemTable
+    if as_table:
+        out = ItemTable.from_columns(codigos, descs, valores.to_numpy(), fonte="SUDECAP")
+    else:
+        out = {
+            cod: {"codigo": cod, "descricao": desc, "valor_unit": val, "fonte": "SUDECAP"}
+            for cod, desc, val in zip(codigos.tolist(), descs.tolist(), valores.tolist())
         }
-        if codigo in out:
-            dup_count += 1
+
+    dup_mask = codigos.duplicated(keep="first")
+    dup_count = int(dup_mask.sum())
+    if dup_count:
+        # descrição da ocorrência anterior de cada duplicado (a que está sendo substituída)
+        prev_desc = descs.groupby(codigos, sort=False).shift()
+        for codigo, antes, depois in zip(codigos[dup_mask], prev_desc[dup_mask], descs[dup_mask]):
             logger.warning(
                 "Código duplicado detectado na SUDECAP: %r (substituindo %r → %r)",
-                codigo, out[codigo]["descricao"], item["descricao"]
+                codigo, antes, depois
             )
-        out[codigo] = item
-
-    if dup_count:
         logger.warning("SUDECAP: detectados %d código(s) duplicado(s); mantendo o último.", dup_count)
 
     return out
@@ -0,0 +1,226 @@
+# src/cruzar_orcamento/adapters/xls_reader.py
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import time
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .sheet_reader import engine_escolhido
+
+try:  # xlrd é o leitor de .xls do pandas; se faltar, os adapters usam o caminho pandas
+    import xlrd
+except ImportError:  # pragma: no cover
+    xlrd = None
+
+# Células que o pandas repassa sem conversão (texto/vazias).
+_TIPOS_TEXTO = frozenset() if xlrd is None else frozenset(
+    {xlrd.XL_CELL_TEXT, xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK}
+)
+
+# Strings que o pandas lê como NaN por padrão (lista `na_values` documentada em `read_csv`/
+# `read_excel`); cópia local para não depender de `pandas._libs`. `test_xls_reader.py`
+# confere a paridade com `pd.read_excel` nos arquivos de `data/`.
+_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+# Valores que o parser do pandas converteria em booleano (fora do escopo do caminho rápido).
+_BOOL_STRINGS = frozenset({"True", "False", "TRUE", "FALSE", "true", "false"})
+
+
+def usar_xls_direto(path: str) -> bool:
+    """
+    True se o arquivo é BIFF `.xls`, o xlrd está disponível e calamine não foi pedido
+    explicitamente (no `.xls`, a leitura direta é tão rápida quanto calamine).
+    """
+    return xlrd is not None and Path(str(path)).suffix.lower() == ".xls" and engine_escolhido() != "calamine"
+
+
+class XlsColunas:
+    """
+    Colunas de uma aba lidas "por posição" a partir de `header_row`.
+
+    - `nomes`:   nomes de todas as colunas, como `pd.read_excel(header=header_row)` geraria
+    - `valores`: {posição → np.ndarray} só das posições pedidas (linhas de dados)
+    - `nrows`:   nº de linhas de dados
+    """
+
+    def __init__(self, nomes: list[Any], valores: dict[int, np.ndarray], nrows: int):
+        self.nomes = nomes
+        self.valores = valores
+        self.nrows = nrows
+
+    @property
+    def ncols(self) -> int:
+        return len(self.nomes)
+
+    def serie(self, pos: int) -> pd.Series:
+        """Coluna `pos` como Series; posição inexistente → coluna vazia."""
+        if pos in self.valores:
+            return pd.Series(self.valores[pos])
+        return pd.Series([""] * self.nrows, dtype=object)
+
+
+class XlsBook:
+    """
+    Leitura direta de `.xls` (BIFF) via xlrd, sem passar pelo `pd.read_excel`.
+
+    - Abre o arquivo uma única vez, com carregamento de abas sob demanda (`on_demand=True`).
+    - `linhas(sheet, n)`: primeiras linhas cruas (para heurísticas de cabeçalho).
+    - `colunas(sheet, header_row, posicoes)`: só as colunas pedidas, com a mesma conversão
+      de células/tipos que o pandas faria (NaN para vazios/“NA”, inferência numérica por coluna).
+
+    `colunas` retorna None nos casos que o caminho rápido não reproduz fielmente
+    (booleanos, aba com uma única coluna, cabeçalho fora da aba); o chamador cai no pandas.
+    """
+
+    def __init__(self, path: str):
+        if xlrd is None:  # pragma: no cover
+            raise ImportError("xlrd não instalado")
+        self.path = path
+        self._book = xlrd.open_workbook(path, on_demand=True)
+
+    # ---------- ciclo de vida ----------
+
+    def close(self) -> None:
+        self._book.release_resources()
+
+    def __enter__(self) -> "XlsBook":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    # ---------- leitura ----------
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self._book.sheet_names())
+
+    def _sheet(self, sheet: str | int):
+        if isinstance(sheet, str):
+            return self._book.sheet_by_name(sheet)
+        return self._book.sheet_by_index(sheet)
+
+    def _cell(self, value: Any, typ: int) -> Any:
+        """Mesma conversão de célula do leitor xlrd do pandas."""
+        if typ == xlrd.XL_CELL_NUMBER:
+            if math.isfinite(value):
+                as_int = int(value)
+                if as_int == value:
+                    return as_int
+            return value
+        if typ == xlrd.XL_CELL_ERROR:
+            return np.nan
+        if typ == xlrd.XL_CELL_BOOLEAN:
+            return bool(value)
+        if typ == xlrd.XL_CELL_DATE:
+            datemode = self._book.datemode
+            try:
+                dt = xlrd.xldate.xldate_as_datetime(value, datemode)
+            except OverflowError:
+                return value
+            # datas na época do Excel são tratadas como hora (como no pandas)
+            if (not datemode and dt.timetuple()[0:3] == (1899, 12, 31)) or (
+                datemode and dt.timetuple()[0:3] == (1904, 1, 1)
+            ):
+                return time(dt.hour, dt.minute, dt.second, dt.microsecond)
+            return dt
+        return value
+
+    def linhas(self, sheet: str | int, nrows: int) -> list[list[Any]]:
+        """Primeiras `nrows` linhas (todas as colunas), como `header=None` do pandas veria."""
+        sh = self._sheet(sheet)
+        return [
+            [self._cell(v, t) for v, t in zip(sh.row_values(i), sh.row_types(i))]
+            for i in range(min(nrows, sh.nrows))
+        ]
+
+    def liberar(self, sheet: str | int) -> None:
+        """Descarrega a aba da memória (com `on_demand`, ela é relida se pedida de novo)."""
+        self._book.unload_sheet(sheet)
+
+    def cabecalho(self, sheet: str | int, header_row: int) -> list[Any] | None:
+        """Nomes das colunas como `pd.read_excel(header=header_row)` geraria (None se fora da aba)."""
+        sh = self._sheet(sheet)
+        if header_row >= sh.nrows:
+            return None
+        return _nomes_colunas(
+            [self._cell(v, t) for v, t in zip(sh.row_values(header_row), sh.row_types(header_row))]
+        )
+
+    def colunas(
+        self,
+        sheet: str | int,
+        header_row: int,
+        posicoes: Sequence[int],
+    ) -> XlsColunas | None:
+        nomes = self.cabecalho(sheet, header_row)
+        sh = self._sheet(sheet)
+        if nomes is None or sh.ncols < 2:
+            return None
+
+        valores: dict[int, np.ndarray] = {}
+        for pos in posicoes:
+            if pos >= sh.ncols:
+                continue
+            brutos = [
+                v if t in _TIPOS_TEXTO else self._cell(v, t)
+                for v, t in zip(
+                    sh.col_values(pos, start_rowx=header_row + 1),
+                    sh.col_types(pos, start_rowx=header_row + 1),
+                )
+            ]
+            col = _inferir_coluna(brutos)
+            if col is None:
+                return None
+            valores[pos] = col
+
+        return XlsColunas(nomes, valores, sh.nrows - header_row - 1)
+
+
+def _nomes_colunas(header: list[Any]) -> list[Any]:
+    """Nomes de coluna como o parser do pandas: vazios → 'Unnamed: i', duplicados → 'X.1', 'X.2'…"""
+    names = [c if c != "" else f"Unnamed: {i}" for i, c in enumerate(header)]
+    counts: defaultdict[Any, int] = defaultdict(int)
+    for i, col in enumerate(names):
+        cur_count = counts[col]
+        while cur_count > 0:
+            counts[col] = cur_count + 1
+            col = f"{col}.{cur_count}"
+            cur_count = counts[col]
+        names[i] = col
+        counts[col] = cur_count + 1
+    return names
+
+
+def _inferir_coluna(valores: list[Any]) -> np.ndarray | None:
+    """
+    Tipagem de uma coluna como no parser do pandas:
+      - strings NA padrão ('', 'NA', 'N/A', 'nan', ...) → NaN
+      - coluna toda numérica (ou string numérica) → int64/float64
+      - senão → object
+    Booleanos → None (o pandas aplica regras próprias; o chamador usa o caminho pandas).
+    """
+    out = []
+    for v in valores:
+        if isinstance(v, str):
+            if v in _NA_STRINGS:
+                v = np.nan
+            elif v in _BOOL_STRINGS:
+                return None
+        elif isinstance(v, bool):
+            return None
+        out.append(v)
+
+    arr = np.array(out, dtype=object)
+    try:
+        return pd.to_numeric(arr)
+    except (ValueError, TypeError):
+        return arr
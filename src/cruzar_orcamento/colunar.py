@@ -0,0 +1,374 @@
+# src/cruzar_orcamento/colunar.py
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from functools import cached_property
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+from .utils.utils_code import CODIGOS
+from .utils.utils_text import norm_text
+from .models import CanonDict, ChildSpec, CompEstrutura, EstruturaDict, Item
+
+
+class ItemTable(Mapping[str, Item]):
+    """
+    Tabela de itens em colunas — alternativa ao `CanonDict` (um dict por linha).
+
+    - `chaves`:     chave de cada linha (= código nas referências; "<codigo>__occN" no ORÇAMENTO)
+    - `codigos`, `descricoes`: arrays `object` contíguos
+    - `valores`:    float64
+    - `bancos`:     categórico (None = sem coluna de banco)
+    - `fontes`:     categórico (normalmente uma só categoria)
+
+    Também é um `Mapping[chave, Item]` somente leitura: onde um `CanonDict` é lido, a
+    tabela serve como está (os itens são montados sob demanda). `to_canon()` /
+    `from_canon()` convertem para/de o formato antigo.
+    """
+
+    def __init__(
+        self,
+        chaves: np.ndarray,
+        codigos: np.ndarray,
+        descricoes: np.ndarray,
+        valores: np.ndarray,
+        fontes: pd.Categorical,
+        bancos: pd.Categorical | None = None,
+    ):
+        self.chaves = chaves
+        self.codigos = codigos
+        self.descricoes = descricoes
+        self.valores = valores
+        self.fontes = fontes
+        self.bancos = bancos
+
+    # ---------- construção ----------
+
+    @classmethod
+    def from_columns(
+        cls,
+        codigos: Iterable[str],
+        descricoes: Iterable[str],
+        valores: Iterable[float],
+        *,
+        fonte: str | Iterable[str],
+        bancos: Iterable[str] | None = None,
+        chaves: Iterable[str] | None = None,
+    ) -> "ItemTable":
+        """
+        Monta a tabela a partir de colunas (listas, arrays ou Series).
+
+        Chaves repetidas seguem a regra do `CanonDict`: fica o último valor, na posição
+        da primeira ocorrência. `chaves=None` → a chave é o próprio código.
+        """
+        cod = como_objetos(codigos)
+        ch = cod if chaves is None else como_objetos(chaves)
+        n = len(ch)
+
+        pos = np.arange(n)
+        if pd.Index(ch).has_duplicates:
+            # última posição de cada chave, na ordem da primeira ocorrência
+            pos = pd.Series(pos).groupby(ch, sort=False).last().to_numpy()
+
+        if isinstance(fonte, str):
+            fontes = pd.Categorical.from_codes(np.zeros(len(pos), dtype=np.int8), [fonte])
+        else:
+            fontes = pd.Categorical(como_objetos(fonte)[pos])
+
+        return cls(
+            chaves=ch[pos],
+            codigos=cod[pos],
+            descricoes=como_objetos(descricoes)[pos],
+            valores=np.asarray(valores, dtype=np.float64)[pos],
+            fontes=fontes,
+            bancos=None if bancos is None else pd.Categorical(como_objetos(bancos)[pos]),
+        )
+
+    @classmethod
+    def from_canon(cls, d: Mapping[str, Item]) -> "ItemTable":
+        """`CanonDict` → tabela (mesmas chaves, na mesma ordem)."""
+        if isinstance(d, ItemTable):
+            return d
+        itens = list(d.values())
+        bancos = None
+        if itens and all("banco" in it for it in itens):
+            bancos = [it["banco"] for it in itens]
+        return cls.from_columns(
+            [it["codigo"] for it in itens],
+            [it["descricao"] for it in itens],
+            [it["valor_unit"] for it in itens],
+            fonte=[it["fonte"] for it in itens],
+            bancos=bancos,
+            chaves=list(d.keys()),
+        )
+
+    def to_canon(self) -> CanonDict:
+        """Tabela → `CanonDict` (um dict por linha)."""
+        return dict(self.items())
+
+    # ---------- acesso ----------
+
+    @cached_property
+    def indice(self) -> dict[str, int]:
+        """chave → linha"""
+        return {k: i for i, k in enumerate(self.chaves.tolist())}
+
+    def item(self, i: int) -> Item:
+        it: dict[str, Any] = {
+            "codigo": self.codigos[i],
+            "descricao": self.descricoes[i],
+            "valor_unit": float(self.valores[i]),
+            "fonte": self.fontes[i],
+        }
+        if self.bancos is not None:
+            it["banco"] = self.bancos[i]
+        return it  # type: ignore[return-value]
+
+    def __getitem__(self, chave: str) -> Item:
+        return self.item(self.indice[chave])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.chaves.tolist())
+
+    def __len__(self) -> int:
+        return len(self.chaves)
+
+    def __contains__(self, chave: object) -> bool:
+        return chave in self.indice
+
+    @cached_property
+    def descricoes_norm(self) -> np.ndarray:
+        """`norm_text` de cada descrição, calculado uma vez (comparação de descrições)."""
+        return como_objetos([norm_text(d) for d in self.descricoes.tolist()])
+
+    def __getstate__(self) -> dict:
+        # derivados (índice, descrições normalizadas) são recalculados sob demanda
+        return {k: v for k, v in self.__dict__.items() if k not in _DERIVADOS}
+
+    def linhas(self, chaves: Iterable[str]) -> np.ndarray:
+        """Linha de cada chave (-1 = ausente), vetorizado."""
+        return pd.Index(self.chaves).get_indexer(como_objetos(chaves))
+
+    def filtrar(self, mask: np.ndarray) -> "ItemTable":
+        """Subtabela com as linhas em que `mask` é True."""
+        return ItemTable(
+            chaves=self.chaves[mask],
+            codigos=self.codigos[mask],
+            descricoes=self.descricoes[mask],
+            valores=self.valores[mask],
+            fontes=self.fontes[mask],
+            bancos=None if self.bancos is None else self.bancos[mask],
+        )
+
+    def mask_banco(self, banco: str) -> np.ndarray:
+        """Linhas cujo banco == `banco` (casefold + strip), comparando só as categorias."""
+        if self.bancos is None:
+            return np.zeros(len(self), dtype=bool)
+        alvo = banco.casefold().strip()
+        cats = self.bancos.categories
+        ok = np.fromiter((bool(c) and str(c).casefold().strip() == alvo for c in cats),
+                         dtype=bool, count=len(cats))
+        codes = self.bancos.codes
+        return (codes >= 0) & ok[np.maximum(codes, 0)]
+
+
+class EstruturaCompacta(Mapping[str, CompEstrutura]):
+    """
+    `EstruturaDict` em formato CSR — alternativa compacta a um dict por pai + um dict por filho.
+
+    - `pais`:       código de cada pai (chave do mapping), array `object`
+    - `pai_cod`:    id do código de cada pai no dicionário global `CODIGOS`
+    - `pai_desc`:   id (em `textos`) da descrição de cada pai
+    - `fontes`:     fonte de cada pai (categórico)
+    - `offsets`:    filhos do pai i = posições `offsets[i]:offsets[i+1]`
+    - `filho_cod`:  id do código de cada filho no dicionário global `CODIGOS`
+    - `filho_desc`: id (em `textos`) da descrição de cada filho
+    - `filho_coef`: coeficiente de cada filho, float64 (NaN = não informado); None se a
+                    estrutura de origem não tinha coeficientes
+    - `textos`:     descrições internadas (cada uma aparece uma vez)
+
+    No pickle (cache) os códigos vão como strings e são re-internados ao carregar.
+
+    Também é um `Mapping[codigo_pai, CompEstrutura]` somente leitura (o `CompEstrutura` é
+    montado sob demanda), então serve onde um `EstruturaDict` é lido (`comparar_estruturas`).
+    """
+
+    def __init__(
+        self,
+        pais: np.ndarray,
+        pai_desc: np.ndarray,
+        fontes: pd.Categorical,
+        offsets: np.ndarray,
+        filho_cod: np.ndarray,
+        filho_desc: np.ndarray,
+        textos: list[str],
+        filho_coef: np.ndarray | None = None,
+    ):
+        self.pais = pais
+        self.pai_cod = np.asarray(CODIGOS.ids(pais.tolist()), dtype=np.int32)
+        self.pai_desc = pai_desc
+        self.fontes = fontes
+        self.offsets = offsets
+        self.filho_cod = filho_cod
+        self.filho_desc = filho_desc
+        self.filho_coef = filho_coef
+        self.textos = textos
+
+    @classmethod
+    def from_estruturas(cls, d: Mapping[str, CompEstrutura]) -> "EstruturaCompacta":
+        """`EstruturaDict` → formato compacto (mesmos pais, na mesma ordem; filhos na ordem original)."""
+        if isinstance(d, EstruturaCompacta):
+            return d
+        txt_id: dict[str, int] = {}
+
+        def _txt(s: str) -> int:
+            i = txt_id.get(s)
+            if i is None:
+                i = txt_id[s] = len(txt_id)
+            return i
+
+        pais: list[str] = []
+        pai_desc: list[int] = []
+        fontes: list[str] = []
+        offsets = [0]
+        filho_cod: list[int] = []
+        filho_desc: list[int] = []
+        filho_coef: list[float | None] = []
+        tem_coef = False
+        for pai, comp in d.items():
+            pais.append(pai)
+            pai_desc.append(_txt(comp["descricao"]))
+            fontes.append(comp["fonte"])
+            for ch in comp["filhos"]:
+                filho_cod.append(CODIGOS.id(ch["codigo"]))
+                filho_desc.append(_txt(ch["descricao"]))
+                filho_coef.append(ch.get("coeficiente"))
+                tem_coef = tem_coef or "coeficiente" in ch
+            offsets.append(len(filho_cod))
+
+        return cls(
+            pais=como_objetos(pais),
+            pai_desc=np.asarray(pai_desc, dtype=np.int32),
+            fontes=pd.Categorical(fontes),
+            offsets=np.asarray(offsets, dtype=np.int64),
+            filho_cod=np.asarray(filho_cod, dtype=np.int32),
+            filho_desc=np.asarray(filho_desc, dtype=np.int32),
+            textos=list(txt_id),
+            filho_coef=np.array(filho_coef, dtype=np.float64) if tem_coef else None,
+        )
+
+    def to_estruturas(self) -> EstruturaDict:
+        """Formato compacto → `EstruturaDict` (um dict por pai/filho)."""
+        return dict(self.items())
+
+    def selecionar(self, posicoes: np.ndarray | list[int]) -> "EstruturaCompacta":
+        """Sub-estrutura só com os pais nas `posicoes` (na ordem dada) e só os textos que eles usam."""
+        pos = np.asarray(posicoes, dtype=np.int64)
+        arestas = posicoes_das_faixas(self.offsets[pos], self.offsets[pos + 1])
+        usados, local = np.unique(np.concatenate([self.pai_desc[pos], self.filho_desc[arestas]]),
+                                  return_inverse=True)
+        local = local.astype(np.int32)
+        txts = self.textos
+        return EstruturaCompacta(
+            pais=self.pais[pos],
+            pai_desc=local[:len(pos)],
+            fontes=self.fontes[pos],
+            offsets=np.concatenate([[0], np.cumsum(self.offsets[pos + 1] - self.offsets[pos])]).astype(np.int64),
+            filho_cod=self.filho_cod[arestas],
+            filho_desc=local[len(pos):],
+            textos=[txts[t] for t in usados.tolist()],
+            filho_coef=None if self.filho_coef is None else self.filho_coef[arestas],
+        )
+
+    # ---------- acesso ----------
+
+    @cached_property
+    def indice(self) -> dict[str, int]:
+        """código do pai → posição"""
+        return {k: i for i, k in enumerate(self.pais.tolist())}
+
+    def filhos(self, i: int) -> list[ChildSpec]:
+        a, b = int(self.offsets[i]), int(self.offsets[i + 1])
+        txts = self.textos
+        filhos = [
+            ChildSpec(codigo=CODIGOS.codigo(c), descricao=txts[t])
+            for c, t in zip(self.filho_cod[a:b].tolist(), self.filho_desc[a:b].tolist())
+        ]
+        if self.filho_coef is not None:
+            for ch, k in zip(filhos, self.filho_coef[a:b].tolist()):
+                ch["coeficiente"] = None if k != k else k
+        return filhos
+
+    def comp(self, i: int) -> CompEstrutura:
+        return CompEstrutura(
+            codigo=self.pais[i],
+            descricao=self.textos[self.pai_desc[i]],
+            filhos=self.filhos(i),
+            fonte=self.fontes[i],
+        )
+
+    def __getitem__(self, pai: str) -> CompEstrutura:
+        return self.comp(self.indice[pai])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.pais.tolist())
+
+    def __len__(self) -> int:
+        return len(self.pais)
+
+    def __contains__(self, pai: object) -> bool:
+        return pai in self.indice
+
+    @cached_property
+    def textos_norm(self) -> list[str]:
+        """`norm_text` de cada descrição do pool, calculado uma vez (cada texto distinto uma vez)."""
+        return [norm_text(t) for t in self.textos]
+
+    def __getstate__(self) -> dict:
+        # ids globais não valem em outro processo: filhos vão como (códigos, posição no pool)
+        state = {k: v for k, v in self.__dict__.items() if k not in _DERIVADOS and k != "pai_cod"}
+        usados, local = np.unique(self.filho_cod, return_inverse=True)
+        state["filho_cod"] = local.astype(np.int32)
+        state["codigos"] = [CODIGOS.codigo(i) for i in usados.tolist()]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        ids = np.asarray(CODIGOS.ids(state.pop("codigos")), dtype=np.int32)
+        state["filho_cod"] = ids[state["filho_cod"]]
+        state.setdefault("filho_coef", None)
+        self.__dict__.update(state)
+        self.pai_cod = np.asarray(CODIGOS.ids(self.pais.tolist()), dtype=np.int32)
+
+    @property
+    def total_filhos(self) -> int:
+        return int(self.offsets[-1])
+
+
+# atributos recalculáveis, fora do pickle/cache
+_DERIVADOS = frozenset({"indice", "descricoes_norm", "textos_norm"})
+
+
+def posicoes_das_faixas(inicio: np.ndarray, fim: np.ndarray) -> np.ndarray:
+    """Concatenação de `arange(a, b)` para cada par (a, b), sem laço Python."""
+    n = fim - inicio
+    total = int(n.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    return np.repeat(inicio - np.cumsum(n) + n, n) + np.arange(total)
+
+
+def como_objetos(col: Iterable[Any]) -> np.ndarray:
+    """Coluna como array `object` (sem converter strings para o dtype unicode do numpy)."""
+    if isinstance(col, np.ndarray) and col.dtype == object:
+        return col
+    if isinstance(col, pd.Series):
+        return col.to_numpy(dtype=object)
+    lst = list(col)
+    arr = np.empty(len(lst), dtype=object)
+    arr[:] = lst
+    return arr
+
+
+__all__ = ["ItemTable", "EstruturaCompacta", "como_objetos", "posicoes_das_faixas"]
@@ -1,7 +1,7 @@
 # src/cruzar_orcamento/models.py
 from __future__ import annotations
 
-from typing import TypedDict, NotRequired, Dict, List
+from typing import TypedDict, NotRequired, Dict, List, Optional
 
 
 # =========================
@@ -31,6 +31,9 @@ class ChildSpec(TypedDict):
     """
     codigo: str
     descricao: str
+    # Quantidade do filho por unidade do pai (coeficiente/consumo); None = não informado.
+    # Usado só no recálculo de custos (`validators.custos`).
+    coeficiente: NotRequired[Optional[float]]
 
 
 class CompEstrutura(TypedDict):
@@ -0,0 +1,215 @@
+# src/cruzar_orcamento/utils/utils_cache.py
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Variáveis de ambiente:
+#   CRUZAR_CACHE=0           → desliga o cache
+#   CRUZAR_CACHE_DIR=<dir>   → pasta do cache (padrão: $XDG_CACHE_HOME/cruzar_orcamento)
+#   CRUZAR_CACHE_MAX_MB=<n>  → tamanho máximo da pasta (padrão 1024; 0 = sem limite); a cada
+#                              gravação, os arquivos usados há mais tempo saem até caber
+_ENV_ENABLED = "CRUZAR_CACHE"
+_ENV_DIR = "CRUZAR_CACHE_DIR"
+_ENV_MAX_MB = "CRUZAR_CACHE_MAX_MB"
+_MAX_MB_PADRAO = 1024
+
+# Sobe quando o formato do arquivo de cache (envelope) mudar.
+_FORMAT_VERSION = 1
+
+_enabled_override: bool | None = None
+_dir_override: Path | None = None
+
+
+def configure_cache(enabled: bool | None = None, cache_dir: str | Path | None = None) -> None:
+    """Ajusta o cache em tempo de execução (sobrepõe as variáveis de ambiente)."""
+    global _enabled_override, _dir_override
+    if enabled is not None:
+        _enabled_override = enabled
+    if cache_dir is not None:
+        _dir_override = Path(cache_dir)
+
+
+def cache_enabled() -> bool:
+    if _enabled_override is not None:
+        return _enabled_override
+    return os.environ.get(_ENV_ENABLED, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def cache_dir() -> Path:
+    if _dir_override is not None:
+        return _dir_override
+    env = os.environ.get(_ENV_DIR)
+    if env:
+        return Path(env)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "cruzar_orcamento"
+
+
+def cache_max_bytes() -> int | None:
+    """Limite de tamanho da pasta do cache em bytes (None = sem limite)."""
+    env = os.environ.get(_ENV_MAX_MB, "").strip()
+    try:
+        mb = float(env) if env else _MAX_MB_PADRAO
+    except ValueError:
+        logger.warning("%s inválido (%r); usando %d MB.", _ENV_MAX_MB, env, _MAX_MB_PADRAO)
+        mb = _MAX_MB_PADRAO
+    return int(mb * 2**20) if mb > 0 else None
+
+
+def limpar_cache(
+    max_bytes: int | None = 0,
+    max_idade_dias: float | None = None,
+    manter: Path | None = None,
+) -> tuple[int, int]:
+    """
+    Remove arquivos `.pkl` da pasta do cache: os sem uso há mais de `max_idade_dias` e,
+    enquanto o total passar de `max_bytes`, os usados há mais tempo (um acerto renova o
+    mtime). `max_bytes=0` esvazia a pasta; None = sem limite de tamanho. `manter` nunca sai.
+    Retorna (arquivos removidos, bytes liberados).
+    """
+    pasta = cache_dir()
+    if not pasta.is_dir():
+        return 0, 0
+    arquivos: list[tuple[float, int, Path]] = []
+    for p in pasta.glob("*.pkl"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        arquivos.append((st.st_mtime, st.st_size, p))
+    arquivos.sort()  # usados há mais tempo primeiro
+
+    total = sum(size for _, size, _ in arquivos)
+    corte = time.time() - max_idade_dias * 86400 if max_idade_dias is not None else None
+    removidos = liberados = 0
+    for mtime, size, p in arquivos:
+        velho = corte is not None and mtime < corte
+        excede = max_bytes is not None and total > max_bytes
+        if not (velho or excede):
+            break  # os seguintes são mais novos e o total já cabe
+        if p == manter:
+            continue
+        try:
+            p.unlink()
+        except OSError:
+            continue
+        total -= size
+        removidos += 1
+        liberados += size
+    return removidos, liberados
+
+
+def file_digest(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo do arquivo (a chave não depende de nome nem de mtime)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_key(name: str, version: int, digest: str, params: dict[str, Any]) -> str:
+    h = hashlib.sha256()
+    h.update(f"{_FORMAT_VERSION}|{name}|{version}|{digest}|".encode())
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()
+
+
+def ler_pickle(path: Path) -> tuple[bool, Any]:
+    """(True, valor) do pickle em `path`; (False, None) se não existe ou está ilegível."""
+    try:
+        with open(path, "rb") as f:
+            return True, pickle.load(f)
+    except FileNotFoundError:
+        return False, None
+    except Exception as e:  # arquivo corrompido/incompatível → recalcula
+        logger.warning("Cache ilegível em %s (%s); recalculando.", path, e)
+        return False, None
+
+
+def gravar_pickle(path: Path, value: Any) -> None:
+    """
+    Grava `value` em `path` (atomicamente) e poda a pasta do cache até o limite de tamanho.
+    Falha de escrita só vira aviso: o cache nunca derruba o comando.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # escrita atômica: grava num temporário e renomeia
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning("Não foi possível gravar o cache em %s: %s", path, e)
+        return
+    limite = cache_max_bytes()
+    if limite is not None:
+        removidos, liberados = limpar_cache(limite, manter=path)
+        if removidos:
+            logger.info("[cache] %d arquivo(s) antigo(s) removido(s) (%.1f MB).", removidos, liberados / 2**20)
+
+
+def _tocar(path: Path) -> None:
+    """Renova o mtime de um arquivo do cache usado agora (a poda remove os usados há mais tempo)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def cached_loader(name: str, version: int) -> Callable[[F], F]:
+    """
+    Decorator para loaders `fn(path, ...)`: guarda o resultado em disco (pickle),
+    chaveado por hash do conteúdo do arquivo + nome do adapter + versão + parâmetros.
+
+    - Mudou o arquivo (conteúdo)  → hash diferente → recalcula.
+    - Mudou o parsing do adapter  → suba `version` no decorator → recalcula.
+    - Parâmetros (`cidade`, `sheet_name`, ...) entram na chave via `repr`.
+    """
+    def deco(fn: F) -> F:
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not cache_enabled():
+                return fn(*args, **kwargs)
+
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            path = params.pop(next(iter(sig.parameters)))
+
+            try:
+                digest = file_digest(path)
+            except OSError:
+                return fn(*args, **kwargs)  # deixa o loader reportar o erro original
+
+            key = _cache_key(name, version, digest, params)
+            target = cache_dir() / f"{name}-{key[:32]}.pkl"
+
+            hit, value = ler_pickle(target)
+            if hit:
+                logger.info("[cache] %s: usando resultado em cache (%s).", name, target.name)
+                _tocar(target)
+                return value
+
+            value = fn(*args, **kwargs)
+            gravar_pickle(target, value)
+            return value
+
+        return wrapper  # type: ignore[return-value]
+
+    return deco
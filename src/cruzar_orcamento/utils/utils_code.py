@@ -2,6 +2,17 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+_INTEIRO_RE = re.compile(r"(\d+)(?:\.0+)?")
+
+# memo do caminho escalar (strings); limitado para não crescer sem fim em processos longos
+_MEMO_MAX = 1 << 17
+
 
 def norm_code_canonical(x: object) -> str:
     """
@@ -18,16 +29,23 @@ def norm_code_canonical(x: object) -> str:
       "B.01.000.010116" -> "B.1.0.10116"   (somente segmentos totalmente numéricos perdem zeros à esquerda)
       88316.0           -> "88316"
       "nan"             -> ""
+
+    Strings são memorizadas (`lru_cache`); para colunas inteiras use `norm_code_canonical_series`.
     """
     if x is None:
         return ""
+    if isinstance(x, str):
+        return _canon_str(x)
+    return _canon(str(x))
 
-    s = str(x).strip()
+
+def _canon(s: str) -> str:
+    s = s.strip()
     if s == "" or s.lower() in ("nan", "none"):
         return ""
 
     # Caso 1: número inteiro possivelmente com ".0", ".00", etc. (tudo dígito + .0+)
-    m = re.fullmatch(r"(\d+)(?:\.0+)?", s)
+    m = _INTEIRO_RE.fullmatch(s)
     if m:
         num = m.group(1)
         return num.lstrip("0") or "0"
@@ -59,3 +77,126 @@ def norm_code_canonical(x: object) -> str:
 
     # Fallback: retorna a string original
     return s
+
+
+_canon_str = lru_cache(maxsize=_MEMO_MAX)(_canon)
+
+
+def norm_code_canonical_series(col: pd.Series | Sequence[object] | np.ndarray) -> pd.Series:
+    """
+    `norm_code_canonical` aplicado a uma coluna inteira, com o mesmo resultado (byte a byte)
+    de `col.map(norm_code_canonical)`.
+
+    - Cada string distinta é normalizada uma vez só (`factorize`).
+    - Entre os valores distintos, os casos comuns (vazio/"nan"/"none" e inteiros com
+      zeros à esquerda ou ".0") saem de operações vetorizadas de string; o resto (códigos
+      segmentados, floats) passa pelo caminho escalar memorizado.
+    - Não-strings (float, int, None, NaN) vão pelo caminho escalar, valor a valor.
+    """
+    s = col if isinstance(col, pd.Series) else pd.Series(col, dtype=object)
+    vals = s.to_numpy(dtype=object)
+    e_str = np.fromiter((isinstance(v, str) for v in vals), dtype=bool, count=len(vals))
+
+    out = np.empty(len(vals), dtype=object)
+    if e_str.any():
+        codes, uniques = pd.factorize(vals[e_str])
+        out[e_str] = _canon_unicos(uniques)[codes]
+    if not e_str.all():
+        out[~e_str] = [norm_code_canonical(v) for v in vals[~e_str]]
+    return pd.Series(out, index=s.index, name=s.name, dtype=object)
+
+
+def _canon_unicos(uniques: np.ndarray) -> np.ndarray:
+    """Forma canônica de cada string distinta (vetorizado nos casos comuns)."""
+    u = pd.Series(uniques, dtype=object)
+    t = u.str.strip()
+    res = pd.Series(None, index=u.index, dtype=object)
+
+    vazio = t.eq("") | t.str.lower().isin(("nan", "none"))
+    res[vazio] = ""
+
+    inteiro = t.str.extract(r"^(\d+)(?:\.0+)?$", expand=False)
+    e_int = inteiro.notna() & ~vazio
+    if e_int.any():
+        # "000" → "" → "0"
+        num = inteiro[e_int].str.lstrip("0")
+        res[e_int] = num.where(num.ne(""), "0")
+
+    resto = ~(vazio | e_int)
+    if resto.any():
+        res[resto] = [_canon_str(v) for v in u[resto]]
+    return res.to_numpy(dtype=object)
+
+
+class CodigoDict:
+    """
+    Dicionário de códigos: cada string de código recebe, uma única vez, um id inteiro
+    pequeno e estável (no processo). A forma canônica (`norm_code_canonical`) de cada id
+    também é calculada uma vez só e memorizada.
+
+    Os ids não são persistidos: pickles/caches guardam as strings e re-internam ao carregar.
+    Nada é removido: ids já distribuídos continuam válidos enquanto o processo viver, e o
+    tamanho fica limitado aos códigos distintos vistos (os dos bancos carregados).
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._codigos: list[str] = []
+        self._canon: list[int] = []   # id → id da forma canônica (-1 = ainda não calculado)
+        self._canon_de: dict[str, int] = {}  # atalho: string → id canônico
+
+    def __len__(self) -> int:
+        return len(self._codigos)
+
+    def id(self, codigo: str) -> int:
+        """Id da string de código, exatamente como veio (sem normalizar)."""
+        i = self._ids.get(codigo)
+        if i is None:
+            i = self._ids[codigo] = len(self._codigos)
+            self._codigos.append(codigo)
+            self._canon.append(-1)
+        return i
+
+    def ids(self, codigos: Iterable[str]) -> list[int]:
+        return [self.id(c) for c in codigos]
+
+    def codigo(self, i: int) -> str:
+        return self._codigos[i]
+
+    def codigos(self, ids: Iterable[int]) -> list[str]:
+        """`codigo` de cada id, em lote."""
+        cods = self._codigos
+        return [cods[i] for i in ids]
+
+    def canonico(self, i: int) -> int:
+        """Id da forma canônica do código `i` (normaliza só na primeira vez)."""
+        c = self._canon[i]
+        if c < 0:
+            c = self.id(norm_code_canonical(self._codigos[i]))
+            self._canon[i] = c
+        return c
+
+    def id_canonico(self, x: object) -> int:
+        """Id canônico de um valor qualquer (mesmo resultado de `norm_code_canonical(x)`)."""
+        s = x if isinstance(x, str) else str(x)
+        c = self._canon_de.get(s)
+        if c is None:
+            c = self._canon_de[s] = self.canonico(self.id(s))
+        return c
+
+    def ids_canonicos(self, codigos: Iterable[str]) -> list[int]:
+        """`id_canonico` de cada string (laço local: um dict.get por código já visto)."""
+        get, novo = self._canon_de.get, self.id_canonico
+        out = []
+        for s in codigos:
+            c = get(s)
+            out.append(novo(s) if c is None else c)
+        return out
+
+
+# Dicionário global, compartilhado por adapters e validadores. É uma tabela da vida do
+# processo, de propósito: estruturas compactas e os índices da comparação de estruturas
+# guardam ids dela, então não há "limpar" entre execuções. Cada processo (ex.: os workers de
+# `comparar_estruturas(..., workers=N)`) tem a sua, preenchida no unpickle só com os
+# códigos que recebeu, e descartada quando o processo termina.
+CODIGOS = CodigoDict()
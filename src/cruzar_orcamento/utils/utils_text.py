@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-import re
 import unicodedata
+from functools import lru_cache
+
 import pandas as pd
 
 
@@ -9,6 +10,36 @@ def strip_accents(s: str) -> str:
     return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode()
 
 
+class _TabelaTexto(dict):
+    """
+    Tabela de `str.translate` para `norm_text`, preenchida sob demanda: cada code point é
+    calculado uma vez (NFKD → só ASCII → minúsculas → fora de [a-z0-9] e espaço vira " ").
+
+    Decompor caractere a caractere dá o mesmo que decompor a string inteira: a reordenação
+    canônica do NFKD só mexe em marcas combinantes, que são descartadas (não são ASCII).
+    """
+
+    def __missing__(self, cp: int) -> str:
+        out = "".join(
+            c if ("a" <= c <= "z" or "0" <= c <= "9" or c.isspace()) else " "
+            for c in strip_accents(chr(cp)).casefold()
+        )
+        self[cp] = out
+        return out
+
+
+_TABELA_TEXTO = _TabelaTexto()
+
+# memo por string: cada descrição distinta é normalizada uma vez no processo
+_MEMO_TEXTO_MAX = 1 << 18
+
+
+@lru_cache(maxsize=_MEMO_TEXTO_MAX)
+def _norm_text_str(s: str) -> str:
+    # split()/join: colapsa qualquer sequência de espaços (\s+) e apara as pontas
+    return " ".join(s.translate(_TABELA_TEXTO).split())
+
+
 def norm_text(s: str | float | int | None) -> str:
     """
     Normaliza texto para comparações:
@@ -17,13 +48,13 @@ def norm_text(s: str | float | int | None) -> str:
     - lower/casefold
     - remove pontuação/ruído
     - colapsa múltiplos espaços
+
+    Usa uma tabela de tradução por caractere (calculada sob demanda) e memoriza o
+    resultado por string.
     """
     if not isinstance(s, str):
         s = "" if s is None or (isinstance(s, float) and pd.isna(s)) else str(s)
-    s = strip_accents(s).casefold()
-    s = re.sub(r"[^a-z0-9\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return _norm_text_str(s)
 
 
 def norm_code(s: str | float | int | None) -> str:
@@ -0,0 +1,290 @@
+# src/cruzar_orcamento/validators/custos.py
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, TypedDict
+
+import numpy as np
+
+from ..colunar import EstruturaCompacta, ItemTable, posicoes_das_faixas
+from ..models import CanonDict, EstruturaDict
+from ..utils.utils_code import CODIGOS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Recálculo do custo das composições a partir dos coeficientes dos filhos e dos preços dos
+# insumos: a estrutura vira uma matriz esparsa pai × filho (o CSR da `EstruturaCompacta`) e
+# os custos saem camada a camada, em ordem topológica (composições que só usam insumos,
+# depois as que usam essas, ...): em cada camada, um produto matriz-vetor esparso
+# (`np.bincount` com pesos coeficiente · valor do filho) resolve todos os pais de uma vez.
+# A consistência interna do ORÇAMENTO (`verificar_somas`) é a versão de um nível só: valor
+# da composição × soma das linhas filhas da própria planilha (`load_orcamento_somas`).
+
+
+class CustoComposicao(TypedDict):
+    codigo: str
+    descricao: str
+    custo_calculado: Optional[float]  # None = indeterminado (sem filhos, filho sem preço/coeficiente, ciclo)
+    preco_informado: Optional[float]
+    dif_abs: Optional[float]
+    dif_rel: Optional[float]
+    motivos: List[str]                # CUSTO_DIVERGENTE | CUSTO_INDETERMINADO | SEM_PRECO_INFORMADO
+    filhos_sem_valor: List[str]       # filhos de 1º nível sem preço, coeficiente ou custo
+
+
+class SomaComposicao(TypedDict):
+    aba: str
+    codigo: str
+    descricao: str
+    valor_informado: Optional[float]
+    soma_filhos: Optional[float]      # Σ quant. × valor unit. das linhas filhas; None = indeterminada
+    dif_abs: Optional[float]          # soma_filhos - valor_informado (com sinal)
+    dif_rel: Optional[float]
+    n_filhos: int
+    motivos: List[str]                # SOMA_DIVERGENTE | SOMA_INDETERMINADA | SEM_VALOR_INFORMADO | SEM_FILHOS
+    filhos_sem_valor: List[str]       # linhas filhas sem quantidade ou valor unitário
+
+
+def _precos_por_id(precos: CanonDict | ItemTable) -> Dict[int, float]:
+    """id canônico do código → valor (1ª ocorrência do código)."""
+    if isinstance(precos, ItemTable):
+        pares = zip(precos.codigos.tolist(), precos.valores.tolist())
+    else:
+        pares = ((it["codigo"], it["valor_unit"]) for it in precos.values())
+    out: Dict[int, float] = {}
+    for cod, val in pares:
+        out.setdefault(CODIGOS.id_canonico(cod), float(val) if val is not None else np.nan)
+    return out
+
+
+def juntar_precos(*tabelas: CanonDict | ItemTable) -> CanonDict:
+    """
+    Várias tabelas de preços num `CanonDict` por código canônico (`CODIGOS`): dentro de uma
+    tabela vale a 1ª ocorrência do código; entre tabelas, a última que tem o código.
+    """
+    out: CanonDict = {}
+    for tabela in tabelas:
+        vistos: Dict[int, object] = {}
+        for it in tabela.values():
+            vistos.setdefault(CODIGOS.id_canonico(it["codigo"]), it)
+        for i, it in vistos.items():
+            out[CODIGOS.codigo(i)] = it
+    return out
+
+
+class MatrizCustos:
+    """
+    Matriz esparsa de coeficientes pai × filho de uma estrutura, com as camadas topológicas.
+
+    - `linha`:     pai (0..P-1) de cada aresta (filho de 1º nível)
+    - `coef`:      coeficiente de cada aresta (NaN = não informado)
+    - `filho_id`:  id canônico do código do filho
+    - `filho_pai`: índice do filho como pai (composição auxiliar) ou -1 (insumo)
+    - `camadas`:   índices dos pais por camada; pais fora delas estão em ciclos
+    """
+
+    def __init__(self, E: EstruturaDict | EstruturaCompacta):
+        C = EstruturaCompacta.from_estruturas(E)
+        self.E = C
+        n_pais = len(C)
+        self.pai_id = np.fromiter(map(CODIGOS.canonico, C.pai_cod.tolist()), dtype=np.int64, count=n_pais)
+        self.linha = np.repeat(np.arange(n_pais), np.diff(C.offsets))
+        self.sem_filhos = np.diff(C.offsets) == 0
+        self.coef = (C.filho_coef if C.filho_coef is not None
+                     else np.full(C.total_filhos, np.nan))
+
+        # ids canônicos dos filhos (cada código distinto normalizado uma vez)
+        usados, inv = np.unique(C.filho_cod, return_inverse=True)
+        canon = np.fromiter(map(CODIGOS.canonico, usados.tolist()), dtype=np.int64, count=len(usados))
+        self.filho_id = canon[inv]
+        pos = {i: p for p, i in enumerate(self.pai_id.tolist())}   # pai repetido: fica o último
+        self.filho_pai = np.fromiter((pos.get(i, -1) for i in canon.tolist()), dtype=np.int64,
+                                     count=len(canon))[inv]
+
+        # camadas (Kahn vetorizado): pais cujos filhos-composição já foram todos resolvidos.
+        # Arestas-composição agrupadas pelo filho (CSR reverso): cada camada só visita as
+        # arestas que apontam para os pais que ela acabou de resolver.
+        comp = np.flatnonzero(self.filho_pai >= 0)
+        usos = comp[np.argsort(self.filho_pai[comp], kind="stable")]
+        usos_off = np.concatenate([[0], np.cumsum(np.bincount(self.filho_pai[comp], minlength=n_pais))])
+        pendentes = np.bincount(self.linha[comp], minlength=n_pais)
+        nivel = np.full(n_pais, -1)
+        self.camadas: List[np.ndarray] = []
+        atual = np.flatnonzero(pendentes == 0)
+        while len(atual):
+            nivel[atual] = len(self.camadas)
+            self.camadas.append(atual)
+            arestas = usos[posicoes_das_faixas(usos_off[atual], usos_off[atual + 1])]
+            pais, n = np.unique(self.linha[arestas], return_counts=True)
+            pendentes[pais] -= n
+            atual = pais[pendentes[pais] == 0]
+
+        # arestas de cada camada (na ordem das camadas) e posição do pai dentro da camada
+        ordem = np.argsort(nivel[self.linha], kind="stable")
+        corte = np.searchsorted(nivel[self.linha][ordem], np.arange(len(self.camadas) + 1))
+        pos = np.zeros(n_pais, dtype=np.int64)
+        self._arestas: List[tuple[np.ndarray, np.ndarray]] = []
+        for k, camada in enumerate(self.camadas):
+            pos[camada] = np.arange(len(camada))
+            es = ordem[corte[k]:corte[k + 1]]
+            self._arestas.append((es, pos[self.linha[es]]))
+
+        self.em_ciclo = np.flatnonzero(nivel < 0)
+        if len(self.em_ciclo):
+            logger.warning(f"Custos: {len(self.em_ciclo)} composição(ões) em ciclo (ou dependentes de um) ficam sem custo.")
+
+    def __len__(self) -> int:
+        return len(self.pai_id)
+
+    def custos(self, precos: CanonDict | ItemTable) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (custo de cada pai, valor de cada aresta = coeficiente · preço/custo do filho).
+        NaN = indeterminado. Insumos (filhos que não são pais) são precificados por `precos`.
+        """
+        por_id = _precos_por_id(precos)
+        insumo = self.filho_pai < 0
+        valor_filho = np.full(len(self.linha), np.nan)
+        ids = self.filho_id[insumo]
+        usados, inv = np.unique(ids, return_inverse=True)
+        valor_filho[insumo] = np.fromiter((por_id.get(i, np.nan) for i in usados.tolist()),
+                                          dtype=np.float64, count=len(usados))[inv]
+
+        custo = np.full(len(self), np.nan)
+        for camada, (es, local) in zip(self.camadas, self._arestas):
+            sub = es[~insumo[es]]
+            valor_filho[sub] = custo[self.filho_pai[sub]]
+            # produto matriz-vetor esparso só nas linhas da camada; NaN propaga (soma com NaN)
+            custo[camada] = np.bincount(local, weights=self.coef[es] * valor_filho[es], minlength=len(camada))
+            # pai sem filhos: bincount dá 0; fica indeterminado antes que as camadas seguintes o leiam
+            custo[camada[self.sem_filhos[camada]]] = np.nan
+        return custo, self.coef * valor_filho
+
+
+def calcular_custos(E: EstruturaDict | EstruturaCompacta, precos: CanonDict | ItemTable) -> Dict[str, Optional[float]]:
+    """Custo recalculado de cada pai de E (chave original → custo; None = indeterminado)."""
+    M = MatrizCustos(E)
+    custo, _ = M.custos(precos)
+    return {k: (None if c != c else c) for k, c in zip(M.E.pais.tolist(), custo.tolist())}
+
+
+def comparar_custos(
+    E: EstruturaDict | EstruturaCompacta,
+    precos_insumos: CanonDict | ItemTable,
+    precos_informados: Optional[CanonDict | ItemTable] = None,
+    *,
+    tol_rel: float = 0.0,
+    tol_abs: float = 0.0,
+) -> List[CustoComposicao]:
+    """
+    Recalcula o custo de cada composição (Σ coeficiente · preço do filho, com composições
+    auxiliares resolvidas pela própria estrutura) e compara com o preço informado.
+
+    - `precos_insumos`: preços dos filhos que não são pais em E.
+    - `precos_informados`: preço declarado de cada composição (padrão: `precos_insumos`).
+    - Divergência de custo: |calculado - informado| > tol_abs (ex.: 0.01 para arredondamento
+      em centavos) e |calculado - informado| / informado > tol_rel (informado zero: só o
+      critério absoluto). Só composições com algum motivo são devolvidas.
+    """
+    M = MatrizCustos(E)
+    custo, valor_aresta = M.custos(precos_insumos)
+    informado = _precos_por_id(precos_insumos if precos_informados is None else precos_informados)
+
+    C = M.E
+    sem_valor = np.isnan(valor_aresta)
+    offsets = C.offsets.tolist()
+    out: List[CustoComposicao] = []
+    for p, (chave, calc, pid) in enumerate(zip(C.pais.tolist(), custo.tolist(), M.pai_id.tolist())):
+        inf = informado.get(pid)
+        motivos: List[str] = []
+        dif_abs = dif_rel = None
+        if calc != calc:
+            motivos.append("CUSTO_INDETERMINADO")
+        elif inf is None or inf != inf:
+            motivos.append("SEM_PRECO_INFORMADO")
+        else:
+            dif_abs = abs(calc - inf)
+            if inf != 0:
+                dif_rel = dif_abs / abs(inf)
+            if dif_abs > tol_abs and (dif_rel is None or dif_rel > tol_rel):
+                motivos.append("CUSTO_DIVERGENTE")
+        if not motivos:
+            continue
+
+        a, b = offsets[p], offsets[p + 1]
+        faltando = np.flatnonzero(sem_valor[a:b]) + a
+        out.append(CustoComposicao(
+            codigo=chave,
+            descricao=C.textos[C.pai_desc[p]],
+            custo_calculado=None if calc != calc else calc,
+            preco_informado=None if inf is None or inf != inf else inf,
+            dif_abs=dif_abs,
+            dif_rel=dif_rel,
+            motivos=motivos,
+            filhos_sem_valor=CODIGOS.codigos(C.filho_cod[faltando].tolist()),
+        ))
+    return out
+
+
+def verificar_somas(
+    somas: "pd.DataFrame",
+    *,
+    tol_rel: float = 0.0,
+    tol_abs: float = 0.0,
+    tol_por_filho: float = 0.0,
+    sem_filhos: bool = False,
+) -> List[SomaComposicao]:
+    """
+    Composições do ORÇAMENTO cujo valor unitário difere da soma das linhas filhas
+    (saída de `load_orcamento_somas`), comparando todas de uma vez.
+
+    Divergência: |soma - valor| > tol_abs + tol_por_filho · nº de filhos (a planilha costuma
+    arredondar/truncar o total de cada linha em centavos: tol_por_filho=0.01) e
+    |soma - valor| / |valor| > tol_rel (valor zero: só o critério absoluto).
+    SOMA_INDETERMINADA = alguma linha filha sem quantidade/valor. Composições sem nenhuma linha
+    filha não têm o que somar: só entram com `sem_filhos=True`, como SEM_FILHOS.
+    Só composições com algum motivo são devolvidas, na ordem da planilha.
+    """
+    valor = somas["VALOR_ORC"].to_numpy(dtype=float)
+    soma = somas["SOMA_FILHOS"].to_numpy(dtype=float)
+    n_filhos = somas["N_FILHOS"].to_numpy()
+
+    dif = soma - valor
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.where(valor != 0, np.abs(dif) / np.abs(valor), np.nan)
+    vazia = n_filhos == 0
+    indeterminada = np.isnan(soma) & ~vazia
+    sem_valor = ~indeterminada & ~vazia & np.isnan(valor)
+    divergente = (np.abs(dif) > tol_abs + tol_por_filho * n_filhos) & ~(rel <= tol_rel)
+    divergente &= ~indeterminada & ~sem_valor & ~vazia
+    reportar = indeterminada | sem_valor | divergente
+    if sem_filhos:
+        reportar |= vazia
+
+    def _f(x: float) -> Optional[float]:
+        return None if x != x else x
+
+    out: List[SomaComposicao] = []
+    for i in np.flatnonzero(reportar).tolist():
+        motivos = (["SEM_FILHOS"] if vazia[i] else
+                   ["SOMA_INDETERMINADA"] if indeterminada[i] else
+                   ["SEM_VALOR_INFORMADO"] if sem_valor[i] else ["SOMA_DIVERGENTE"])
+        out.append(SomaComposicao(
+            aba=str(somas["ABA"].iat[i]),
+            codigo=somas["CODIGO_ORC"].iat[i],
+            descricao=somas["DESCRICAO_ORC"].iat[i],
+            valor_informado=_f(float(valor[i])),
+            soma_filhos=_f(float(soma[i])),
+            dif_abs=_f(float(dif[i])),
+            dif_rel=_f(float(rel[i])),
+            n_filhos=int(n_filhos[i]),
+            motivos=motivos,
+            filhos_sem_valor=list(somas["FILHOS_SEM_VALOR"].iat[i]),
+        ))
+    return out
+
+
+__all__ = ["CustoComposicao", "MatrizCustos", "SomaComposicao", "calcular_custos", "comparar_custos",
+           "juntar_precos", "verificar_somas"]
@@ -1,10 +1,21 @@
 # src/cruzar_orcamento/validators/estrutura_compare.py
 from __future__ import annotations
 
-from typing import Dict, List, TypedDict, Optional
+import hashlib
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypedDict
+
+
+from ..colunar import EstruturaCompacta
 from ..models import EstruturaDict, CompEstrutura
 from ..utils.utils_text import norm_text
-from ..utils.utils_code import norm_code_canonical  # remove '.0' e zeros à esquerda
+from ..utils.utils_code import CODIGOS  # ids de códigos canônicos ('.0' e zeros à esquerda removidos)
+from ..utils.utils_cache import cache_dir, cache_enabled, gravar_pickle, ler_pickle
+
+logger = logging.getLogger(__name__)
 
 
 class ChildDiffDesc(TypedDict):
@@ -22,74 +33,363 @@ class DivergenciaEstrutura(TypedDict):
     filhos_desc_mismatch: List[ChildDiffDesc] # mesmo código, descrições diferentes
 
 
-def _index_children(comp: CompEstrutura) -> Dict[str, str]:
+def _index_children(comp: CompEstrutura) -> Dict[int, str]:
     """
-    Indexa filhos por código normalizado -> descrição (1º nível).
+    Indexa filhos por id do código canônico -> descrição (1º nível).
     """
-    out: Dict[str, str] = {}
-    for ch in comp.get("filhos", []):
-        raw_code = str(ch.get("codigo", "")).strip()
-        code = norm_code_canonical(raw_code)
-        out[code] = str(ch.get("descricao", "")).strip()
-    return out
+    filhos = comp.get("filhos", [])
+    ids = CODIGOS.ids_canonicos([str(ch.get("codigo", "")).strip() for ch in filhos])
+    return dict(zip(ids, [str(ch.get("descricao", "")).strip() for ch in filhos]))
+
+
+class LadoEstrutura:
+    """
+    Acesso uniforme a um lado da comparação (`EstruturaDict` ou `EstruturaCompacta`),
+    com pais e filhos já como ids canônicos do dicionário global `CODIGOS`.
+
+    Cada pai é visitado por um handle opaco (o dict da composição ou a linha na forma
+    compacta), obtido em `pais()` e repassado a `descricao`/`filhos`/`filhos_com_codigo`.
+    Usado também pela revisão (`revisao.py`) e pela explosão de auxiliares (`explosao.py`).
+    """
+
+    def __init__(self, E: EstruturaDict | EstruturaCompacta):
+        self.E = E
+        self.compacta = isinstance(E, EstruturaCompacta)
+
+    def pais(self) -> Iterator[Tuple[int, object]]:
+        """(id canônico do pai, handle) na ordem de E."""
+        if self.compacta:
+            canon = CODIGOS.canonico
+            return ((canon(c), i) for i, c in enumerate(self.E.pai_cod.tolist()))
+        return ((CODIGOS.id_canonico(k), comp) for k, comp in self.E.items())
+
+    def descricao(self, h) -> Optional[str]:
+        if self.compacta:
+            return self.E.textos[self.E.pai_desc[h]]
+        return h.get("descricao")
+
+    def filhos(self, h) -> Dict[int, str]:
+        if not self.compacta:
+            return _index_children(h)
+        E = self.E
+        a, b = int(E.offsets[h]), int(E.offsets[h + 1])
+        canon, txts = CODIGOS.canonico, E.textos
+        return {
+            canon(c): txts[t].strip()
+            for c, t in zip(E.filho_cod[a:b].tolist(), E.filho_desc[a:b].tolist())
+        }
+
+    def filhos_com_codigo(self, h) -> Dict[int, Tuple[str, str]]:
+        """id canônico → (código original, descrição) de cada filho; repetidos: fica o primeiro."""
+        if self.compacta:
+            E = self.E
+            a, b = int(E.offsets[h]), int(E.offsets[h + 1])
+            ids = E.filho_cod[a:b].tolist()
+            cods = CODIGOS.codigos(ids)
+            canon = [CODIGOS.canonico(c) for c in ids]
+            descs = [E.textos[t].strip() for t in E.filho_desc[a:b].tolist()]
+        else:
+            filhos = h.get("filhos", [])
+            cods = [str(ch.get("codigo", "")).strip() for ch in filhos]
+            canon = CODIGOS.ids_canonicos(cods)
+            descs = [str(ch.get("descricao", "")).strip() for ch in filhos]
+        out: Dict[int, Tuple[str, str]] = {}
+        for i, c, d in zip(canon, cods, descs):
+            out.setdefault(i, (c, d))
+        return out
+
+    def filhos_norm(self, h) -> Optional[Dict[int, str]]:
+        """Descrições já normalizadas dos filhos (só na forma compacta; senão None)."""
+        if not self.compacta:
+            return None
+        E = self.E
+        a, b = int(E.offsets[h]), int(E.offsets[h + 1])
+        canon, norms = CODIGOS.canonico, E.textos_norm
+        return {
+            canon(c): norms[t]
+            for c, t in zip(E.filho_cod[a:b].tolist(), E.filho_desc[a:b].tolist())
+        }
+
+
+def codigos_ordenados(ids) -> List[str]:
+    """ids canônicos → códigos, em ordem de string (a ordem das listas de filhos na saída)."""
+    return sorted(CODIGOS.codigo(i) for i in ids)
 
 
-def comparar_estruturas(A: EstruturaDict, B: EstruturaDict) -> List[DivergenciaEstrutura]:
+def comparar_pai(lado_a: LadoEstrutura, lado_b: LadoEstrutura, pai_id: int, h_a, h_b) -> Optional[DivergenciaEstrutura]:
+    """
+    Divergência de um pai de A contra o mesmo pai em B (`h_b` None = ausente em B); None se igual.
+    `h_a`/`h_b` são handles de `LadoEstrutura.pais()`. É a regra de `comparar_estruturas`, pai a pai.
+    """
+    pai_cod = CODIGOS.codigo(pai_id)
+
+    if h_b is None:
+        # Pai inexistente em B
+        return DivergenciaEstrutura(
+            pai_codigo=pai_cod,
+            pai_desc_a=lado_a.descricao(h_a),
+            pai_desc_b=None,
+            filhos_missing=codigos_ordenados(lado_a.filhos(h_a).keys()),
+            filhos_extra=[],
+            filhos_desc_mismatch=[],
+        )
+
+    idx_a = lado_a.filhos(h_a)
+    idx_b = lado_b.filhos(h_b)
+
+    set_a = idx_a.keys()
+    set_b = idx_b.keys()
+
+    filhos_missing = codigos_ordenados(set_a - set_b)  # A tem, B não
+    filhos_extra   = codigos_ordenados(set_b - set_a)  # B tem, A não
+
+    # descrições normalizadas: pool da forma compacta ou `norm_text` (memorizado por string)
+    filhos_desc_mismatch: List[ChildDiffDesc] = []
+    norm_a = lado_a.filhos_norm(h_a)
+    norm_b = lado_b.filhos_norm(h_b)
+    comuns = sorted((CODIGOS.codigo(i), i) for i in set_a & set_b)
+    for code, i in comuns:
+        da = idx_a[i]
+        db = idx_b[i]
+        na = norm_a[i] if norm_a is not None else norm_text(da)
+        nb = norm_b[i] if norm_b is not None else norm_text(db)
+        if na != nb:
+            filhos_desc_mismatch.append(ChildDiffDesc(codigo=code, a_desc=da, b_desc=db))
+
+    if filhos_missing or filhos_extra or filhos_desc_mismatch:
+        return DivergenciaEstrutura(
+            pai_codigo=pai_cod,
+            pai_desc_a=lado_a.descricao(h_a),
+            pai_desc_b=lado_b.descricao(h_b),
+            filhos_missing=filhos_missing,
+            filhos_extra=filhos_extra,
+            filhos_desc_mismatch=filhos_desc_mismatch,
+        )
+    return None
+
+
+def comparar_estruturas(
+    A: EstruturaDict | EstruturaCompacta,
+    B: EstruturaDict | EstruturaCompacta,
+    cache: Optional[CacheComparacoes] = None,
+    workers: int = 1,
+) -> List[DivergenciaEstrutura]:
     """
     Compara A (ex.: ORÇAMENTO filtrado por banco SINAPI) com B (ex.: SINAPI Analítico):
     - Para cada pai de A, procura o mesmo pai em B (normalizando chaves).
     - Compara conjuntos de filhos (normalizados).
     - Para interseção, compara descrições com normalização textual.
+
+    Os códigos viram ids inteiros do dicionário global (`CODIGOS`): cada string distinta é
+    normalizada uma única vez no processo e as operações de conjunto são feitas sobre ints.
+
+    Com `cache` (`CacheComparacoes`), só são comparados os pares (pai de A, pai de B) cujo
+    conteúdo (`hash_composicoes`) ainda não foi visto; os demais reaproveitam o resultado
+    gravado (revisões sucessivas do mesmo orçamento contra a mesma base).
+
+    `workers` > 1: os pais de A a comparar são divididos em fatias e comparados em processos
+    separados (`_comparar_paralelo`); mesma saída, na mesma ordem, da versão serial.
     """
-    diverg: List[DivergenciaEstrutura] = []
+    if cache is None:
+        return [d for d in _comparar_posicoes(A, B, None, workers) if d is not None]
+
+    lado_a, lado_b = LadoEstrutura(A), LadoEstrutura(B)
+    # chaves originais de cada pai (o hash é do conteúdo bruto); pai repetido em B: fica o último
+    chaves_b = {pai_id: k for (pai_id, _), k in zip(lado_b.pais(), B)}
+    ids_a = [i for i, _ in lado_a.pais()]
+    hash_a = hash_composicoes(A)
+    hash_b = hash_composicoes(B, {chaves_b[i] for i in ids_a if i in chaves_b})
+    chaves = [
+        (hash_a[k], hash_b[chaves_b[pai_id]] if pai_id in chaves_b else 0)
+        for pai_id, k in zip(ids_a, A)
+    ]
+
+    resultados: List[Optional[DivergenciaEstrutura]] = []
+    faltam: List[int] = []
+    for p, chave in enumerate(chaves):
+        achou, d = cache.get(chave)
+        resultados.append(_copia(d) if achou else None)
+        if not achou:
+            faltam.append(p)
+    for p, d in zip(faltam, _comparar_posicoes(A, B, faltam, workers)):
+        cache.put(chaves[p], d)
+        resultados[p] = d
+    cache.salvar()
+    return [d for d in resultados if d is not None]
+
+
+def _comparar_posicoes(
+    A: EstruturaDict | EstruturaCompacta,
+    B: EstruturaDict | EstruturaCompacta,
+    posicoes: Optional[Sequence[int]],
+    workers: int = 1,
+) -> List[Optional[DivergenciaEstrutura]]:
+    """Divergência (None = igual) de cada pai de A nas `posicoes` (None = todos), na mesma ordem."""
+    n = len(A) if posicoes is None else len(posicoes)
+    if workers > 1 and n >= MIN_PAIS_PARALELO:
+        return _comparar_paralelo(A, B, list(range(n)) if posicoes is None else list(posicoes), workers)
 
+    lado_a, lado_b = LadoEstrutura(A), LadoEstrutura(B)
     # normaliza as chaves de B (pais) para prevenir diferenças de formato
-    B_norm: EstruturaDict = {norm_code_canonical(k): v for k, v in B.items()}
-
-    for pai_cod_raw, comp_a in A.items():
-        pai_cod = norm_code_canonical(pai_cod_raw)
-        comp_b = B_norm.get(pai_cod)
-
-        filhos_missing: List[str] = []
-        filhos_extra: List[str] = []
-        filhos_desc_mismatch: List[ChildDiffDesc] = []
-
-        if comp_b is None:
-            # Pai inexistente em B
-            filhos_missing = sorted(_index_children(comp_a).keys())
-            diverg.append(DivergenciaEstrutura(
-                pai_codigo=pai_cod,
-                pai_desc_a=comp_a.get("descricao"),
-                pai_desc_b=None,
-                filhos_missing=filhos_missing,
-                filhos_extra=[],
-                filhos_desc_mismatch=[],
-            ))
-            continue
-
-        idx_a = _index_children(comp_a)
-        idx_b = _index_children(comp_b)
-
-        set_a = set(idx_a.keys())
-        set_b = set(idx_b.keys())
-
-        filhos_missing = sorted(set_a - set_b)  # A tem, B não
-        filhos_extra   = sorted(set_b - set_a)  # B tem, A não
-
-        for code in sorted(set_a & set_b):
-            da = idx_a[code]
-            db = idx_b[code]
-            if norm_text(da) != norm_text(db):
-                filhos_desc_mismatch.append(ChildDiffDesc(codigo=code, a_desc=da, b_desc=db))
-
-        if filhos_missing or filhos_extra or filhos_desc_mismatch:
-            diverg.append(DivergenciaEstrutura(
-                pai_codigo=pai_cod,
-                pai_desc_a=comp_a.get("descricao"),
-                pai_desc_b=comp_b.get("descricao"),
-                filhos_missing=filhos_missing,
-                filhos_extra=filhos_extra,
-                filhos_desc_mismatch=filhos_desc_mismatch,
-            ))
-
-    return diverg
+    B_norm = dict(lado_b.pais())
+    pais = lado_a.pais()
+    if posicoes is not None:
+        todos = list(pais)
+        pais = (todos[p] for p in posicoes)
+    return [comparar_pai(lado_a, lado_b, pai_id, h_a, B_norm.get(pai_id)) for pai_id, h_a in pais]
+
+
+# ---------- comparação em paralelo (processos) ----------
+#
+# Cada fatia (pais contíguos de A) vai para um processo junto só com os pais de B que ela
+# usa, sempre na forma compacta (CSR: serializar milhares de dicts pequenos custa mais que a
+# própria comparação); volta só o que diverge, com a posição na fatia. As fatias voltam na
+# ordem em que foram criadas (`Executor.map`), então a saída é a mesma da versão serial.
+# Com poucos pais, criar os processos não compensa: abaixo de MIN_PAIS_PARALELO fica serial.
+# Cada worker re-interna no seu `CODIGOS` só os códigos das fatias que recebe; o pool é
+# criado por chamada, então essas tabelas morrem com ele.
+
+MIN_PAIS_PARALELO = 5_000
+_FATIAS_POR_WORKER = 4   # fatias menores que A/workers equilibram pais de custo desigual
+
+
+def _fatia(E: EstruturaDict | EstruturaCompacta, posicoes: List[int]) -> EstruturaCompacta:
+    """Pais de E nas `posicoes` (na ordem dada), na forma compacta."""
+    if isinstance(E, EstruturaCompacta):
+        return E.selecionar(posicoes)
+    chaves = list(E)
+    return EstruturaCompacta.from_estruturas({chaves[p]: E[chaves[p]] for p in posicoes})
+
+
+def _comparar_fatia(A: EstruturaCompacta, B: EstruturaCompacta) -> List[Tuple[int, DivergenciaEstrutura]]:
+    """(posição na fatia, divergência) dos pais de A que divergem."""
+    return [(k, d) for k, d in enumerate(_comparar_posicoes(A, B, None)) if d is not None]
+
+
+def _comparar_paralelo(
+    A: EstruturaDict | EstruturaCompacta,
+    B: EstruturaDict | EstruturaCompacta,
+    posicoes: List[int],
+    workers: int,
+) -> List[Optional[DivergenciaEstrutura]]:
+    ids_a = [i for i, _ in LadoEstrutura(A).pais()]
+    # posição em B do pai que cada id canônico usa (repetido: o último, como na versão serial)
+    pos_b = {i: p for p, (i, _) in enumerate(LadoEstrutura(B).pais())}
+
+    n_fatias = min(len(posicoes), workers * _FATIAS_POR_WORKER)
+    cortes = [len(posicoes) * k // n_fatias for k in range(n_fatias + 1)]
+    fatias = [posicoes[a:b] for a, b in zip(cortes, cortes[1:])]
+    fatias_a = [_fatia(A, f) for f in fatias]
+    fatias_b = [_fatia(B, sorted({pos_b[ids_a[p]] for p in f if ids_a[p] in pos_b})) for f in fatias]
+    logger.info(f"Comparação de estruturas: {len(posicoes)} pai(s) em {n_fatias} fatia(s), {workers} processo(s).")
+
+    out: List[Optional[DivergenciaEstrutura]] = [None] * len(posicoes)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for inicio, parte in zip(cortes, ex.map(_comparar_fatia, fatias_a, fatias_b)):
+            for k, d in parte:
+                out[inicio + k] = d
+    return out
+
+
+# ---------- hash de conteúdo por composição ----------
+
+def _conteudo(lado: LadoEstrutura, h) -> str:
+    """
+    Serialização do que `comparar_pai` lê de um pai: chave, descrição e filhos (código e
+    descrição como texto, na ordem). Mesmo texto para `EstruturaDict` e `EstruturaCompacta`.
+    """
+    E = lado.E
+    if lado.compacta:
+        a, b = int(E.offsets[h]), int(E.offsets[h + 1])
+        txts = E.textos
+        pai, desc = E.pais[h], txts[E.pai_desc[h]]
+        filhos = [
+            f"{c}\x01{txts[t]}"
+            for c, t in zip(CODIGOS.codigos(E.filho_cod[a:b].tolist()), E.filho_desc[a:b].tolist())
+        ]
+    else:
+        pai, comp = h
+        desc = comp.get("descricao")
+        filhos = [f"{ch.get('codigo', '')}\x01{ch.get('descricao', '')}" for ch in comp.get("filhos", [])]
+    return f"{pai!r}\x02{desc!r}\x02" + "\x00".join(filhos)
+
+
+def hash_composicoes(E: EstruturaDict | EstruturaCompacta, pais: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Hash de conteúdo (64 bits, estável entre processos) de cada composição: chave do pai → hash.
+
+    Cobre tudo o que a comparação lê do pai (código, descrição, filhos com código e
+    descrição, na ordem): mesmo hash ⇒ mesmo resultado contra o mesmo pai da base.
+    `pais`: só essas chaves (as ausentes em E são ignoradas).
+    """
+    lado = LadoEstrutura(E)
+    if lado.compacta:
+        idx = E.indice
+        alvo = idx.items() if pais is None else ((k, idx[k]) for k in pais if k in idx)
+        itens = [(k, _conteudo(lado, i)) for k, i in alvo]
+    else:
+        alvo = E.items() if pais is None else ((k, E[k]) for k in pais if k in E)
+        itens = [(k, _conteudo(lado, (k, comp))) for k, comp in alvo]
+    return {
+        k: int.from_bytes(hashlib.blake2b(t.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+        for k, t in itens
+    }
+
+
+def _copia(d: Optional[DivergenciaEstrutura]) -> Optional[DivergenciaEstrutura]:
+    """Cópia de um registro do cache (listas e dicts de 1º nível; textos são imutáveis)."""
+    if d is None:
+        return None
+    return DivergenciaEstrutura(
+        d,
+        filhos_missing=list(d["filhos_missing"]),
+        filhos_extra=list(d["filhos_extra"]),
+        filhos_desc_mismatch=[ChildDiffDesc(x) for x in d["filhos_desc_mismatch"]],
+    )
+
+
+class CacheComparacoes:
+    """
+    Resultados de `comparar_estruturas` por par (hash do pai em A, hash do pai em B; 0 = ausente
+    em B), persistidos na pasta do cache (`utils_cache`). O valor é a divergência do par, ou
+    None quando não há divergência. Com o cache desligado, vale só durante o processo.
+
+    `max_itens`: acima disso, os pares menos usados recentemente são descartados ao salvar.
+    """
+
+    VERSAO = 1  # sobe quando a regra de comparação mudar
+
+    def __init__(self, path: Optional[Path] = None, max_itens: int = 500_000):
+        self.persistente = path is not None or cache_enabled()
+        self.path = path or cache_dir() / f"comparar_estruturas-v{self.VERSAO}.pkl"
+        self.max_itens = max_itens
+        self.itens: Dict[Tuple[int, int], Optional[DivergenciaEstrutura]] = {}
+        if self.persistente:
+            ok, itens = ler_pickle(self.path)
+            if ok and isinstance(itens, dict):
+                self.itens = itens
+        self.acertos = self.novos = 0
+
+    def get(self, chave: Tuple[int, int]) -> Tuple[bool, Optional[DivergenciaEstrutura]]:
+        try:
+            d = self.itens.pop(chave)
+        except KeyError:
+            return False, None
+        self.itens[chave] = d  # reinsere no fim: ordem = uso mais recente
+        self.acertos += 1
+        return True, d
+
+    def put(self, chave: Tuple[int, int], d: Optional[DivergenciaEstrutura]) -> None:
+        self.itens[chave] = _copia(d)
+        self.novos += 1
+
+    def salvar(self) -> None:
+        logger.info(f"[cache] comparar_estruturas: {self.acertos} pai(s) reaproveitado(s), {self.novos} comparado(s).")
+        if not self.persistente or not self.novos:
+            return
+        excesso = len(self.itens) - self.max_itens
+        if excesso > 0:
+            for chave in list(itertools.islice(self.itens, excesso)):
+                del self.itens[chave]
+        gravar_pickle(self.path, self.itens)
+        self.novos = 0
@@ -0,0 +1,83 @@
+# src/cruzar_orcamento/validators/explosao.py
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Tuple
+
+from ..colunar import EstruturaCompacta
+from ..models import ChildSpec, CompEstrutura, EstruturaDict
+from .estrutura_compare import LadoEstrutura
+
+logger = logging.getLogger(__name__)
+
+# Explosão das composições em insumos finais: um filho que também é pai (composição auxiliar)
+# é trocado pelos insumos dele, recursivamente. Os pais são resolvidos em ordem topológica
+# (DFS iterativo, filhos antes dos pais) e a expansão de cada composição é guardada e reusada
+# por todas as que a contêm. Ciclos são reportados e a aresta que fecha o ciclo é ignorada.
+
+
+def explodir_estruturas(
+    E: EstruturaDict | EstruturaCompacta,
+) -> Tuple[EstruturaDict, List[List[str]]]:
+    """
+    Cada pai de E com os seus insumos finais (filhos que não são pais em E) no lugar dos
+    filhos de 1º nível. Códigos casam pela forma canônica (`utils_code.CODIGOS`); cada insumo aparece
+    uma vez por pai, com código e descrição da primeira ocorrência (ordem dos filhos).
+
+    Retorna (estrutura explodida, ciclos); cada ciclo é a lista de códigos [p1, p2, …, p1].
+    """
+    lado = LadoEstrutura(E)
+    handles = dict(lado.pais())
+    chaves = {i: k for (i, _), k in zip(lado.pais(), E)}
+    filhos = {i: lado.filhos_com_codigo(h) for i, h in handles.items()}
+
+    folhas: Dict[int, Dict[int, Tuple[str, str]]] = {}   # memo: pai → {insumo: (código, descrição)}
+    ciclos: List[List[str]] = []
+    estado: Dict[int, int] = {}              # 1 = na pilha, 2 = resolvido
+
+    for raiz in handles:
+        if raiz in folhas:
+            continue
+        pilha = [(raiz, iter(filhos[raiz]))]
+        estado[raiz] = 1
+        while pilha:
+            pai, it = pilha[-1]
+            for c in it:
+                if c in filhos and c not in folhas:
+                    if estado.get(c) == 1:
+                        caminho = [p for p, _ in pilha]
+                        ciclos.append([chaves[p] for p in caminho[caminho.index(c):]] + [chaves[c]])
+                        continue
+                    estado[c] = 1
+                    pilha.append((c, iter(filhos[c])))
+                    break
+            else:
+                # todos os filhos resolvidos: junta os insumos na ordem dos filhos
+                acc: Dict[int, Tuple[str, str]] = {}
+                for c, spec in filhos[pai].items():
+                    if c not in filhos:
+                        acc.setdefault(c, spec)
+                    elif c in folhas:
+                        for f, fs in folhas[c].items():
+                            acc.setdefault(f, fs)
+                folhas[pai] = acc
+                estado[pai] = 2
+                pilha.pop()
+
+    if ciclos:
+        logger.warning(f"Explosão: {len(ciclos)} ciclo(s) entre composições: "
+                       + "; ".join(" → ".join(c) for c in ciclos[:5]))
+
+    out: EstruturaDict = {}
+    for k, (i, h) in zip(E, lado.pais()):
+        comp = E[k] if lado.compacta else h
+        out[k] = CompEstrutura(
+            codigo=comp["codigo"],
+            descricao=comp["descricao"],
+            filhos=[ChildSpec(codigo=c, descricao=d) for c, d in folhas[i].values()],
+            fonte=comp["fonte"],
+        )
+    return out, ciclos
+
+
+__all__ = ["explodir_estruturas"]
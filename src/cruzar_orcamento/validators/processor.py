@@ -1,8 +1,15 @@
 # src/cruzar_orcamento/processor.py
 from __future__ import annotations
 
-from typing import TypedDict, List, Tuple, Dict, Optional
+import gc
+from contextlib import contextmanager
+from functools import cached_property
+from typing import TypedDict, List, Tuple, Dict, Mapping, Optional
+
+import numpy as np
+
 from ..models import Item, CanonDict
+from ..colunar import ItemTable, como_objetos
 from ..utils.utils_text import norm_text
 
 
@@ -16,6 +23,11 @@ class CruzadoRow(TypedDict):
     match: bool
 
 
+class CruzadoDifRow(CruzadoRow):
+    dif_abs: Optional[float]
+    dif_rel: Optional[float]
+
+
 class DivergenciaRow(TypedDict):
     codigo: str
     motivos: List[str]
@@ -24,12 +36,14 @@ class DivergenciaRow(TypedDict):
     dir: str  # "MAIOR" | "MENOR" | "IGUAL" | ""
 
 
-def filtrar_orcamento_por_banco(orc: CanonDict, banco: Optional[str]) -> CanonDict:
+def filtrar_orcamento_por_banco(orc: CanonDict | ItemTable, banco: Optional[str]) -> CanonDict | ItemTable:
     """Retorna apenas itens do orçamento cujo item['banco'] == banco (case-insensitive).
-    Se banco=None, retorna o dict original.
+    Se banco=None, retorna o dict original. Uma `ItemTable` é filtrada pelas categorias de banco.
     """
     if not banco:
         return orc
+    if isinstance(orc, ItemTable):
+        return orc.filtrar(orc.mask_banco(banco))
     alvo = banco.casefold().strip()
     return {
         cod: it
@@ -38,6 +52,61 @@ def filtrar_orcamento_por_banco(orc: CanonDict, banco: Optional[str]) -> CanonDi
     }
 
 
+def _colunas_orcamento(A: CanonDict | ItemTable) -> tuple[list, list, list, list]:
+    """(código, banco, descrição, valor) de cada item de A, em listas paralelas."""
+    if isinstance(A, ItemTable):
+        n = len(A)
+        bancos = A.bancos.astype(object).tolist() if A.bancos is not None else [None] * n
+        # categoria ausente vira NaN no astype; no CanonDict seria chave ausente (None)
+        bancos = [b if isinstance(b, str) else None for b in bancos]
+        return A.codigos.tolist(), bancos, A.descricoes.tolist(), A.valores.tolist()
+    itens = list(A.values())
+    return (
+        [a["codigo"] for a in itens],
+        [a.get("banco") for a in itens],
+        [a["descricao"] for a in itens],
+        [a["valor_unit"] for a in itens],
+    )
+
+
+def _buscar_referencia(
+    referencia: CanonDict | ItemTable,
+    codigos: list,
+    normalizar: bool,
+) -> tuple[list, list, list, list]:
+    """
+    Para cada código: (achou, descrição, valor, descrição normalizada) na referência.
+    A normalização só é feita se `normalizar` (senão, lista de None).
+    """
+    if isinstance(referencia, ItemTable):
+        pos = referencia.linhas(codigos).tolist()
+        achou = [p >= 0 for p in pos]
+        descs = referencia.descricoes.tolist()
+        vals = referencia.valores.tolist()
+        norms = referencia.descricoes_norm.tolist() if normalizar else None
+        return (
+            achou,
+            [descs[p] if ok else None for p, ok in zip(pos, achou)],
+            [vals[p] if ok else None for p, ok in zip(pos, achou)],
+            [norms[p] if ok else None for p, ok in zip(pos, achou)] if norms else [None] * len(pos),
+        )
+    bs = [referencia.get(c) for c in codigos]
+    return (
+        [b is not None for b in bs],
+        [b["descricao"] if b else None for b in bs],
+        [b["valor_unit"] if b else None for b in bs],
+        [norm_text(b["descricao"]) if (b and normalizar) else None for b in bs],
+    )
+
+
+def _descricoes_norm(A: CanonDict | ItemTable, descs: list, normalizar: bool) -> list:
+    if not normalizar:
+        return [None] * len(descs)
+    if isinstance(A, ItemTable):
+        return A.descricoes_norm.tolist()
+    return [norm_text(d) for d in descs]
+
+
 def _dir(a_val: Optional[float], b_val: Optional[float]) -> str:
     """Direção da divergência (referência = banco externo)."""
     if a_val is None or b_val is None:
@@ -50,8 +119,8 @@ def _dir(a_val: Optional[float], b_val: Optional[float]) -> str:
 
 
 def cruzar(
-    orcamento: CanonDict,
-    referencia: CanonDict,
+    orcamento: CanonDict | ItemTable,
+    referencia: CanonDict | ItemTable,
     *,
     banco: Optional[str] = None,
     tol_rel: float = 0.02,              # 2% por padrão
@@ -62,24 +131,24 @@ def cruzar(
     - Se `banco` for informado, o orçamento é filtrado antes do match.
     - Divergência de valor: |A-B|/B > tol_rel (quando B > 0).
     - Divergência de descrição: comparação normalizada (casefold+sem acento); pode desligar com `comparar_descricao=False`.
+    - Aceita `CanonDict` ou `ItemTable` (colunar) em qualquer dos lados; a busca na
+      referência é feita de uma vez para todos os códigos.
     """
     A = filtrar_orcamento_por_banco(orcamento, banco)
     cruzado: List[CruzadoRow] = []
     diverg: List[DivergenciaRow] = []
 
-    for codigo, a in A.items():
-        codigo_base = a["codigo"]
-        b = referencia.get(codigo_base)
-        match = b is not None
-
-        b_desc = b["descricao"] if b else None
-        b_val  = b["valor_unit"] if b else None
-        a_val  = a["valor_unit"]
+    codigos, a_bancos, a_descs, a_vals = _colunas_orcamento(A)
+    achados, b_descs, b_vals, b_norms = _buscar_referencia(referencia, codigos, comparar_descricao)
+    a_norms = _descricoes_norm(A, a_descs, comparar_descricao)
 
+    for codigo_base, a_banco, a_desc, a_val, a_norm, match, b_desc, b_val, b_norm in zip(
+        codigos, a_bancos, a_descs, a_vals, a_norms, achados, b_descs, b_vals, b_norms
+    ):
         cruzado.append(CruzadoRow(
             codigo=codigo_base,
-            a_banco=a.get("banco"),
-            a_desc=a["descricao"],
+            a_banco=a_banco,
+            a_desc=a_desc,
             a_valor=a_val,
             b_desc=b_desc,
             b_valor=b_val,
@@ -110,7 +179,8 @@ def cruzar(
 
             # descrição
             if comparar_descricao:
-                if norm_text(a["descricao"]) != norm_text(b_desc or ""):
+                # descrições normalizadas uma vez só (memo por string / coluna da ItemTable)
+                if a_norm != b_norm:
                     motivos.append("DESCRICAO_DIVERGENTE")
 
         if motivos:
@@ -123,3 +193,384 @@ def cruzar(
             ))
 
     return cruzado, diverg
+
+
+# ---------- motor vetorizado ----------
+
+# motivos por combinação de flags (bit 0: código, 1: base zero/nula, 2: valor, 3: descrição)
+_MOTIVOS = ("CODIGO_NAO_ENCONTRADO", "VALOR_BASE_ZERO_OU_NULO", "VALOR_DIVERGENTE", "DESCRICAO_DIVERGENTE")
+_MOTIVOS_POR_FLAG = [
+    tuple(m for bit, m in enumerate(_MOTIVOS) if flags >> bit & 1) for flags in range(16)
+]
+
+
+def _floats(valores) -> Optional[np.ndarray]:
+    """Valores como float64; None se algum não for float (aí vale o motor linha a linha)."""
+    if isinstance(valores, np.ndarray):
+        return valores.astype(np.float64, copy=False)
+    if not all(type(v) is float for v in valores):
+        return None
+    return np.asarray(valores, dtype=np.float64)
+
+
+def _referencia_colunas(referencia: CanonDict | ItemTable, codigos: list, normalizar: bool):
+    """
+    (achou, descrição, valor float64, descrição normalizada) da referência para cada código,
+    em arrays. A normalização só é feita se `normalizar` (senão, None).
+    """
+    n = len(codigos)
+    if isinstance(referencia, ItemTable):
+        pos = referencia.linhas(codigos) if len(referencia) else np.full(n, -1)
+        achou = pos >= 0
+        p = pos[achou]
+        descs = np.full(n, None, dtype=object)
+        descs[achou] = referencia.descricoes[p]
+        vals = np.zeros(n, dtype=np.float64)
+        vals[achou] = referencia.valores[p]
+        norms = None
+        if normalizar:
+            norms = np.full(n, None, dtype=object)
+            norms[achou] = referencia.descricoes_norm[p]
+        return achou, descs, vals, norms
+    bs = [referencia.get(c) for c in codigos]
+    achou = np.fromiter((b is not None for b in bs), dtype=bool, count=n)
+    descs = como_objetos([b["descricao"] if b else None for b in bs])
+    vals = _floats([b["valor_unit"] if b else 0.0 for b in bs])
+    norms = como_objetos([norm_text(b["descricao"]) if b else None for b in bs]) if normalizar else None
+    return achou, descs, vals, norms
+
+
+def _direcoes(a: np.ndarray, b: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """`_dir` em bloco: MAIOR/MENOR/IGUAL onde `mask`, "" no resto."""
+    d = np.where(a > b, "MAIOR", np.where(a < b, "MENOR", "IGUAL")).astype(object)
+    d[~mask] = ""
+    return d
+
+
+def _opcionais(x: np.ndarray, mask: np.ndarray) -> list:
+    """Array float → lista de float, com None onde `mask` é False."""
+    o = x.astype(object)
+    o[~mask] = None
+    return o.tolist()
+
+
+@contextmanager
+def _sem_gc():
+    """
+    Pausa o coletor cíclico enquanto as linhas de saída são montadas: são dezenas de
+    milhares de dicts sem ciclos, e cada coleta disparada no meio varre o heap inteiro.
+    """
+    ativo = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if ativo:
+            gc.enable()
+
+
+class _Orcamento:
+    """Colunas do orçamento usadas pelo motor vetorizado, extraídas uma vez (e reusadas por referência)."""
+
+    def __init__(self, A: CanonDict | ItemTable):
+        self.A = A
+        self.codigos, self.a_bancos, self.a_descs, self.a_vals = _colunas_orcamento(A)
+        self.a = _floats(A.valores if isinstance(A, ItemTable) else self.a_vals)
+
+    @cached_property
+    def a_norm(self) -> np.ndarray:
+        return como_objetos(_descricoes_norm(self.A, self.a_descs, True))
+
+    def mask_banco(self, banco: Optional[str]) -> np.ndarray:
+        """Itens que `filtrar_orcamento_por_banco(A, banco)` manteria."""
+        if not banco:
+            return np.ones(len(self.codigos), dtype=bool)
+        if isinstance(self.A, ItemTable):
+            return self.A.mask_banco(banco)
+        alvo = banco.casefold().strip()
+        return np.fromiter((bool(b) and b.casefold().strip() == alvo for b in self.a_bancos),
+                           dtype=bool, count=len(self.a_bancos))
+
+
+class _Colunas:
+    """Colunas do cruzamento que não dependem da tolerância (orçamento já filtrado)."""
+
+    def __init__(self, orc: _Orcamento, referencia: CanonDict | ItemTable, comparar_descricao: bool):
+        self.codigos, self.a_bancos, self.a_descs, self.a_vals = orc.codigos, orc.a_bancos, orc.a_descs, orc.a_vals
+        self.achou, self.b_descs, self.b, b_norm = _referencia_colunas(referencia, self.codigos, comparar_descricao)
+        self.a = orc.a
+        if not self.vetorizavel:
+            return
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.dif_abs = np.abs(self.a - self.b)
+            self.dif_rel = self.dif_abs / self.b
+
+        base_zero = self.achou & (self.b == 0)
+        self.base_ok = self.achou & ~base_zero
+        self.f_zero = base_zero & (self.a != self.b)
+        # flags que valem em qualquer tolerância (bit 2, valor, fica para `flags`)
+        self.fixas = (~self.achou).astype(np.int8) | (self.f_zero << 1)
+        if comparar_descricao:
+            self.fixas |= (self.achou & (orc.a_norm != b_norm)) << 3
+
+    @property
+    def vetorizavel(self) -> bool:
+        return self.a is not None and self.b is not None
+
+    def f_valor(self, tol_rel: float) -> np.ndarray:
+        return self.base_ok & (self.dif_rel > tol_rel)
+
+
+def cruzar_vetorizado(
+    orcamento: CanonDict | ItemTable,
+    referencia: CanonDict | ItemTable,
+    *,
+    banco: Optional[str] = None,
+    tol_rel: float = 0.02,
+    comparar_descricao: bool = True,
+) -> Tuple[List[CruzadoDifRow], List[DivergenciaRow]]:
+    """Mesmo cruzamento de `cruzar`, em operações sobre colunas.
+
+    Devolve o cruzado já com `dif_abs`/`dif_rel` em cada linha (como a CLI grava no JSON),
+    numa passada só: busca, flags de match/motivo, diferenças e direção são calculadas
+    para o orçamento inteiro de uma vez; o Python só monta as linhas de saída.
+    Valores que não sejam float (dicts montados à mão) caem no motor linha a linha.
+    """
+    A = filtrar_orcamento_por_banco(orcamento, banco)
+    col = _Colunas(_Orcamento(A), referencia, comparar_descricao)
+    if not col.vetorizavel:
+        cruzado, diverg = cruzar(A, referencia, tol_rel=tol_rel, comparar_descricao=comparar_descricao)
+        return _com_difs(cruzado), diverg
+
+    codigos, achou, a, b, base_ok = col.codigos, col.achou, col.a, col.b, col.base_ok
+    dif_abs, dif_rel = col.dif_abs, col.dif_rel
+    f_valor = col.f_valor(tol_rel)
+    flags = col.fixas | (f_valor << 2)
+
+    idx = np.flatnonzero(flags)
+    direcao = _direcoes(a[idx], b[idx], (col.f_zero | f_valor)[idx])
+    motivos = [_MOTIVOS_POR_FLAG[f] for f in flags[idx].tolist()]
+
+    with _sem_gc():
+        cruzado: List[CruzadoDifRow] = [
+            {"codigo": c, "a_banco": ab, "a_desc": ad, "a_valor": av, "b_desc": bd, "b_valor": bv,
+             "match": m, "dif_abs": da, "dif_rel": dr}
+            for c, ab, ad, av, bd, bv, m, da, dr in zip(
+                codigos, col.a_bancos, col.a_descs, col.a_vals, col.b_descs.tolist(), _opcionais(b, achou),
+                achou.tolist(), _opcionais(dif_abs, achou), _opcionais(dif_rel, base_ok),
+            )
+        ]
+        diverg: List[DivergenciaRow] = [
+            {"codigo": codigos[i], "motivos": list(m), "dif_abs": da, "dif_rel": dr, "dir": d}
+            for i, m, da, dr, d in zip(
+                idx.tolist(), motivos,
+                _opcionais(dif_abs[idx], base_ok[idx]), _opcionais(dif_rel[idx], base_ok[idx]),
+                direcao.tolist(),
+            )
+        ]
+    return cruzado, diverg
+
+
+class FaixaTolerancia(TypedDict):
+    tol_rel: float
+    total_divergencias: int     # linhas com algum motivo nesta tolerância
+    valor_divergente: int       # linhas com VALOR_DIVERGENTE nesta tolerância
+    codigos: List[str]          # códigos divergentes (únicos, ordenados)
+
+
+def varrer_tolerancias(
+    orcamento: CanonDict | ItemTable,
+    referencia: CanonDict | ItemTable,
+    tolerancias: List[float],
+    *,
+    banco: Optional[str] = None,
+    comparar_descricao: bool = True,
+) -> List[FaixaTolerancia]:
+    """Divergências de `cruzar` em várias tolerâncias, com um só cruzamento.
+
+    As diferenças relativas são calculadas uma vez e ordenadas; para cada tolerância t,
+    as linhas com VALOR_DIVERGENTE (dif_rel > t) são a cauda da ordenação, achada por
+    busca binária. Os demais motivos não dependem de t e são somados a cada faixa.
+    """
+    A = filtrar_orcamento_por_banco(orcamento, banco)
+    col = _Colunas(_Orcamento(A), referencia, comparar_descricao)
+    if not col.vetorizavel:
+        faixas = []
+        for t in tolerancias:
+            _, diverg = cruzar(A, referencia, tol_rel=t, comparar_descricao=comparar_descricao)
+            n_valor = sum("VALOR_DIVERGENTE" in d["motivos"] for d in diverg)
+            faixas.append(FaixaTolerancia(tol_rel=t, total_divergencias=len(diverg), valor_divergente=n_valor,
+                                          codigos=sorted({d["codigo"] for d in diverg})))
+        return faixas
+
+    # NaN nunca passa de `dif_rel > t`: fica fora da ordenação, como as linhas sem base
+    candidatas = np.flatnonzero(col.base_ok & ~np.isnan(col.dif_rel))
+    ordem = candidatas[np.argsort(col.dif_rel[candidatas], kind="stable")]
+    difs = col.dif_rel[ordem]
+
+    fixas = col.fixas != 0
+    codigos = como_objetos(col.codigos)
+    faixas: List[FaixaTolerancia] = []
+    for t in tolerancias:
+        cauda = ordem[np.searchsorted(difs, t, side="right"):]   # dif_rel > t
+        n_so_valor = int((~fixas[cauda]).sum())
+        divergentes = np.concatenate([codigos[fixas], codigos[cauda]])
+        faixas.append(FaixaTolerancia(
+            tol_rel=t,
+            total_divergencias=int(fixas.sum()) + n_so_valor,
+            valor_divergente=len(cauda),
+            codigos=sorted(set(divergentes.tolist())),
+        ))
+    return faixas
+
+
+class RefCruzada(TypedDict):
+    b_desc: Optional[str]
+    b_valor: Optional[float]
+    match: bool
+    dif_abs: Optional[float]
+    dif_rel: Optional[float]
+    motivos: List[str]
+    dir: str
+
+
+class CruzadoMultiRow(TypedDict):
+    codigo: str
+    a_banco: Optional[str]
+    a_desc: str
+    a_valor: float
+    refs: Dict[str, Optional[RefCruzada]]  # None = item fora do banco daquela referência
+
+
+def _referencia_float(referencia: CanonDict, codigos: list) -> Tuple[ItemTable, np.ndarray]:
+    """
+    Referência com valores não float (dict montado à mão) como `ItemTable`, com valor nulo
+    tratado como 0 (mesma regra de `cruzar`), e a máscara dos `codigos` cujo valor era nulo.
+    """
+    tabela = ItemTable.from_canon(referencia)
+    tabela.valores[[it["valor_unit"] is None for it in referencia.values()]] = 0.0
+    b_nulo = np.fromiter(
+        ((b := referencia.get(c)) is not None and b["valor_unit"] is None for c in codigos),
+        dtype=bool, count=len(codigos),
+    )
+    return tabela, b_nulo
+
+
+def cruzar_multi(
+    orcamento: CanonDict | ItemTable,
+    referencias: Mapping[str, CanonDict | ItemTable],
+    *,
+    bancos: Optional[Mapping[str, Optional[str]]] = None,
+    tol_rel: float = 0.02,
+    comparar_descricao: bool = True,
+) -> Tuple[List[CruzadoMultiRow], Dict[str, Dict[str, int]]]:
+    """Cruza o ORÇAMENTO contra N referências (ex.: vários meses de SINAPI/SUDECAP) numa passada.
+
+    - `referencias`: nome → referência (ex.: {"SINAPI_2025_06": ..., "SUDECAP_2025_04": ...}).
+    - `bancos`: nome → banco do orçamento comparado com aquela referência (como `banco` em
+      `cruzar`); referência ausente ou None = todos os itens.
+
+    As colunas do orçamento (códigos, valores, descrições normalizadas) são extraídas uma vez;
+    para cada referência, busca, diferenças e motivos são calculados em bloco, com as mesmas
+    regras de `cruzar`. Sai uma linha larga por item (os que entram em pelo menos uma
+    referência), com `refs[nome]` = valor, diferenças e motivos naquela referência, e um
+    resumo por referência. Valores que não sejam float são convertidos para float; valor
+    ausente (None) sai como None nas colunas da referência.
+    """
+    orc = _Orcamento(orcamento)
+    n = len(orc.codigos)
+    a_nulo = np.zeros(n, dtype=bool)
+    if orc.a is None:
+        orc.a = np.asarray(orc.a_vals, dtype=np.float64)
+        a_nulo = np.fromiter((v is None for v in orc.a_vals), dtype=bool, count=n)
+    bancos = bancos or {}
+
+    nomes = list(referencias)
+    em_alguma = np.zeros(n, dtype=bool)
+    por_ref: list[list] = []
+    resumo: Dict[str, Dict[str, int]] = {}
+    for nome in nomes:
+        col = _Colunas(orc, referencias[nome], comparar_descricao)
+        b_nulo = np.zeros(n, dtype=bool)
+        if not col.vetorizavel:
+            tabela, b_nulo = _referencia_float(referencias[nome], orc.codigos)
+            col = _Colunas(orc, tabela, comparar_descricao)
+        # valor ausente (None) sai como None, não NaN — como em `cruzar`/`_com_difs`
+        tem_b = col.achou & ~b_nulo
+        dentro = orc.mask_banco(bancos.get(nome))
+        em_alguma |= dentro
+
+        f_valor = col.f_valor(tol_rel)
+        flags = col.fixas | (f_valor << 2)
+        direcao = _direcoes(col.a, col.b, col.f_zero | f_valor)
+        resumo[nome] = {
+            "comparados": int(dentro.sum()),
+            "encontrados": int((dentro & col.achou).sum()),
+            "divergencias": int((dentro & (flags != 0)).sum()),
+        }
+        with _sem_gc():
+            por_ref.append([
+                {"b_desc": bd, "b_valor": bv, "match": m, "dif_abs": da, "dif_rel": dr,
+                 "motivos": list(_MOTIVOS_POR_FLAG[f]), "dir": d} if ok else None
+                for ok, bd, bv, m, da, dr, f, d in zip(
+                    dentro.tolist(), col.b_descs.tolist(), _opcionais(col.b, tem_b), col.achou.tolist(),
+                    _opcionais(col.dif_abs, tem_b & ~a_nulo), _opcionais(col.dif_rel, col.base_ok & ~a_nulo),
+                    flags.tolist(), direcao.tolist(),
+                )
+            ])
+
+    with _sem_gc():
+        linhas: List[CruzadoMultiRow] = [
+            {"codigo": c, "a_banco": ab, "a_desc": ad, "a_valor": av, "refs": dict(zip(nomes, ents))}
+            for ok, c, ab, ad, av, *ents in zip(
+                em_alguma.tolist(), orc.codigos, orc.a_bancos, orc.a_descs, orc.a_vals, *por_ref,
+            )
+            if ok
+        ]
+    return linhas, resumo
+
+
+def separar_referencia(
+    linhas: List[CruzadoMultiRow], nome: str
+) -> Tuple[List[CruzadoDifRow], List[DivergenciaRow]]:
+    """Cruzado e divergências de uma referência de `cruzar_multi`, no formato de `cruzar_vetorizado`.
+
+    Cada arquivo por banco sai da mesma passada multi-referência, sem cruzar de novo; nas
+    divergências, dif_abs/dif_rel ficam None com referência zerada/nula (como em `cruzar`).
+    """
+    cruzado: List[CruzadoDifRow] = []
+    diverg: List[DivergenciaRow] = []
+    with _sem_gc():
+        for ln in linhas:
+            r = ln["refs"][nome]
+            if r is None:
+                continue
+            cruzado.append({
+                "codigo": ln["codigo"], "a_banco": ln["a_banco"], "a_desc": ln["a_desc"], "a_valor": ln["a_valor"],
+                "b_desc": r["b_desc"], "b_valor": r["b_valor"], "match": r["match"],
+                "dif_abs": r["dif_abs"], "dif_rel": r["dif_rel"],
+            })
+            if r["motivos"]:
+                base_ok = r["b_valor"] is not None and r["b_valor"] != 0
+                diverg.append({
+                    "codigo": ln["codigo"], "motivos": list(r["motivos"]),
+                    "dif_abs": r["dif_abs"] if base_ok else None, "dif_rel": r["dif_rel"], "dir": r["dir"],
+                })
+    return cruzado, diverg
+
+
+def _com_difs(cruzado: List[CruzadoRow]) -> List[CruzadoDifRow]:
+    """dif_abs/dif_rel linha a linha (mesma regra da CLI), para o caso não vetorizável."""
+    out: List[CruzadoDifRow] = []
+    for r in cruzado:
+        a, b = r["a_valor"], r["b_valor"]
+        dif_abs = dif_rel = None
+        try:
+            if a is not None and b is not None:
+                dif_abs = abs(float(a) - float(b))
+                dif_rel = dif_abs / float(b) if float(b) != 0 else None
+        except Exception:
+            pass
+        out.append({**r, "dif_abs": dif_abs, "dif_rel": dif_rel})  # type: ignore[typeddict-item]
+    return out
@@ -0,0 +1,158 @@
+# src/cruzar_orcamento/validators/revisao.py
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple, TypedDict
+
+from ..colunar import EstruturaCompacta, ItemTable
+from ..models import CanonDict, EstruturaDict
+from ..utils.utils_code import CODIGOS
+from ..utils.utils_text import norm_text
+from .estrutura_compare import ChildDiffDesc, LadoEstrutura, codigos_ordenados, comparar_pai, hash_composicoes
+
+# Diferença entre duas revisões do mesmo ORÇAMENTO (A = anterior, B = nova), por composição:
+# cada composição tem uma assinatura (valores, hash de conteúdo da estrutura, descrição
+# normalizada); as que têm a mesma assinatura nas duas revisões são puladas sem comparar filhos.
+
+
+class CompRevisao(TypedDict):
+    codigo: str
+    status: str                               # "ADICIONADA" | "REMOVIDA" | "ALTERADA"
+    motivos: List[str]                        # VALOR_ALTERADO, DESCRICAO_ALTERADA, FILHOS_ALTERADOS
+    desc_a: Optional[str]
+    desc_b: Optional[str]
+    valor_a: Optional[float]                  # 1ª ocorrência do código na aba de Composições
+    valor_b: Optional[float]
+    dif_abs: Optional[float]                  # valor_b - valor_a (com sinal)
+    dif_rel: Optional[float]                  # dif_abs / |valor_a|
+    filhos_adicionados: List[str]             # em B e não em A
+    filhos_removidos: List[str]               # em A e não em B
+    filhos_desc_alterada: List[ChildDiffDesc] # mesmo código, descrições diferentes
+
+
+class ResumoRevisao(TypedDict):
+    adicionadas: int
+    removidas: int
+    alteradas: int
+    inalteradas: int
+
+
+class _Revisao:
+    """Composições de uma revisão por id canônico do código: valores, descrição e estrutura."""
+
+    def __init__(self, precos: CanonDict | ItemTable, estrutura: EstruturaDict | EstruturaCompacta):
+        self.lado = LadoEstrutura(estrutura)
+        self.codigo: Dict[int, str] = {}
+        self.desc: Dict[int, str] = {}
+        self.valores: Dict[int, Tuple[float, ...]] = {}
+        for it in precos.values():
+            i = CODIGOS.id_canonico(it["codigo"])
+            self.valores[i] = self.valores.get(i, ()) + (it["valor_unit"],)
+            self.codigo.setdefault(i, it["codigo"])
+            self.desc.setdefault(i, it["descricao"])
+
+        self.estr: Dict[int, object] = {}
+        self.hash: Dict[int, int] = {}
+        hashes = hash_composicoes(estrutura)
+        for (i, h), k in zip(self.lado.pais(), estrutura):
+            self.estr[i] = h
+            self.hash[i] = hashes[k]
+            self.codigo.setdefault(i, k)
+            self.desc.setdefault(i, self.lado.descricao(h) or "")
+
+    def assinatura(self, i: int) -> tuple:
+        return self.valores.get(i), self.hash.get(i), norm_text(self.desc[i])
+
+    def valor(self, i: int) -> Optional[float]:
+        v = self.valores.get(i)
+        return v[0] if v else None
+
+    def filhos(self, i: int) -> List[str]:
+        h = self.estr.get(i)
+        return [] if h is None else codigos_ordenados(self.lado.filhos(h).keys())
+
+
+def _registro(i: int, status: str, motivos: List[str], ra: _Revisao, rb: _Revisao) -> CompRevisao:
+    va, vb = ra.valor(i), rb.valor(i)
+    dif_abs = vb - va if va is not None and vb is not None else None
+    return CompRevisao(
+        codigo=rb.codigo.get(i) or ra.codigo[i],
+        status=status,
+        motivos=motivos,
+        desc_a=ra.desc.get(i),
+        desc_b=rb.desc.get(i),
+        valor_a=va,
+        valor_b=vb,
+        dif_abs=dif_abs,
+        dif_rel=dif_abs / abs(va) if dif_abs is not None and va else None,
+        filhos_adicionados=[],
+        filhos_removidos=[],
+        filhos_desc_alterada=[],
+    )
+
+
+def diff_revisoes(
+    precos_a: CanonDict | ItemTable,
+    estrutura_a: EstruturaDict | EstruturaCompacta,
+    precos_b: CanonDict | ItemTable,
+    estrutura_b: EstruturaDict | EstruturaCompacta,
+) -> Tuple[List[CompRevisao], ResumoRevisao]:
+    """
+    Composições adicionadas, removidas e alteradas de A (revisão anterior) para B (nova).
+
+    Os códigos casam pela forma canônica (`CODIGOS`). Composições com a mesma assinatura nas
+    duas revisões (valores de todas as ocorrências, `hash_composicoes` e descrição normalizada)
+    são contadas como inalteradas sem comparar filhos; nas demais, os filhos são comparados
+    como em `comparar_estruturas`. Saída na ordem de A, seguida das novas (ordem de B).
+    """
+    ra, rb = _Revisao(precos_a, estrutura_a), _Revisao(precos_b, estrutura_b)
+    resumo = ResumoRevisao(adicionadas=0, removidas=0, alteradas=0, inalteradas=0)
+    out: List[CompRevisao] = []
+
+    for i in list(ra.codigo) + [i for i in rb.codigo if i not in ra.codigo]:
+        if i not in rb.codigo:
+            r = _registro(i, "REMOVIDA", [], ra, rb)
+            r["filhos_removidos"] = ra.filhos(i)
+            resumo["removidas"] += 1
+            out.append(r)
+            continue
+        if i not in ra.codigo:
+            r = _registro(i, "ADICIONADA", [], ra, rb)
+            r["filhos_adicionados"] = rb.filhos(i)
+            resumo["adicionadas"] += 1
+            out.append(r)
+            continue
+        if ra.assinatura(i) == rb.assinatura(i):
+            resumo["inalteradas"] += 1
+            continue
+
+        motivos: List[str] = []
+        if ra.valores.get(i) != rb.valores.get(i):
+            motivos.append("VALOR_ALTERADO")
+        if norm_text(ra.desc[i]) != norm_text(rb.desc[i]):
+            motivos.append("DESCRICAO_ALTERADA")
+
+        h_a, h_b = ra.estr.get(i), rb.estr.get(i)
+        if h_a is not None and h_b is not None:
+            d = comparar_pai(ra.lado, rb.lado, i, h_a, h_b)
+            removidos, adicionados = (d["filhos_missing"], d["filhos_extra"]) if d else ([], [])
+            desc_alterada = d["filhos_desc_mismatch"] if d else []
+        else:
+            removidos, adicionados, desc_alterada = ra.filhos(i), rb.filhos(i), []
+        if removidos or adicionados or desc_alterada:
+            motivos.append("FILHOS_ALTERADOS")
+
+        if not motivos:
+            # só ordem dos filhos / espaços mudaram
+            resumo["inalteradas"] += 1
+            continue
+        r = _registro(i, "ALTERADA", motivos, ra, rb)
+        r["filhos_adicionados"] = adicionados
+        r["filhos_removidos"] = removidos
+        r["filhos_desc_alterada"] = desc_alterada
+        resumo["alteradas"] += 1
+        out.append(r)
+
+    return out, resumo
+
+
+__all__ = ["CompRevisao", "ResumoRevisao", "diff_revisoes"]
@@ -0,0 +1,146 @@
+# src/cruzar_orcamento/validators/sugestoes.py
+from __future__ import annotations
+
+import logging
+from typing import Iterable, List, Optional, TypedDict
+
+import numpy as np
+
+from ..models import CanonDict
+from ..colunar import ItemTable, como_objetos
+from ..utils.utils_text import norm_text
+
+logger = logging.getLogger(__name__)
+
+# Sugestões de código por descrição para itens com CODIGO_NAO_ENCONTRADO: índice invertido de
+# trigramas (de caracteres) sobre as descrições normalizadas da referência, montado uma vez.
+# Busca: candidatos pelos trigramas menos frequentes da consulta (postings curtos), depois
+# score exato (Dice dos conjuntos de trigramas) só nesses candidatos.
+
+
+class Sugestao(TypedDict):
+    codigo: str
+    descricao: str
+    score: float  # Dice dos trigramas: 2·|A∩B| / (|A|+|B|), entre 0 e 1
+
+
+def _trigramas(texto_norm: str) -> set[str]:
+    s = f" {texto_norm} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class IndiceDescricoes:
+    """
+    Índice de trigramas das descrições de uma referência.
+
+    - `gram_id`: trigrama → id
+    - `doc_offsets`/`doc_grams`: CSR documento → ids dos seus trigramas (ordenados, únicos)
+    - `post_offsets`/`postings`: CSR trigrama → documentos que o contêm (índice invertido)
+
+    `max_df`: trigramas presentes em mais que essa fração das descrições só geram candidatos
+    se a consulta tiver poucos raros (entram sempre no score), para cada consulta ler poucos
+    postings. `candidatos`: quantos documentos (pelo teto do score) recebem o score exato.
+    """
+
+    def __init__(self, codigos: Iterable[str], descricoes: Iterable[str], descricoes_norm: Iterable[str],
+                 *, max_df: float = 0.05, candidatos: int = 200):
+        self.codigos = como_objetos(codigos)
+        self.descricoes = como_objetos(descricoes)
+        self.max_df = max_df
+        self.candidatos = candidatos
+
+        self.gram_id: dict[str, int] = {}
+        gid = self.gram_id.setdefault
+        offsets = [0]
+        grams: list[int] = []
+        for t in descricoes_norm:
+            ids = sorted({gid(g, len(self.gram_id)) for g in _trigramas(t)})
+            grams.extend(ids)
+            offsets.append(len(grams))
+        self.doc_offsets = np.asarray(offsets, dtype=np.int64)
+        self.doc_grams = np.asarray(grams, dtype=np.int32)
+        self.doc_len = np.diff(self.doc_offsets)
+
+        # inverte o CSR: documentos agrupados por trigrama (ordem estável = documentos crescentes)
+        doc_de = np.repeat(np.arange(len(self.codigos), dtype=np.int32), self.doc_len)
+        ordem = np.argsort(self.doc_grams, kind="stable")
+        self.postings = doc_de[ordem]
+        df = np.bincount(self.doc_grams, minlength=len(self.gram_id))
+        self.post_offsets = np.concatenate([[0], np.cumsum(df)])
+        self.df = df
+        logger.info(f"Índice de descrições: {len(self.codigos)} itens, {len(self.gram_id)} trigramas.")
+
+    @classmethod
+    def from_referencia(cls, referencia: CanonDict | ItemTable, **kw) -> "IndiceDescricoes":
+        if isinstance(referencia, ItemTable):
+            return cls(referencia.codigos, referencia.descricoes, referencia.descricoes_norm.tolist(), **kw)
+        itens = list(referencia.values())
+        descs = [it["descricao"] for it in itens]
+        return cls([it["codigo"] for it in itens], descs, [norm_text(d) for d in descs], **kw)
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    def buscar(self, descricao: str, k: int = 5, *, normalizada: bool = False) -> List[Sugestao]:
+        """Top-k itens da referência com descrição mais parecida (score decrescente)."""
+        q = _trigramas(descricao if normalizada else norm_text(descricao))
+        ids = np.fromiter((i for i in map(self.gram_id.get, q) if i is not None), dtype=np.int64)
+        if k <= 0 or not len(ids) or not len(self):
+            return []
+
+        # candidatos: votos dos trigramas raros da consulta — no mínimo a metade mais rara deles,
+        # para que consultas só com trigramas comuns ainda separem os documentos
+        df = self.df[ids]
+        n_raros = int((df <= max(1, self.max_df * len(self))).sum())
+        raros = ids[np.argsort(df, kind="stable")[:max(n_raros, (len(ids) + 1) // 2)]]
+        post = np.concatenate([self.postings[self.post_offsets[g]:self.post_offsets[g + 1]] for g in raros])
+        docs, votos = np.unique(post, return_counts=True)
+        if len(docs) > self.candidatos:
+            # limite superior do score de cada candidato (votos + trigramas não usados no voto)
+            n_doc = self.doc_len[docs]
+            teto = np.minimum(n_doc, votos + (len(ids) - len(raros))) / (len(q) + n_doc)
+            docs = docs[np.argpartition(-teto, self.candidatos - 1)[:self.candidatos]]
+
+        # score exato nos candidatos: |A∩B| por documento via isin + reduceat no CSR
+        a, b = self.doc_offsets[docs], self.doc_offsets[docs + 1]
+        sel = np.concatenate([np.arange(x, y) for x, y in zip(a.tolist(), b.tolist())])
+        hit = np.isin(self.doc_grams[sel], ids).astype(np.int32)
+        inter = np.add.reduceat(hit, np.concatenate([[0], np.cumsum(b - a)[:-1]]))
+        score = 2.0 * inter / (len(q) + self.doc_len[docs])
+
+        top = np.lexsort((docs, -score))[:k]   # empate: ordem da referência
+        return [
+            Sugestao(codigo=self.codigos[d], descricao=self.descricoes[d], score=round(float(s), 4))
+            for d, s in zip(docs[top].tolist(), score[top].tolist())
+        ]
+
+
+def anexar_sugestoes(
+    diverg: List[dict],
+    cruzado: List[dict],
+    indice: IndiceDescricoes,
+    k: int = 5,
+    motivo: Optional[str] = "CODIGO_NAO_ENCONTRADO",
+) -> List[dict]:
+    """
+    Acrescenta `sugestoes` (top-k do `indice`, pela descrição do ORÇAMENTO) às divergências
+    com `motivo`. `cruzado` fornece a descrição de cada código (linhas na mesma ordem).
+    Cada descrição distinta é buscada uma vez.
+    """
+    desc_de: dict[str, str] = {}
+    for r in cruzado:
+        if not r["match"]:
+            desc_de.setdefault(r["codigo"], r["a_desc"])  # type: ignore[attr-defined]
+
+    memo: dict[str, List[Sugestao]] = {}
+    for d in diverg:
+        if motivo and motivo not in d["motivos"]:
+            continue
+        t = norm_text(desc_de.get(d["codigo"], ""))
+        if t not in memo:
+            memo[t] = indice.buscar(t, k, normalizada=True) if t else []
+        d["sugestoes"] = list(memo[t])
+    return diverg
+
+
+__all__ = ["IndiceDescricoes", "Sugestao", "anexar_sugestoes"]